@@ -1,10 +1,57 @@
 # config.py
-from langchain.embeddings import HuggingFaceEmbeddings
+"""Project settings.
+
+Plain settings are read from the environment (and a .env file, if
+python-dotenv is installed) when this module is imported, which is cheap.
+Heavy resources are only built on first use through the get_* functions
+and are shared afterwards, so scripts that just need the Neo4j credentials
+never import torch or load a model.
+"""
+import os
+from functools import lru_cache
+
+try:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+except ImportError:
+    pass
 
 # AuraDB connection details
-NEO4J_URI = ""  # Added port number
-NEO4J_DB = "neo4j"  # Default database name
-NEO4J_USER = "neo4j"
-NEO4J_PASS = ""
+NEO4J_URI = os.getenv("NEO4J_URI", "")
+NEO4J_DB = os.getenv("NEO4J_DB", "neo4j")  # Default database name
+NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
+NEO4J_PASS = os.getenv("NEO4J_PASS", "")
+
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "sentence-transformers/all-MiniLM-L6-v2")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "mistral")
+ONTOLOGY_CSV = os.getenv("ONTOLOGY_CSV", r"C:\KG+RAG\data\ontology\mesh_terms.csv")
+
+
+@lru_cache(maxsize=None)
+def get_embedding_model(model_name=EMBEDDING_MODEL_NAME):
+    from langchain.embeddings import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(model_name=model_name)
+
+
+@lru_cache(maxsize=None)
+def get_chat_model(model_name=OLLAMA_MODEL, temperature=0):
+    from langchain_ollama import ChatOllama
+
+    return ChatOllama(model=model_name, temperature=temperature)
+
+
+@lru_cache(maxsize=None)
+def get_ontology_lookup(csv_path=ONTOLOGY_CSV):
+    # one mapped table (and fuzzy index) per CSV for OntologyMatcher and DictionaryTagger
+    from ontology.ontology_lookup import OntologyLookup
+
+    return OntologyLookup(csv_path)
+
 
-EMBEDDING_MODEL = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+def __getattr__(name):
+    # keeps `from config import EMBEDDING_MODEL` working, loaded on first access
+    if name == "EMBEDDING_MODEL":
+        return get_embedding_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
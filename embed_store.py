@@ -1,9 +1,12 @@
 # embed_store.py
 from langchain_community.vectorstores import Neo4jVector
+from ingest.embedding_ingestor import EmbeddingIngestor
 
 class EmbeddingStore:
     def __init__(self, embedding_model, uri, user, password):
         self.embedding_model = embedding_model
+        self._credentials = (uri, user, password)
+        self._ingestor = None
         self.store = Neo4jVector.from_existing_graph(
             embedding=self.embedding_model,
             url=uri,
@@ -16,6 +19,8 @@ class EmbeddingStore:
         )
 
     def add_chunks(self, chunks):
-        texts = [c.page_content for c in chunks]
-        metadatas = [c.metadata for c in chunks]
-        self.store.add_texts(texts=texts, metadatas=metadatas)
+        # Write vectors onto the existing Chunk nodes instead of add_texts,
+        # which would create duplicate nodes and re-embed on every run.
+        if self._ingestor is None:
+            self._ingestor = EmbeddingIngestor(self.embedding_model, *self._credentials)
+        return self._ingestor.add_chunks(chunks)
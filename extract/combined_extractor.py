@@ -0,0 +1,94 @@
+# extract/combined_extractor.py
+from typing import List
+from langchain.prompts import ChatPromptTemplate
+from langchain.output_parsers import PydanticOutputParser
+from pydantic import BaseModel
+
+from config import get_chat_model
+from metrics import METRICS
+
+from extract.entity_extractor import Entity
+from extract.relation_extractor import Relation
+
+
+class ExtractionResult(BaseModel):
+    entities: List[Entity]
+    relations: List[Relation]
+
+
+class CombinedExtractor:
+    """Extract entities and relations from a chunk with a single LLM call.
+
+    Drop-in replacement for running EntityExtractor and RelationExtractor
+    back to back over the same text.
+    """
+
+    def __init__(self, model_name="mistral", temperature=0, cache=None, llm=None):
+        self.model_name = model_name
+        self.temperature = temperature
+        self.cache = cache  # optional ExtractionCache
+        self._llm = llm  # chat model override; defaults to the shared ChatOllama client
+        self.parser = PydanticOutputParser(pydantic_object=ExtractionResult)
+        self.template = (
+            """Extract all domain-relevant entities and the relationships between them from this text.
+               Return a JSON object with two keys:
+               - 'entities': a list of objects with fields name, type, relation
+               - 'relations': a list of objects with fields entity1, entity2, relation_type, confidence (optional)
+               entity1 and entity2 must be copied exactly from the 'name' of an entity in 'entities'.
+
+               Example format:
+               {{
+                   "entities": [
+                       {{"name": "aspirin", "type": "Drug", "relation": null}},
+                       {{"name": "fever", "type": "Symptom", "relation": null}}
+                   ],
+                   "relations": [
+                       {{"entity1": "aspirin", "relation_type": "treats", "entity2": "fever", "confidence": 0.9}}
+                   ]
+               }}
+
+               Text: {chunk_text}"""
+        )
+        self.prompt = ChatPromptTemplate.from_template(self.template)
+
+    @staticmethod
+    def _reconcile(result):
+        """Make every relation endpoint the exact name of an extracted entity.
+
+        Endpoints are matched case-insensitively; an endpoint the model did
+        not also list as an entity is added with type "Unknown".
+        """
+        by_key = {}
+        for ent in result.entities:
+            by_key.setdefault(ent.name.lower().strip(), ent.name)
+
+        for rel in result.relations:
+            for attr in ("entity1", "entity2"):
+                name = getattr(rel, attr)
+                key = name.lower().strip()
+                if key not in by_key:
+                    result.entities.append(Entity(name=name.strip(), type="Unknown"))
+                    by_key[key] = name.strip()
+                setattr(rel, attr, by_key[key])
+        return result
+
+    @property
+    def llm(self):
+        # the ChatOllama client is created on first use and shared per model
+        if self._llm is not None:
+            return self._llm
+        return get_chat_model(self.model_name, self.temperature)
+
+    def _invoke(self, chunk_text: str):
+        # generation and output parsing are timed separately
+        with METRICS.timer("llm_generate_seconds", extractor="combined"):
+            message = (self.prompt | self.llm).invoke({"chunk_text": chunk_text})
+        METRICS.record_llm_usage(message, extractor="combined")
+        with METRICS.timer("llm_parse_seconds", extractor="combined"):
+            return self._reconcile(self.parser.invoke(message))
+
+    def extract(self, chunk_text: str):
+        if self.cache is not None:
+            key = self.cache.make_key(self.model_name, self.temperature, self.template, chunk_text)
+            return self.cache.get_or_compute(key, ExtractionResult, lambda: self._invoke(chunk_text))
+        return self._invoke(chunk_text)
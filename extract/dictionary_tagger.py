@@ -0,0 +1,207 @@
+# extract/dictionary_tagger.py
+import itertools
+import re
+import threading
+import time
+
+from config import get_ontology_lookup
+from metrics import METRICS
+
+# terms are matched on the same normalisation as FuzzyTermIndex: lower-cased
+# runs of ASCII letters and digits, everything else is a word boundary
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# MeSH tree categories (first letter of a tree number) used as entity type
+TREE_CATEGORIES = {
+    "A": "Anatomy", "B": "Organism", "C": "Disease", "D": "Chemical", "E": "Procedure",
+    "F": "Psychology", "G": "Phenomenon", "H": "Discipline", "I": "Social", "J": "Technology",
+    "K": "Humanities", "L": "Information Science", "M": "Population", "N": "Health Care", "Z": "Geographic",
+}
+
+
+class DictionaryTagger:
+    """Ontology term spotting with a word-level Aho-Corasick automaton.
+
+    Every term and synonym of the compiled ontology table is added to the
+    automaton as a sequence of word ids, so one left-to-right pass over a
+    chunk's words finds all mentions, whatever the dictionary size. Words
+    that occur in no term reset the automaton without a lookup, and matches
+    always end on word boundaries ("HIV" never matches inside "HIVE").
+    Overlapping mentions resolve to the leftmost-longest one.
+
+    tag(text) returns mentions with character spans; extract(text) returns
+    entity dicts in OntologyMatcher.normalize_entities' shape, already linked
+    to concept_id, so they can go straight to write_chunk_extraction.
+    """
+
+    def __init__(self, ontology_csv="data/ontology/umls_terms.csv", min_chars=3, extra_terms=()):
+        """min_chars: ignore terms shorter than this (after normalisation);
+        extra_terms: additional (term, concept_id) pairs, e.g. local synonyms."""
+        self.ontology_csv = ontology_csv
+        self.min_chars = min_chars
+        self.extra_terms = list(extra_terms)
+        self.lookup = get_ontology_lookup(ontology_csv)
+        self.chunks = 0
+        self.chunks_without_mentions = 0
+        # tag / has_mentions run on ParallelExtractor's worker threads
+        self._count_lock = threading.Lock()
+        self._build()
+
+    def _build(self):
+        start = time.perf_counter()
+        vocab = {}
+        goto = {}  # state * stride + word id -> state, filled below
+        edges = [{}]  # per-state children while building
+        depth = [0]
+        output = [-1]  # concept index of the term ending in this state
+        concept_ids = []
+        concept_index = {}
+        for term, concept_id in itertools.chain(self.lookup.table.iter_terms(), self.extra_terms):
+            words = _TOKEN.findall((term or "").lower())
+            if not words or len(" ".join(words)) < self.min_chars:
+                continue
+            state = 0
+            for word in words:
+                word_id = vocab.setdefault(word, len(vocab))
+                nxt = edges[state].get(word_id)
+                if nxt is None:
+                    nxt = edges[state][word_id] = len(edges)
+                    edges.append({})
+                    depth.append(depth[state] + 1)
+                    output.append(-1)
+                state = nxt
+            if output[state] < 0:
+                idx = concept_index.get(concept_id)
+                if idx is None:
+                    idx = concept_index[concept_id] = len(concept_ids)
+                    concept_ids.append(concept_id)
+                output[state] = idx
+
+        # failure links (longest proper suffix that is a trie path) and
+        # output links (nearest suffix state that ends a term), breadth first
+        n_states = len(edges)
+        fail = [0] * n_states
+        out_link = [0] * n_states
+        queue = list(edges[0].values())
+        for state in queue:
+            for word_id, child in edges[state].items():
+                f = fail[state]
+                while f and word_id not in edges[f]:
+                    f = fail[f]
+                f = edges[f].get(word_id, 0) if state else 0
+                fail[child] = f if f != child else 0
+                out_link[child] = f if output[f] >= 0 else out_link[f]
+                queue.append(child)
+
+        stride = max(1, len(vocab))
+        for state, children in enumerate(edges):
+            base = state * stride
+            for word_id, child in children.items():
+                goto[base + word_id] = child
+
+        self._vocab = vocab
+        self._goto = goto
+        self._stride = stride
+        self._fail = fail
+        self._out_link = out_link
+        self._depth = depth
+        self._output = output
+        self._concept_ids = concept_ids
+        self.n_states = n_states
+        self.build_seconds = time.perf_counter() - start
+        print(f"[INFO] Dictionary tagger: {len(concept_ids)} concepts, {n_states} states, "
+              f"{len(vocab)} words in {self.build_seconds:.2f}s")
+
+    def _scan(self, words):
+        """(first_word, last_word, concept index) for every term occurrence."""
+        goto_get = self._goto.get
+        vocab_get = self._vocab.get
+        stride, fail, out_link, depth, output = self._stride, self._fail, self._out_link, self._depth, self._output
+        hits = []
+        state = 0
+        for i, word in enumerate(words):
+            word_id = vocab_get(word)
+            if word_id is None:
+                state = 0
+                continue
+            while True:
+                nxt = goto_get(state * stride + word_id)
+                if nxt is not None:
+                    state = nxt
+                    break
+                if not state:
+                    break
+                state = fail[state]
+            s = state if output[state] >= 0 else out_link[state]
+            while s:
+                hits.append((i - depth[s] + 1, i, output[s]))
+                s = out_link[s]
+        return hits
+
+    def tag(self, text):
+        """Mentions in text, leftmost-longest and non-overlapping, as dicts
+        with text, concept_id, start and end (character offsets)."""
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # a few non-ASCII characters change length when lower-cased;
+            # fall back to offsets from a case-preserving scan
+            matches = list(re.finditer(r"[A-Za-z0-9]+", text))
+            words = [m.group().lower() for m in matches]
+        else:
+            matches = None
+            words = _TOKEN.findall(lowered)
+        hits = self._scan(words)
+        self._count(bool(hits))
+        if not hits:
+            return []
+
+        if matches is None:
+            matches = list(_TOKEN.finditer(lowered))
+        hits.sort(key=lambda h: (h[0], h[0] - h[1]))
+        mentions = []
+        last = -1
+        for first, end_word, concept in hits:
+            if first <= last:
+                continue
+            start, end = matches[first].start(), matches[end_word].end()
+            mentions.append({"text": text[start:end], "concept_id": self._concept_ids[concept],
+                             "start": start, "end": end})
+            last = end_word
+        METRICS.inc("dictionary_mentions_total", len(mentions))
+        return mentions
+
+    def entity_type(self, concept_id):
+        """Category of the concept's first tree number, e.g. C01.221 -> Disease."""
+        trees = (self.lookup.table.tree_numbers(concept_id) or "").strip()
+        return TREE_CATEGORIES.get(trees[:1], "Concept")
+
+    def extract(self, text):
+        """One linked entity dict per concept mentioned, with all its spans."""
+        entities = {}
+        for mention in self.tag(text):
+            concept_id = mention["concept_id"]
+            entity = entities.get(concept_id)
+            if entity is None:
+                entity = entities[concept_id] = {
+                    "name": self.lookup.get_term(concept_id) or mention["text"],
+                    "concept_id": concept_id,
+                    "parent_id": self.lookup.get_parent_id(concept_id),
+                    "match_score": 1.0,
+                    "type": self.entity_type(concept_id),
+                    "relation": None,
+                    "spans": [],
+                }
+            entity["spans"].append((mention["start"], mention["end"]))
+        return list(entities.values())
+
+    def has_mentions(self, text):
+        """True when text mentions any ontology term (pre-pass gate for the LLM)."""
+        found = bool(self._scan(_TOKEN.findall(text.lower())))
+        self._count(found)
+        return found
+
+    def _count(self, found):
+        with self._count_lock:
+            self.chunks += 1
+            if not found:
+                self.chunks_without_mentions += 1
@@ -4,7 +4,9 @@ from typing import List
 from langchain.prompts import ChatPromptTemplate
 from langchain.output_parsers import PydanticOutputParser
 from pydantic import BaseModel
-from langchain_ollama import ChatOllama
+
+from config import get_chat_model
+from metrics import METRICS
 
 class Entity(BaseModel):
     name: str
@@ -15,10 +17,13 @@ class EntityList(BaseModel):
     entities: List[Entity]
 
 class EntityExtractor:
-    def __init__(self, model_name="mistral"):
-        self.llm = ChatOllama(model=model_name, temperature=0)
+    def __init__(self, model_name="mistral", cache=None, llm=None):
+        self.model_name = model_name
+        self.temperature = 0
+        self.cache = cache  # optional ExtractionCache
+        self._llm = llm  # chat model override; defaults to the shared ChatOllama client
         self.parser = PydanticOutputParser(pydantic_object=EntityList)
-        self.prompt = ChatPromptTemplate.from_template(
+        self.template = (
             """Extract all domain-relevant entities and relationships from this text.
                Format the response as a JSON object with a single key 'entities' containing
                a list of entity objects. Each entity object should have fields: name, type, relation.
@@ -33,8 +38,27 @@ class EntityExtractor:
                
                Text: {chunk_text}"""
         )
+        self.prompt = ChatPromptTemplate.from_template(self.template)
+
+    @property
+    def llm(self):
+        # the ChatOllama client is created on first use and shared per model
+        if self._llm is not None:
+            return self._llm
+        return get_chat_model(self.model_name, self.temperature)
+
+    def _invoke(self, chunk_text):
+        # generation and output parsing are timed separately
+        with METRICS.timer("llm_generate_seconds", extractor="entity"):
+            message = (self.prompt | self.llm).invoke({"chunk_text": chunk_text})
+        METRICS.record_llm_usage(message, extractor="entity")
+        with METRICS.timer("llm_parse_seconds", extractor="entity"):
+            return self.parser.invoke(message)
 
     def extract(self, chunk_text):
-        chain = self.prompt | self.llm | self.parser
-        result = chain.invoke({"chunk_text": chunk_text})
+        if self.cache is not None:
+            key = self.cache.make_key(self.model_name, self.temperature, self.template, chunk_text)
+            result = self.cache.get_or_compute(key, EntityList, lambda: self._invoke(chunk_text))
+        else:
+            result = self._invoke(chunk_text)
         return result.entities  # Return the list of entities
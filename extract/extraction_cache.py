@@ -0,0 +1,150 @@
+# extract/extraction_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class ExtractionCache:
+    """On-disk cache of parsed LLM extraction results.
+
+    Entries are keyed by a hash of model name, temperature, prompt template
+    and chunk text, and store the Pydantic result as JSON. Backed by SQLite
+    in WAL mode, so worker threads (one connection each) and separate
+    processes can share one cache file.
+
+    max_entries / max_bytes bound the size (least recently used entries go
+    first); max_age_s drops entries older than that many seconds.
+    """
+
+    def __init__(self, path="data/cache/extractions.sqlite", max_entries=None, max_bytes=None,
+                 max_age_s=None, evict_every=100):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.evict_every = evict_every
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS extractions (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_extractions_accessed ON extractions(accessed_at)")
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(model_name, temperature, template, chunk_text):
+        payload = json.dumps([model_name, temperature, template, chunk_text], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key, schema):
+        """Return the cached result parsed as `schema`, or None."""
+        conn = self._conn()
+        row = conn.execute("SELECT value, created_at FROM extractions WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is not None and self.max_age_s is not None and now - row[1] > self.max_age_s:
+            conn.execute("DELETE FROM extractions WHERE key = ?", (key,))
+            conn.commit()
+            row = None
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        conn.execute("UPDATE extractions SET accessed_at = ? WHERE key = ?", (now, key))
+        conn.commit()
+        return schema.model_validate_json(row[0])
+
+    def put(self, key, result):
+        value = result.model_dump_json()
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO extractions (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+            (key, value, len(value), now, now),
+        )
+        conn.commit()
+        with self._lock:
+            self._puts += 1
+            due = self._puts % self.evict_every == 0
+        if due:
+            self.evict()
+
+    def get_or_compute(self, key, schema, compute):
+        result = self.get(key, schema)
+        if result is None:
+            result = compute()
+            self.put(key, result)
+        return result
+
+    def evict(self):
+        """Apply the age and size limits. Returns the number of rows removed."""
+        conn = self._conn()
+        removed = 0
+        if self.max_age_s is not None:
+            removed += conn.execute(
+                "DELETE FROM extractions WHERE created_at < ?", (time.time() - self.max_age_s,)
+            ).rowcount
+        if self.max_entries is not None:
+            removed += conn.execute(
+                """
+                DELETE FROM extractions WHERE key IN (
+                    SELECT key FROM extractions ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            ).rowcount
+        if self.max_bytes is not None:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM extractions").fetchone()[0]
+            if total > self.max_bytes:
+                to_delete = []
+                for key, size in conn.execute("SELECT key, size FROM extractions ORDER BY accessed_at"):
+                    if total <= self.max_bytes:
+                        break
+                    to_delete.append((key,))
+                    total -= size
+                conn.executemany("DELETE FROM extractions WHERE key = ?", to_delete)
+                removed += len(to_delete)
+        conn.commit()
+        return removed
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,118 @@
+# extract/near_duplicates.py
+import re
+import zlib
+
+import numpy as np
+
+from metrics import METRICS
+
+_WORD = re.compile(r"\w+")
+_PRIME = (1 << 32) + 15  # smallest prime above 2**32, larger than any crc32
+
+
+class NearDuplicateDetector:
+    """MinHash + LSH detection of near-duplicate chunks.
+
+    Chunks are compared as sets of lower-cased word `shingle_words`-grams;
+    two chunks are duplicates when the MinHash estimate of their Jaccard
+    similarity reaches `threshold`. The first chunk of a group is its
+    representative and later near-copies (repeated headers, footers,
+    boilerplate paragraphs, pages shared between documents) map to it, so
+    only the representative needs an LLM extraction.
+
+    LSH bands are sized so pairs somewhat below the threshold still become
+    candidates; every candidate is then checked against the threshold.
+    """
+
+    def __init__(self, threshold=0.9, num_perm=128, shingle_words=5, seed=1):
+        if not 0 < threshold <= 1:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+        self.threshold = threshold
+        self.shingle_words = shingle_words
+        rng = np.random.default_rng(seed)
+        # a * x + b stays below 2**64 for 32-bit x
+        self._a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+        self.bands, self.rows = self._band_layout(threshold, num_perm)
+        self._buckets = [{} for _ in range(self.bands)]
+        self._signatures = {}
+        self.checked = 0
+        self.duplicates = 0
+
+    @staticmethod
+    def _band_layout(threshold, num_perm):
+        """(bands, rows) whose LSH threshold (1/b)^(1/r) is closest to, but
+        not above, the similarity threshold."""
+        best = (1, num_perm)
+        best_t = -1.0
+        for rows in range(1, num_perm + 1):
+            bands = num_perm // rows
+            t = (1.0 / bands) ** (1.0 / rows)
+            if best_t < t <= threshold:
+                best, best_t = (bands, rows), t
+        return best
+
+    def _shingles(self, text):
+        words = _WORD.findall(text.lower())
+        k = self.shingle_words
+        if len(words) <= k:
+            grams = [" ".join(words)]
+        else:
+            grams = [" ".join(words[i:i + k]) for i in range(len(words) - k + 1)]
+        return np.fromiter({zlib.crc32(g.encode("utf-8")) for g in grams}, dtype=np.uint64)
+
+    def signature(self, text):
+        x = self._shingles(text)
+        return ((self._a[:, None] * x[None, :] + self._b[:, None]) % _PRIME).min(axis=1)
+
+    def _band_keys(self, signature):
+        r = self.rows
+        return [signature[i * r:(i + 1) * r].tobytes() for i in range(self.bands)]
+
+    def similarity(self, sig_a, sig_b):
+        """MinHash estimate of the Jaccard similarity of two signatures."""
+        return float(np.count_nonzero(sig_a == sig_b)) / len(sig_a)
+
+    def add(self, key, text):
+        """Key of the representative `text` duplicates, or None; in that case
+        the chunk becomes a representative itself."""
+        self.checked += 1
+        sig = self.signature(text)
+        keys = self._band_keys(sig)
+        best_key, best_sim = None, self.threshold
+        seen = set()
+        for band, band_key in zip(self._buckets, keys):
+            for candidate in band.get(band_key, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                sim = self.similarity(sig, self._signatures[candidate])
+                if sim >= best_sim:
+                    best_key, best_sim = candidate, sim
+        if best_key is not None:
+            self.duplicates += 1
+            METRICS.inc("near_duplicate_chunks_total")
+            return best_key
+        self._signatures[key] = sig
+        for band, band_key in zip(self._buckets, keys):
+            band.setdefault(band_key, []).append(key)
+        return None
+
+    def assign(self, items):
+        """{duplicate_key: representative_key} for an iterable of (key, text)."""
+        duplicates = {}
+        for key, text in items:
+            rep = self.add(key, text)
+            if rep is not None:
+                duplicates[key] = rep
+        return duplicates
+
+    def report(self, llm_calls_per_chunk, duplicates=None):
+        """Print and count the LLM calls saved; `duplicates` is the number of
+        duplicates actually linked (default: all detected)."""
+        duplicates = self.duplicates if duplicates is None else duplicates
+        saved = duplicates * llm_calls_per_chunk
+        METRICS.inc("llm_calls_saved_total", saved, reason="near_duplicate")
+        print(f"[INFO] Near-duplicate chunks: {duplicates} of {self.checked} "
+              f"(threshold {self.threshold}), {saved} LLM calls saved")
+        return saved
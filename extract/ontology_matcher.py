@@ -1,14 +1,32 @@
 # extract/ontology_matcher.py
-from ontology.ontology_lookup import OntologyLookup
+import time
+
+from config import get_ontology_lookup
+from metrics import METRICS
 
 class OntologyMatcher:
-    def __init__(self, ontology_csv: str = "data/ontology/umls_terms.csv"):
-        self.lookup = OntologyLookup(ontology_csv)
+    def __init__(self, ontology_csv: str = "data/ontology/umls_terms.csv", fuzzy: bool = False,
+                 fuzzy_threshold: float = 0.75):
+        """fuzzy: fall back to the trigram index for names without an exact
+        match, accepting the best candidate scoring at least fuzzy_threshold."""
+        self.ontology_csv = ontology_csv
+        self.fuzzy = fuzzy
+        self.fuzzy_threshold = fuzzy_threshold
+        self._lookup = None
+
+    @property
+    def lookup(self):
+        # the compiled ontology table is opened on the first lookup and
+        # shared with every other user of the same CSV
+        if self._lookup is None:
+            self._lookup = get_ontology_lookup(self.ontology_csv)
+        return self._lookup
 
     def normalize_entities(self, entities):
         """
         entities: list of dicts or objects with .name field
-        returns: list of dicts with concept_id added
+        returns: list of dicts with concept_id added; entities that already
+        carry a concept_id (e.g. from DictionaryTagger) keep it
         """
         def _get(obj, attr, default=None):
             # Support pydantic models / objects with attributes and plain dicts
@@ -21,19 +39,39 @@ class OntologyMatcher:
                 return obj.get(attr, default)
             return default
 
-        normalized = []
-        for entity in entities:
-            name = _get(entity, "name")
-            concept_id = self.lookup.get_concept_id(name)
-            parent_id = None
-            if concept_id:
-                parent_id = self.lookup.get_parent_id(concept_id)
+        start = time.perf_counter()
+        names = [_get(entity, "name") for entity in entities]
+        linked = [_get(entity, "concept_id") for entity in entities]
+        concept_ids = [c or self.lookup.get_concept_id(n) for c, n in zip(linked, names)]
+        scores = [(_get(entity, "match_score") or 1.0) if linked_id else (1.0 if concept_id else None)
+                  for entity, linked_id, concept_id in zip(entities, linked, concept_ids)]
+        n_exact = sum(1 for c in concept_ids if c)
+
+        if self.fuzzy:
+            misses = [i for i, c in enumerate(concept_ids) if c is None and names[i]]
+            candidates = self.lookup.get_fuzzy_candidates(
+                [names[i] for i in misses], k=1, min_score=self.fuzzy_threshold
+            )
+            for i, cands in zip(misses, candidates):
+                if cands:
+                    concept_ids[i], _, scores[i] = cands[0]
 
+        parent_ids = self.lookup.get_parent_ids(concept_ids)
+
+        normalized = []
+        for entity, name, concept_id, parent_id, score in zip(entities, names, concept_ids, parent_ids, scores):
             normalized.append({
                 "name": name,
                 "concept_id": concept_id,
                 "parent_id": parent_id,
+                "match_score": score,
                 "type": _get(entity, "type"),
                 "relation": _get(entity, "relation")
             })
+
+        n_matched = sum(1 for c in concept_ids if c)
+        METRICS.observe("ontology_match_seconds", time.perf_counter() - start)
+        METRICS.inc("ontology_entities_total", n_exact, result="exact")
+        METRICS.inc("ontology_entities_total", n_matched - n_exact, result="fuzzy")
+        METRICS.inc("ontology_entities_total", len(names) - n_matched, result="unmatched")
         return normalized
@@ -0,0 +1,72 @@
+# extract/parallel_extractor.py
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import percentile
+
+
+class ParallelExtractor:
+    """Run a blocking per-chunk extraction function on a thread pool.
+
+    At most `max_in_flight` chunks are submitted at once, so the model server
+    is never handed more requests than it can work on (match it to Ollama's
+    OLLAMA_NUM_PARALLEL). Results are yielded in input order, which keeps the
+    Neo4j writes in the same order as the sequential loop.
+    """
+
+    def __init__(self, extract_fn, max_in_flight=4):
+        self.extract_fn = extract_fn
+        self.max_in_flight = max(1, max_in_flight)
+        self.latencies = []
+        self._start = None
+        self._end = None
+
+    def _timed(self, chunk):
+        start = time.perf_counter()
+        result = self.extract_fn(chunk)
+        return result, time.perf_counter() - start
+
+    def run(self, chunks):
+        """Yield (chunk, result) pairs in the order chunks were given."""
+        self.latencies = []
+        self._start = time.perf_counter()
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            for chunk in chunks:
+                # backpressure: wait for the oldest request before adding more
+                if len(pending) >= self.max_in_flight:
+                    yield self._collect(pending)
+                pending.append((chunk, pool.submit(self._timed, chunk)))
+            while pending:
+                yield self._collect(pending)
+        self._end = time.perf_counter()
+
+    def _collect(self, pending):
+        chunk, future = pending.popleft()
+        result, latency = future.result()
+        self.latencies.append(latency)
+        return chunk, result
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+        end = self._end or time.perf_counter()
+        elapsed = end - self._start if self._start else 0.0
+        return {
+            "chunks": len(latencies),
+            "elapsed_s": elapsed,
+            "chunks_per_min": len(latencies) / elapsed * 60 if elapsed > 0 else 0.0,
+            "p50_s": percentile(latencies, 50),
+            "p90_s": percentile(latencies, 90),
+            "p99_s": percentile(latencies, 99),
+            "max_s": latencies[-1] if latencies else 0.0,
+        }
+
+    def report(self):
+        s = self.stats()
+        print(
+            f"[INFO] Extracted {s['chunks']} chunks in {s['elapsed_s']:.1f}s "
+            f"({s['chunks_per_min']:.1f} chunks/min, in-flight={self.max_in_flight}) "
+            f"latency p50={s['p50_s']:.2f}s p90={s['p90_s']:.2f}s "
+            f"p99={s['p99_s']:.2f}s max={s['max_s']:.2f}s"
+        )
@@ -3,7 +3,9 @@ from langchain.prompts import ChatPromptTemplate
 from langchain.output_parsers import PydanticOutputParser
 from pydantic import BaseModel
 from typing import List
-from langchain_ollama import ChatOllama  # or ChatOpenAI if cloud model
+
+from config import get_chat_model
+from metrics import METRICS
 
 
 class Relation(BaseModel):
@@ -18,23 +20,45 @@ class RelationList(BaseModel):
 
 
 class RelationExtractor:
-    def __init__(self, model_name="mistral", temperature=0):
-        self.llm = ChatOllama(model=model_name, temperature=temperature)
+    def __init__(self, model_name="mistral", temperature=0, cache=None, llm=None):
+        self.model_name = model_name
+        self.temperature = temperature
+        self.cache = cache  # optional ExtractionCache
+        self._llm = llm  # chat model override; defaults to the shared ChatOllama client
         self.parser = PydanticOutputParser(pydantic_object=RelationList)
-        self.prompt = ChatPromptTemplate.from_template(
+        self.template = (
             """Extract all entity-entity relationships from the given text chunk.
                Return a JSON object with key 'relations' containing a list of objects with fields: entity1, entity2, relation_type, confidence (optional).
                Example:
                {{
                  "relations": [
-                   {"entity1": "aspirin", "relation_type": "treats", "entity2": "fever", "confidence": 0.9}
+                   {{"entity1": "aspirin", "relation_type": "treats", "entity2": "fever", "confidence": 0.9}}
                  ]
                }}
                Text: {chunk_text}
             """
         )
+        self.prompt = ChatPromptTemplate.from_template(self.template)
+
+    @property
+    def llm(self):
+        # the ChatOllama client is created on first use and shared per model
+        if self._llm is not None:
+            return self._llm
+        return get_chat_model(self.model_name, self.temperature)
+
+    def _invoke(self, chunk_text: str):
+        # generation and output parsing are timed separately
+        with METRICS.timer("llm_generate_seconds", extractor="relation"):
+            message = (self.prompt | self.llm).invoke({"chunk_text": chunk_text})
+        METRICS.record_llm_usage(message, extractor="relation")
+        with METRICS.timer("llm_parse_seconds", extractor="relation"):
+            return self.parser.invoke(message)
 
     def extract(self, chunk_text: str):
-        chain = self.prompt | self.llm | self.parser
-        res = chain.invoke({"chunk_text": chunk_text})
+        if self.cache is not None:
+            key = self.cache.make_key(self.model_name, self.temperature, self.template, chunk_text)
+            res = self.cache.get_or_compute(key, RelationList, lambda: self._invoke(chunk_text))
+        else:
+            res = self._invoke(chunk_text)
         return res.relations
@@ -1,6 +1,10 @@
 # ingest/chunk_loader.py
+import hashlib
 import os
-from types import SimpleNamespace
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from metrics import METRICS
 from .text_splitter import Chunker  # import from text_splitter.py
 
 # Prefer LangChain's PyPDFLoader when available, but provide a lightweight
@@ -15,65 +19,214 @@ except Exception:
     except Exception:
         PdfReader = None
 
-def load_chunks(pdf_folder):
-    """
-    Returns a list of chunk objects:
-    chunk.page_content, chunk.metadata
-    """
-    chunker = Chunker()
-    chunks = []
+# Page-range parsing in worker processes needs direct page access
+try:
+    from pypdf import PdfReader as _PageReader  # type: ignore
+except Exception:
+    try:
+        from PyPDF2 import PdfReader as _PageReader  # type: ignore
+    except Exception:
+        _PageReader = None
+
+def file_hash(path, block_size=1 << 20):
+    """sha256 of a file's bytes, read in blocks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def make_chunk_id(source_hash, page, offset):
+    """Content-derived chunk id: stable as long as the source file is unchanged."""
+    return f"chunk_{source_hash[:16]}_p{page}_o{offset}"
+
+
+class _SimpleDoc:
+    def __init__(self, page_content, metadata=None):
+        self.page_content = page_content
+        self.metadata = metadata or {}
+
 
-    global_counter = 0
-    for filename in os.listdir(pdf_folder):
+def iter_pdf_files(pdf_folder, skip_hashes=None):
+    """Yield (filename, abs_path, file_hash) for each PDF in the folder,
+    in sorted order, skipping files whose hash is in skip_hashes."""
+    skip_hashes = skip_hashes or set()
+    for filename in sorted(os.listdir(pdf_folder)):
         if not filename.lower().endswith(".pdf"):
             continue
 
         abs_path = os.path.join(pdf_folder, filename)
+        source_hash = file_hash(abs_path)
+        if source_hash in skip_hashes:
+            continue
+        yield filename, abs_path, source_hash
+
+
+def _pages_to_docs(abs_path, pages):
+    # same metadata shape as PyPDFLoader so chunk ids match either path
+    return [_SimpleDoc(t, {"source": abs_path, "page": i}) for i, t in enumerate(pages)]
 
-        if _HAS_LANGCHAIN_LOADER:
-            loader = PyPDFLoader(abs_path)
-            docs = loader.load()
-            doc_chunks = chunker.chunk(docs)
-        else:
-            # Fallback: read PDF pages as plain text using PyPDF2 PdfReader
-            doc_texts = []
-            if PdfReader is None:
-                # If neither loader is available, skip this file but warn via empty text
-                doc_texts = [""]
-            else:
+
+def read_pdf_pages(abs_path, source_hash=None, page_cache=None):
+    """Return one Document-like object per page of the PDF.
+
+    With a PageTextCache (and the file's hash) cached page text is returned
+    without parsing, and freshly parsed text is stored for next time.
+    """
+    if page_cache is not None and source_hash is not None:
+        pages = page_cache.get(source_hash)
+        if pages is None:
+            docs = read_pdf_pages(abs_path)
+            page_cache.put(source_hash, [d.page_content for d in docs])
+            return docs
+        return _pages_to_docs(abs_path, pages)
+
+    if _HAS_LANGCHAIN_LOADER:
+        try:
+            return PyPDFLoader(abs_path).load()
+        except Exception as e:
+            # PyPDFLoader gives up on the whole file when one page fails to
+            # decode; extract page by page instead, leaving bad pages empty
+            print(f"[WARN] PyPDFLoader failed on {abs_path} ({e}); extracting page by page")
+            return _pages_to_docs(abs_path, _extract_page_range(abs_path, 0, _page_count(abs_path)))
+
+    # Fallback: read PDF pages as plain text using PyPDF2 PdfReader
+    doc_texts = []
+    if PdfReader is None:
+        # If neither loader is available, skip this file but warn via empty text
+        doc_texts = [""]
+    else:
+        try:
+            reader = PdfReader(abs_path)
+            for page in reader.pages:
                 try:
-                    reader = PdfReader(abs_path)
-                    for page in reader.pages:
-                        try:
-                            doc_texts.append(page.extract_text() or "")
-                        except Exception:
-                            doc_texts.append("")
+                    doc_texts.append(page.extract_text() or "")
                 except Exception:
-                    doc_texts = [""]
-
-            # Build simple doc-like objects for the splitter
-            class _SimpleDoc:
-                def __init__(self, page_content, metadata=None):
-                    self.page_content = page_content
-                    self.metadata = metadata or {}
-
-            docs = [_SimpleDoc(t) for t in doc_texts]
-            doc_chunks = chunker.chunk(docs)
-
-        for c in doc_chunks:
-            # create a stable, global chunk id used by Neo4j ingestion
-            chunk_id = f"chunk_{global_counter}"
-            md = {
-                "source": filename,
-                "chunk_id": chunk_id,
-                # preserve any per-doc metadata the splitter provided
-                **(getattr(c, "metadata", {}) or {}),
-            }
-            chunks.append(
-                SimpleNamespace(
-                    page_content=c.page_content,
-                    metadata=md,
-                )
-            )
-            global_counter += 1
-    return chunks
+                    doc_texts.append("")
+        except Exception:
+            doc_texts = [""]
+
+    # Build simple doc-like objects for the splitter
+    return [_SimpleDoc(t) for t in doc_texts]
+
+
+def _page_count(abs_path):
+    try:
+        return len(_PageReader(abs_path).pages)
+    except Exception:
+        return 0
+
+
+def _extract_page_range(abs_path, start, end):
+    """Worker-process task: text of pages [start, end) of one PDF."""
+    texts = []
+    try:
+        reader = _PageReader(abs_path)
+    except Exception:
+        return [""] * (end - start)
+    for i in range(start, end):
+        try:
+            texts.append(reader.pages[i].extract_text() or "")
+        except Exception:
+            texts.append("")
+    return texts
+
+
+def iter_parsed_pdfs(pdf_folder, skip_hashes=None, workers=0, page_cache=None, pages_per_task=50):
+    """Yield (filename, file_hash, docs) for each PDF, in folder order.
+
+    workers > 1 parses in a process pool: every file is split into
+    `pages_per_task` page ranges so one large PDF is spread across cores too.
+    At most ~2 tasks per worker are outstanding, so parsed text does not pile
+    up ahead of the consumer.
+    """
+    files = iter_pdf_files(pdf_folder, skip_hashes)
+    if workers <= 1 or _PageReader is None:
+        for filename, abs_path, source_hash in files:
+            with METRICS.timer("pdf_parse_seconds", mode="serial"):
+                docs = read_pdf_pages(abs_path, source_hash, page_cache)
+            METRICS.inc("pdf_pages_total", len(docs))
+            yield filename, source_hash, docs
+        return
+
+    window = workers * 2
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        outstanding = 0
+
+        def _finish():
+            nonlocal outstanding
+            filename, abs_path, source_hash, pages, futures = pending.popleft()
+            if futures is not None:
+                outstanding -= len(futures)
+                # parsing runs in the workers; this is the time the consumer waits for it
+                with METRICS.timer("pdf_parse_seconds", mode="pool_wait"):
+                    pages = [t for fut in futures for t in fut.result()] or [""]
+                if page_cache is not None:
+                    page_cache.put(source_hash, pages)
+            METRICS.inc("pdf_pages_total", len(pages))
+            return filename, source_hash, _pages_to_docs(abs_path, pages)
+
+        for filename, abs_path, source_hash in files:
+            pages = page_cache.get(source_hash) if page_cache is not None else None
+            futures = None
+            if pages is None:
+                n_pages = _page_count(abs_path)
+                futures = [
+                    pool.submit(_extract_page_range, abs_path, start, min(start + pages_per_task, n_pages))
+                    for start in range(0, n_pages, pages_per_task)
+                ]
+                outstanding += len(futures)
+            pending.append((filename, abs_path, source_hash, pages, futures))
+            while outstanding > window:
+                yield _finish()
+        while pending:
+            yield _finish()
+
+
+def split_pages(chunker, filename, source_hash, docs):
+    """Split one file's pages lazily, yielding Chunk records with stable ids."""
+    split_s = 0.0
+    n_chunks = 0
+    chunks = chunker.iter_chunks(docs)
+    try:
+        while True:
+            # time only the splitting, not whatever the consumer does between chunks
+            start = time.perf_counter()
+            chunk = next(chunks, None)
+            split_s += time.perf_counter() - start
+            if chunk is None:
+                break
+            n_chunks += 1
+            chunk.source = filename
+            chunk.file_hash = source_hash
+            # stable chunk id derived from file content, page and offset
+            chunk.chunk_id = make_chunk_id(source_hash, chunk.page, chunk.start)
+            yield chunk
+    finally:
+        METRICS.observe("chunk_split_seconds", split_s)
+        METRICS.inc("chunks_total", n_chunks)
+
+
+def iter_chunks(pdf_folder, skip_hashes=None, chunker=None, workers=0, page_cache=None):
+    """Generator variant of load_chunks: parses one PDF at a time and yields
+    its chunks, so memory does not grow with the size of the corpus."""
+    chunker = chunker or Chunker()
+    for filename, source_hash, docs in iter_parsed_pdfs(pdf_folder, skip_hashes, workers, page_cache):
+        yield from split_pages(chunker, filename, source_hash, docs)
+
+
+def load_chunks(pdf_folder, skip_hashes=None, workers=0, page_cache=None, chunker=None):
+    """
+    Returns a list of Chunk records:
+    chunk.page_content, chunk.chunk_id / source / file_hash (plus start / end /
+    page, and chunk.metadata as a LangChain-style dict view)
+
+    skip_hashes: optional set of file hashes to skip (e.g. files the
+    ingest manifest already reports as fully processed).
+    workers: parse PDFs in a process pool of this size (0/1 = serial).
+    page_cache: optional PageTextCache for extracted page text.
+    chunker: Chunker to split with (default: 800 characters, 100 overlap).
+    """
+    return list(iter_chunks(pdf_folder, skip_hashes, chunker=chunker, workers=workers, page_cache=page_cache))
@@ -0,0 +1,289 @@
+# ingest/embedding_cache.py
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+
+def _text_key(text, kind="document"):
+    # queries and documents may be embedded differently (instruction models)
+    return hashlib.sha256(f"{kind}\0{text}".encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings:
+    """Embeddings wrapper that remembers every vector it has computed.
+
+    Implements embed_documents / embed_query like the wrapped LangChain
+    embeddings, so it can stand in for config.EMBEDDING_MODEL anywhere.
+    Vectors live in one float32 blob per model (<cache_dir>/<model>.f32),
+    memory-mapped and grown in place; a SQLite index (WAL mode, shareable
+    between threads and processes) maps (model, sha256 of text) to a row
+    of that blob. Slots freed by eviction are reused by later puts; readers
+    re-check their rows after copying vectors out of the blob, so a slot
+    reused by a concurrent put is reported as a miss, never as a wrong vector.
+
+    max_entries bounds the entries per model, least recently used first.
+    """
+
+    def __init__(self, embeddings, model_name=None, cache_dir="data/cache/embeddings", max_entries=None,
+                 evict_every=1000, grow_rows=4096):
+        self.embeddings = embeddings
+        self.model_name = model_name or getattr(embeddings, "model_name", None) or type(embeddings).__name__
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self.grow_rows = grow_rows
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._blob = None
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "index.sqlite")
+        self.blob_path = os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]+", "_", self.model_name) + ".f32")
+
+        conn = self._conn()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS models (
+                model TEXT PRIMARY KEY,
+                dim INTEGER NOT NULL,
+                n_slots INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                key TEXT NOT NULL,
+                slot INTEGER NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (model, key)
+            );
+            CREATE INDEX IF NOT EXISTS idx_embeddings_accessed ON embeddings(model, accessed_at);
+            CREATE TABLE IF NOT EXISTS free_slots (
+                model TEXT NOT NULL,
+                slot INTEGER NOT NULL,
+                PRIMARY KEY (model, slot)
+            );
+            """
+        )
+        conn.commit()
+        row = conn.execute("SELECT dim FROM models WHERE model = ?", (self.model_name,)).fetchone()
+        self.dim = row[0] if row else None
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _vectors(self, min_rows=0):
+        """Memory map of the blob, re-mapped when another writer grew it."""
+        rows = os.path.getsize(self.blob_path) // (4 * self.dim) if os.path.exists(self.blob_path) else 0
+        with self._lock:
+            if self._blob is None or len(self._blob) < max(rows, min_rows):
+                self._blob = np.memmap(self.blob_path, dtype=np.float32, mode="r+", shape=(rows, self.dim)) \
+                    if rows else None
+            return self._blob
+
+    # ------------------------------
+    # batch get / put
+    # ------------------------------
+    def _slots(self, conn, keys):
+        """{key: slot} for the cached keys among keys."""
+        slots = {}
+        for i in range(0, len(keys), 500):
+            part = keys[i:i + 500]
+            marks = ",".join("?" * len(part))
+            slots.update(conn.execute(
+                f"SELECT key, slot FROM embeddings WHERE model = ? AND key IN ({marks})",
+                (self.model_name, *part),
+            ).fetchall())
+        return slots
+
+    def get_many(self, texts, kind="document"):
+        """Return (vectors, missing): an (n, dim) array and the indices not cached."""
+        keys = [_text_key(t, kind) for t in texts]
+        if self.dim is None:
+            with self._lock:
+                self.misses += len(texts)
+            return None, list(range(len(texts)))
+
+        conn = self._conn()
+        slots = self._slots(conn, list(dict.fromkeys(keys)))
+
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if slots:
+            blob = self._vectors(min_rows=max(slots.values()) + 1)
+            found = [i for i, k in enumerate(keys) if k in slots]
+            out[found] = blob[[slots[keys[i]] for i in found]]
+            # Eviction commits before its slots can be reused, so a vector
+            # overwritten while we copied it shows up here as a changed row
+            current = self._slots(conn, list(slots))
+            stale = [k for k, s in slots.items() if current.get(k) != s]
+            for k in stale:
+                del slots[k]
+            if stale:
+                out[[i for i in found if keys[i] not in slots]] = 0.0
+        missing = [i for i, k in enumerate(keys) if k not in slots]
+        if slots:
+            now = time.time()
+            conn.execute("BEGIN")
+            conn.executemany(
+                "UPDATE embeddings SET accessed_at = ? WHERE model = ? AND key = ?",
+                [(now, self.model_name, k) for k in slots],
+            )
+            conn.execute("COMMIT")
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        return out, missing
+
+    def _allocate(self, conn, n):
+        """Reserve n slots (reusing freed ones first); caller holds the write lock."""
+        free = [r[0] for r in conn.execute(
+            "SELECT slot FROM free_slots WHERE model = ? ORDER BY slot LIMIT ?", (self.model_name, n)
+        )]
+        conn.executemany("DELETE FROM free_slots WHERE model = ? AND slot = ?",
+                         [(self.model_name, s) for s in free])
+        n_slots = conn.execute("SELECT n_slots FROM models WHERE model = ?", (self.model_name,)).fetchone()[0]
+        fresh = list(range(n_slots, n_slots + n - len(free)))
+        if fresh:
+            conn.execute("UPDATE models SET n_slots = ? WHERE model = ?", (fresh[-1] + 1, self.model_name))
+            needed = (fresh[-1] + 1) * 4 * self.dim
+            if not os.path.exists(self.blob_path) or os.path.getsize(self.blob_path) < needed:
+                with open(self.blob_path, "ab") as f:
+                    f.truncate(needed + self.grow_rows * 4 * self.dim)
+        return free + fresh
+
+    def put_many(self, texts, vectors, kind="document"):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(texts):
+            return
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                conn.execute("INSERT OR IGNORE INTO models (model, dim, n_slots) VALUES (?, ?, 0)",
+                             (self.model_name, self.dim))
+            rows = {}
+            for text, vector in zip(texts, vectors):
+                rows.setdefault(_text_key(text, kind), vector)
+            keys = list(rows)
+            existing = set()
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                marks = ",".join("?" * len(part))
+                existing.update(r[0] for r in conn.execute(
+                    f"SELECT key FROM embeddings WHERE model = ? AND key IN ({marks})", (self.model_name, *part)
+                ))
+            new_keys = [k for k in rows if k not in existing]
+            slots = self._allocate(conn, len(new_keys))
+            blob = self._vectors(min_rows=max(slots) + 1 if slots else 0)
+            if slots:
+                blob[slots] = np.stack([rows[k] for k in new_keys])
+                blob.flush()
+            now = time.time()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, key, slot, accessed_at) VALUES (?, ?, ?, ?)",
+                [(self.model_name, k, s, now) for k, s in zip(new_keys, slots)],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self._puts += len(new_keys)
+            due = self.max_entries is not None and self._puts >= self.evict_every
+            if due:
+                self._puts = 0
+        if due:
+            self.evict()
+
+    def evict(self):
+        """Drop least recently used entries beyond max_entries. Returns rows removed.
+
+        Removing the index rows and freeing their slots is one write
+        transaction, committed before any put can take the slots over.
+        """
+        if self.max_entries is None:
+            return 0
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            stale = conn.execute(
+                "SELECT key, slot FROM embeddings WHERE model = ? ORDER BY accessed_at DESC LIMIT -1 OFFSET ?",
+                (self.model_name, self.max_entries),
+            ).fetchall()
+            conn.executemany("DELETE FROM embeddings WHERE model = ? AND key = ?",
+                             [(self.model_name, k) for k, _ in stale])
+            conn.executemany("INSERT OR IGNORE INTO free_slots (model, slot) VALUES (?, ?)",
+                             [(self.model_name, s) for _, s in stale])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return len(stale)
+
+    # ------------------------------
+    # embeddings interface
+    # ------------------------------
+    def embed_array(self, texts, encode=None):
+        """(n, dim) float32 array for texts, computing only the uncached ones.
+
+        encode: callable mapping a list of texts to an (n, dim) array, used
+        for the misses instead of the wrapped model's embed_documents (e.g.
+        EmbeddingIngestor's batched SentenceTransformer path).
+        """
+        vectors, missing = self.get_many(texts)
+        if missing:
+            # each distinct missing text is embedded once
+            unique = list(dict.fromkeys(texts[i] for i in missing))
+            computed = encode(unique) if encode is not None else self.embeddings.embed_documents(unique)
+            computed = np.asarray(computed, dtype=np.float32)
+            self.put_many(unique, computed)
+            by_text = dict(zip(unique, computed))
+            if vectors is None:
+                vectors = np.zeros((len(texts), computed.shape[1]), dtype=np.float32)
+            for i in missing:
+                vectors[i] = by_text[texts[i]]
+        return vectors if vectors is not None else np.zeros((0, 0), dtype=np.float32)
+
+    def embed_documents(self, texts):
+        return self.embed_array(list(texts)).tolist()
+
+    def embed_query(self, text):
+        vectors, missing = self.get_many([text], kind="query")
+        if not missing:
+            return vectors[0].tolist()
+        vector = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+        self.put_many([text], vector.reshape(1, -1), kind="query")
+        return vector.tolist()
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        entries = self._conn().execute(
+            "SELECT COUNT(*) FROM embeddings WHERE model = ?", (self.model_name,)
+        ).fetchone()[0]
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+        self._blob = None
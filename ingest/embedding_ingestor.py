@@ -1,26 +1,162 @@
 # ingest/embedding_ingestor.py
-from langchain_community.vectorstores import Neo4jVector
+import hashlib
+import os
+import time
+
+import numpy as np
+
+from .neo4j_ingestor import Neo4jIngestor
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
 
 class EmbeddingIngestor:
-    def __init__(self, embedding_model, uri, user, password):
-        self.store = Neo4jVector.from_existing_graph(
-            embedding=embedding_model,
-            url=uri,
-            username=user,
-            password=password,
-            index_name="chunk_embeddings",
-            node_label="Chunk",
-            text_node_property="text",
-            embedding_node_property="embedding",
-            text_node_properties=["text"]  # Added required parameter
+    """Embed chunks locally and store the vectors on the existing graph nodes.
+
+    Texts are encoded in large batches into L2-normalised float32 arrays and
+    written onto the Chunk nodes created by Neo4jIngestor.insert_chunks with
+    batched UNWIND, together with a hash of the embedded text. Chunks whose
+    stored hash matches their current text are skipped, and identical texts
+    are only encoded once.
+
+    With index_dir set, the same vectors are also appended to a local
+    LocalVectorIndex per kind (<index_dir>/chunk, <index_dir>/entity) so
+    retrieval can run without a Neo4j round trip.
+    """
+
+    def __init__(self, embedding_model, uri, user, password, batch_size=256, write_batch_size=500,
+                 index_dir=None):
+        self.embedding_model = embedding_model
+        self.batch_size = batch_size
+        self.index_dir = index_dir
+        self.ingestor = Neo4jIngestor(uri, user, password, batch_size=write_batch_size)
+        self._vector_index_ready = False
+
+    def local_index(self, kind, dim=None):
+        """LocalVectorIndex for `kind` under index_dir (None when disabled or not created yet)."""
+        if not self.index_dir:
+            return None
+        path = os.path.join(self.index_dir, kind)
+        if dim is None and not os.path.exists(os.path.join(path, "meta.json")):
+            return None
+        from retrieval.vector_index import LocalVectorIndex
+
+        return LocalVectorIndex(path, dim=dim)
+
+    def encode(self, texts):
+        """Return an (n, dim) float32 array of L2-normalised embeddings."""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        if hasattr(self.embedding_model, "embed_array"):
+            # CachedEmbeddings: only uncached texts reach the wrapped model,
+            # through the same batched path as without the cache
+            base_model = self.embedding_model.embeddings
+            vectors = self.embedding_model.embed_array(texts, encode=lambda misses: self._encode_with(base_model, misses))
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            return vectors / np.maximum(norms, 1e-12)
+        return self._encode_with(self.embedding_model, texts)
+
+    def _encode_with(self, model, texts):
+        # HuggingFaceEmbeddings wraps a SentenceTransformer; call it directly
+        # to control the batch size and skip the list-of-lists round trip.
+        client = getattr(model, "client", None)
+        if client is not None and hasattr(client, "encode"):
+            vectors = client.encode(
+                texts,
+                batch_size=self.batch_size,
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+            return np.asarray(vectors, dtype=np.float32)
+
+        vectors = np.asarray(model.embed_documents(texts), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _already_embedded(self, label, key, rows, lookup_batch=5000):
+        """Ids of nodes whose stored embedding hash equals the row's hash."""
+        done = set()
+        with self.ingestor.driver.session() as session:
+            for i in range(0, len(rows), lookup_batch):
+                result = session.run(
+                    f"""
+                    UNWIND $rows AS row
+                    MATCH (n:{label} {{{key}: row.id}})
+                    WHERE n.embedding IS NOT NULL AND n.embedding_hash = row.hash
+                    RETURN row.id AS id
+                    """,
+                    {"rows": [{"id": r["id"], "hash": r["hash"]} for r in rows[i:i + lookup_batch]]},
+                )
+                done.update(record["id"] for record in result)
+        return done
+
+    def _embed_and_write(self, label, key, rows, kind):
+        done = self._already_embedded(label, key, rows)
+        todo = [r for r in rows if r["id"] not in done]
+        if not todo:
+            print(f"[INFO] All {len(rows)} {kind} already embedded")
+            return 0
+
+        # encode each distinct text once
+        unique_texts = {}
+        for r in todo:
+            unique_texts.setdefault(r["hash"], r["text"])
+        hashes = list(unique_texts)
+
+        start = time.perf_counter()
+        vectors = self.encode([unique_texts[h] for h in hashes])
+        elapsed = time.perf_counter() - start
+        rate = len(hashes) / elapsed if elapsed > 0 else float("inf")
+        print(f"[INFO] Embedded {len(hashes)} unique {kind} texts in {elapsed:.2f}s ({rate:.0f} embeddings/sec)")
+
+        if label == "Chunk" and not self._vector_index_ready:
+            # the Neo4j vector search needs the embedding dimension, known only now
+            from .schema import SchemaManager
+
+            SchemaManager(self.ingestor.driver).ensure_vector_index(vectors.shape[1])
+            self._vector_index_ready = True
+
+        by_hash = dict(zip(hashes, vectors))
+        write_rows = [
+            {"id": r["id"], "hash": r["hash"], "embedding": by_hash[r["hash"]].tolist()}
+            for r in todo
+        ]
+        self.ingestor.write_rows(
+            f"""
+            UNWIND $rows AS row
+            MATCH (n:{label} {{{key}: row.id}})
+            SET n.embedding = row.embedding,
+                n.embedding_hash = row.hash
+            """,
+            write_rows,
+            label=f"{kind} embeddings",
         )
 
+        index = self.local_index(kind, dim=vectors.shape[1])
+        if index is not None:
+            # re-embedded rows (text changed) replace their old vectors
+            todo_ids = {r["id"] for r in todo}
+            if any(row_id in todo_ids for row_id in index.ids):
+                index.compact(set(index.ids) - todo_ids)
+            index.add([r["id"] for r in todo], np.stack([by_hash[r["hash"]] for r in todo]),
+                      [r["hash"] for r in todo])
+        return len(todo)
+
     def add_chunks(self, chunks):
-        texts = [c.page_content for c in chunks]
-        metadatas = [c.metadata for c in chunks]
-        self.store.add_texts(texts=texts, metadatas=metadatas)
+        """Embed chunks (Chunk records: page_content and chunk_id)."""
+        rows = [
+            {"id": c.chunk_id, "text": c.page_content, "hash": text_hash(c.page_content)}
+            for c in chunks
+        ]
+        return self._embed_and_write("Chunk", "id", rows, "chunk")
 
     def add_entities(self, entities):
-        texts = [e["name"] for e in entities]
-        metadatas = [{"type": e["type"], "id": e["id"]} for e in entities]
-        self.store.add_texts(texts=texts, metadatas=metadatas)
+        """Embed entity names onto existing Entity nodes (dicts with id and name)."""
+        rows = [{"id": e["id"], "text": e["name"], "hash": text_hash(e["name"])} for e in entities]
+        return self._embed_and_write("Entity", "id", rows, "entity")
+
+    def close(self):
+        self.ingestor.close()
@@ -0,0 +1,175 @@
+# ingest/manifest.py
+import os
+import sqlite3
+import threading
+import time
+
+# Per-chunk pipeline stages, in order:
+#   loaded    - Chunk node upserted in Neo4j
+#   embedded  - chunk vector written
+#   extracted - LLM extraction finished
+#   written   - entities / relations for the chunk written to Neo4j
+STAGES = ("loaded", "embedded", "extracted", "written")
+
+
+class IngestManifest:
+    """Local record of processed files and the stages each chunk has passed.
+
+    Lets a re-run skip unchanged PDFs and resume a crashed run from the
+    first chunk that has not reached a stage yet. Safe to share between the
+    threads of one pipeline.
+    """
+
+    def __init__(self, path="data/cache/manifest.sqlite"):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                source TEXT PRIMARY KEY,
+                file_hash TEXT NOT NULL,
+                n_chunks INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS chunk_stages (
+                chunk_id TEXT NOT NULL,
+                file_hash TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (chunk_id, stage)
+            );
+            CREATE INDEX IF NOT EXISTS idx_chunk_stages_file ON chunk_stages(file_hash);
+            CREATE TABLE IF NOT EXISTS pending_deletes (
+                chunk_id TEXT PRIMARY KEY,
+                queued_at REAL NOT NULL
+            );
+            """
+        )
+        self.conn.commit()
+
+    def completed_file_hashes(self):
+        """Hashes of files whose chunks have all reached the final stage."""
+        with self._lock:
+            rows = self.conn.execute(
+                """
+                SELECT f.file_hash
+                FROM files f
+                LEFT JOIN chunk_stages s ON s.file_hash = f.file_hash AND s.stage = ?
+                GROUP BY f.file_hash, f.n_chunks
+                HAVING COUNT(s.chunk_id) >= f.n_chunks
+                """,
+                (STAGES[-1],),
+            ).fetchall()
+        return {r[0] for r in rows}
+
+    def register(self, chunks):
+        """Record the files behind `chunks`.
+
+        Chunk ids of previous versions of files whose content changed are
+        queued in pending_deletes, in the same commit that forgets them, and
+        stay queued until purge_stale() has removed them from the graph.
+        Returns every queued id, including ones left over by a failed run.
+        """
+        per_file = {}
+        for c in chunks:
+            key = (c.source or "unknown", c.file_hash)
+            per_file[key] = per_file.get(key, 0) + 1
+
+        with self._lock:
+            return self._register(per_file)
+
+    def _register(self, per_file):
+        stale = []
+        now = time.time()
+        for (source, fhash), n_chunks in per_file.items():
+            row = self.conn.execute("SELECT file_hash FROM files WHERE source = ?", (source,)).fetchone()
+            if row is not None and row[0] != fhash:
+                stale.extend(
+                    r[0] for r in self.conn.execute(
+                        "SELECT DISTINCT chunk_id FROM chunk_stages WHERE file_hash = ?", (row[0],)
+                    )
+                )
+                self.conn.execute("DELETE FROM chunk_stages WHERE file_hash = ?", (row[0],))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files (source, file_hash, n_chunks, updated_at) VALUES (?, ?, ?, ?)",
+                (source, fhash, n_chunks, now),
+            )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO pending_deletes (chunk_id, queued_at) VALUES (?, ?)",
+            [(chunk_id, now) for chunk_id in stale],
+        )
+        self.conn.commit()
+        return self._pending_deletes()
+
+    def _pending_deletes(self):
+        return [r[0] for r in self.conn.execute("SELECT chunk_id FROM pending_deletes ORDER BY queued_at, chunk_id")]
+
+    def pending_deletes(self):
+        """Stale chunk ids still waiting to be removed from the graph."""
+        with self._lock:
+            return self._pending_deletes()
+
+    def purge_stale(self, delete_fn):
+        """Call delete_fn(chunk_ids) on every queued stale chunk id and only
+        dequeue them once it returns, so a failed delete is retried by the
+        next run. Returns delete_fn's result (None when nothing is queued)."""
+        stale = self.pending_deletes()
+        if not stale:
+            return None
+        result = delete_fn(stale)
+        with self._lock:
+            for i in range(0, len(stale), 500):
+                part = stale[i:i + 500]
+                self.conn.execute(
+                    f"DELETE FROM pending_deletes WHERE chunk_id IN ({','.join('?' * len(part))})", part
+                )
+            self.conn.commit()
+        return result
+
+    def pending(self, chunks, stage):
+        """Chunks (in the given order) that have not reached `stage` yet."""
+        hashes = sorted({c.file_hash for c in chunks})
+        if not hashes:
+            return []
+        placeholders = ",".join("?" * len(hashes))
+        with self._lock:
+            done = {
+                r[0] for r in self.conn.execute(
+                    f"SELECT chunk_id FROM chunk_stages WHERE stage = ? AND file_hash IN ({placeholders})",
+                    (stage, *hashes),
+                )
+            }
+        return [c for c in chunks if c.chunk_id not in done]
+
+    def mark(self, chunks, stage):
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage {stage!r}; expected one of {STAGES}")
+        now = time.time()
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO chunk_stages (chunk_id, file_hash, stage, updated_at) VALUES (?, ?, ?, ?)",
+                [(c.chunk_id, c.file_hash, stage, now) for c in chunks],
+            )
+            self.conn.commit()
+
+    def reset(self, chunk_ids, stages=("extracted", "written")):
+        """Forget that chunks reached `stages`, so the next pass redoes them
+        (their file also stops counting as completed)."""
+        chunk_ids = list(chunk_ids)
+        marks = ",".join("?" * len(stages))
+        with self._lock:
+            for i in range(0, len(chunk_ids), 500):
+                part = chunk_ids[i:i + 500]
+                self.conn.execute(
+                    f"DELETE FROM chunk_stages WHERE stage IN ({marks}) AND chunk_id IN ({','.join('?' * len(part))})",
+                    (*stages, *part),
+                )
+            self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
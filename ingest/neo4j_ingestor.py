@@ -1,12 +1,85 @@
 # ingest/neo4j_ingestor.py
 from neo4j import GraphDatabase
 from neo4j.exceptions import AuthError, ServiceUnavailable
-import pandas as pd
+from metrics import COUNT_BUCKETS, METRICS
+from ontology.ontology_cache import OntologyTable
+import re
 import time
 
+# Relationship types extracted relations are stored under, with the
+# (normalised) labels that map onto each. Labels under "reverse" name the
+# relation from the other side ("is treated by") and swap the endpoints.
+# Any other label becomes RELATED_TO, keyed and described by r.type, so the
+# set of relationship types in the graph stays fixed.
+RELATION_TYPES = {
+    "TREATS": {"forward": ("treats", "treat", "used to treat", "used for", "therapy for", "treatment for",
+                           "treatment of", "cures", "manages", "relieves"),
+               "reverse": ("treated by", "treated with", "managed with", "managed by")},
+    "CAUSES": {"forward": ("causes", "cause", "leads to", "results in", "induces", "triggers", "produces"),
+               "reverse": ("caused by", "induced by", "results from", "due to", "triggered by")},
+    "PREVENTS": {"forward": ("prevents", "prevent", "protects against", "reduces risk of", "prophylaxis for"),
+                 "reverse": ("prevented by", "prevented with")},
+    "DIAGNOSES": {"forward": ("diagnoses", "diagnose", "used to diagnose", "detects", "tests for", "screens for"),
+                  "reverse": ("diagnosed by", "detected by", "diagnosed with test")},
+    "SYMPTOM_OF": {"forward": ("symptom of", "sign of", "manifestation of", "indicates", "presents in"),
+                   "reverse": ("has symptom", "presents with", "manifests as")},
+    "RISK_FACTOR_FOR": {"forward": ("risk factor for", "increases risk of", "predisposes to"),
+                        "reverse": ()},
+    "SIDE_EFFECT_OF": {"forward": ("side effect of", "adverse effect of", "complication of"),
+                       "reverse": ("has side effect", "has adverse effect", "has complication")},
+    "INTERACTS_WITH": {"forward": ("interacts with", "interaction with", "contraindicated with"),
+                       "reverse": ()},
+    "PART_OF": {"forward": ("part of", "component of", "located in", "found in", "member of"),
+                "reverse": ("has part", "contains", "includes", "consists of")},
+    "IS_A": {"forward": ("is a", "is an", "type of", "kind of", "subtype of", "form of", "class of"),
+             "reverse": ("has type", "has subtype")},
+    "ASSOCIATED_WITH": {"forward": ("associated with", "related to", "linked to", "correlated with",
+                                    "co occurs with"),
+                        "reverse": ()},
+}
+_LABEL_TYPES = {}
+for _type, _labels in RELATION_TYPES.items():
+    _LABEL_TYPES[_type.lower().replace("_", " ")] = (_type, False)
+    for _label in _labels["forward"]:
+        _LABEL_TYPES[_label] = (_type, False)
+    for _label in _labels["reverse"]:
+        _LABEL_TYPES[_label] = (_type, True)
+_AUXILIARIES = ("is ", "are ", "was ", "were ", "can ", "may ", "often ")
+
+# One statement per relationship type (types cannot be parameters). Confidence
+# keeps the highest value seen and chunk_ids lists every chunk the relation
+# was extracted from, so re-running a chunk changes nothing. The source entity
+# is recorded on the chunk (relation_sources) so delete_chunks can reach the
+# chunk's relations through the Entity id index.
+_RELATION_QUERY = """
+UNWIND $rows AS row
+MATCH (a:Entity {{id: row.e1_id}}), (b:Entity {{id: row.e2_id}})
+MERGE (a)-[r:`{rel_type}`{merge_key}]->(b)
+ON CREATE SET r.type = row.relation_type, r.chunk_ids = []
+SET r.confidence = CASE
+        WHEN r.confidence IS NULL OR row.confidence > r.confidence THEN row.confidence
+        ELSE r.confidence END,
+    r.chunk_ids = CASE
+        WHEN row.chunk_id IS NULL OR row.chunk_id IN r.chunk_ids THEN r.chunk_ids
+        ELSE r.chunk_ids + row.chunk_id END
+WITH a, row
+OPTIONAL MATCH (c:Chunk {{id: row.chunk_id}})
+FOREACH (_ IN CASE WHEN c IS NULL OR a.id IN coalesce(c.relation_sources, []) THEN [] ELSE [1] END |
+    SET c.relation_sources = coalesce(c.relation_sources, []) + a.id)
+"""
+
 
 class Neo4jIngestor:
-    def __init__(self, uri, user, password):
+    def __init__(self, uri, user, password, batch_size=500, batches_per_tx=4, driver=None):
+        # rows sent per UNWIND statement / statements grouped per commit
+        self.batch_size = batch_size
+        self.batches_per_tx = batches_per_tx
+        # relations dropped by write_chunk_extraction for an unknown endpoint
+        self.relations_skipped = 0
+        if driver is not None:
+            # pre-built driver (e.g. the benchmark's recording driver)
+            self.driver = driver
+            return
         try:
             self.driver = GraphDatabase.driver(uri, auth=(user, password))
             self.driver.verify_connectivity()
@@ -21,32 +94,165 @@ class Neo4jIngestor:
         params = params or {}
         while True:
             try:
-                return session.run(query, params)
+                METRICS.inc("neo4j_queries_total")
+                with METRICS.timer("neo4j_query_seconds"):
+                    return session.run(query, params)
             except ServiceUnavailable:
                 attempt += 1
+                METRICS.inc("neo4j_retries_total")
                 if attempt > retries:
                     raise
                 time.sleep(backoff * (2 ** (attempt - 1)))
 
+    def _write_batches(self, session, query, rows, label="rows", batch_size=None, progress=False):
+        """Send rows as `$rows` parameter lists through an UNWIND query.
+
+        Rows are split into batches of `batch_size`; every `batches_per_tx`
+        batches are committed together in one explicit write transaction.
+        Returns the number of rows written.
+        """
+        batch_size = batch_size or self.batch_size
+        batches = [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+        group = max(1, self.batches_per_tx)
+
+        def _tx_work(tx, tx_batches):
+            for batch in tx_batches:
+                tx.run(query, {"rows": batch}).consume()
+
+        start = time.perf_counter()
+        done = 0
+        for i in range(0, len(batches), group):
+            tx_batches = batches[i:i + group]
+            with METRICS.timer("neo4j_tx_seconds", write=label):
+                session.execute_write(_tx_work, tx_batches)
+            METRICS.inc("neo4j_queries_total", len(tx_batches))
+            if progress:
+                done += sum(len(b) for b in tx_batches)
+                print(f"[INFO] {label}: {done}/{len(rows)}")
+        elapsed = time.perf_counter() - start
+        rate = len(rows) / elapsed if elapsed > 0 else float("inf")
+        print(f"[INFO] Wrote {len(rows)} {label} in {elapsed:.2f}s ({rate:.0f} rows/sec)")
+        return len(rows)
+
+    def write_rows(self, query, rows, label="rows", batch_size=None, progress=False):
+        """Run an UNWIND $rows write query over rows in batched transactions.
+
+        For writers outside this class (e.g. EmbeddingIngestor); batch_size
+        defaults to the ingestor's. Returns the number of rows written.
+        """
+        if not rows:
+            return 0
+        with self.driver.session() as session:
+            return self._write_batches(session, query, rows, label=label, batch_size=batch_size, progress=progress)
+
+    def ensure_schema(self, embedding_dim=None, timeout=300, check_plans=True):
+        """Create the constraints / indexes ingestion relies on and wait for
+        them to come ONLINE (see ingest/schema.py). Safe to call every run."""
+        from .schema import SchemaManager
+
+        return SchemaManager(self.driver).bootstrap(embedding_dim, timeout=timeout, check_plans=check_plans)
+
     # ------------------------------
     # 1. Chunk ingestion
     # ------------------------------
-    def insert_chunks(self, chunks):
+    def insert_chunks(self, chunks, batch_size=None):
+        """Upsert Chunk nodes in batched UNWIND writes.
+
+        Uses the chunk_id assigned by load_chunks when present so entity
+        writes that match on Chunk.id find the same node.
+        """
+        rows = [
+            {
+                "id": chunk.chunk_id or f"chunk_{i}",
+                "text": chunk.page_content,
+                "source": chunk.source or "unknown",
+            }
+            for i, chunk in enumerate(chunks)
+        ]
         with self.driver.session() as session:
-            for i, chunk in enumerate(chunks):
-                self._run_with_retry(
-                    session,
-                    """
-                    MERGE (c:Chunk {id: $id})
-                    SET c.text = $text,
-                        c.source = $source
-                    """,
-                    {
-                        "id": f"chunk_{i}",
-                        "text": chunk.page_content,
-                        "source": chunk.metadata.get("source", "unknown"),
-                    },
-                )
+            return self._write_batches(
+                session,
+                """
+                UNWIND $rows AS row
+                MERGE (c:Chunk {id: row.id})
+                SET c.text = row.text,
+                    c.source = row.source
+                """,
+                rows,
+                label="chunks",
+                batch_size=batch_size,
+            )
+
+    def delete_chunks(self, chunk_ids, batch_size=None):
+        """Remove Chunk nodes (and their relationships) by id, e.g. chunks of
+        a PDF whose content changed since the last run.
+
+        The chunk is also dropped from the chunk_ids of relations extracted
+        from it; relations no other chunk supports are deleted. Near-duplicate
+        chunks linked to a removed chunk lose duplicate_of and the entity
+        links copied from it; their ids are returned so the caller can reset
+        them in the manifest and have them extracted (or linked) again.
+        """
+        rows = [{"id": cid} for cid in chunk_ids]
+        if not rows:
+            return []
+        batch_size = batch_size or self.batch_size
+
+        def _unlink_duplicates(tx, batch):
+            result = tx.run(
+                """
+                UNWIND $rows AS row
+                MATCH (d:Chunk {duplicate_of: row.id})
+                REMOVE d.duplicate_of
+                WITH DISTINCT d
+                OPTIONAL MATCH (d)-[x:CONTAINS]->(:Entity)
+                DELETE x
+                RETURN DISTINCT d.id AS id
+                """,
+                {"rows": batch},
+            )
+            return [record["id"] for record in result]
+
+        removed = set(chunk_ids)
+        orphaned = []
+        with self.driver.session() as session:
+            for i in range(0, len(rows), batch_size):
+                ids = session.execute_write(_unlink_duplicates, rows[i:i + batch_size])
+                orphaned.extend(cid for cid in ids if cid not in removed)
+            if orphaned:
+                print(f"[INFO] Unlinked {len(orphaned)} near-duplicate chunks of removed chunks")
+            self._write_batches(
+                session,
+                """
+                UNWIND $rows AS row
+                MATCH (c:Chunk {id: row.id})
+                // relation sources recorded at write time, plus the chunk's
+                // own entities for relations written before they were recorded
+                UNWIND coalesce(c.relation_sources, []) + [(c)-[:CONTAINS]->(e:Entity) | e.id] AS source_id
+                WITH DISTINCT row, source_id
+                MATCH (:Entity {id: source_id})-[r]->(:Entity)
+                WHERE row.id IN r.chunk_ids
+                SET r.chunk_ids = [x IN r.chunk_ids WHERE x <> row.id]
+                WITH DISTINCT r
+                WHERE size(r.chunk_ids) = 0
+                DELETE r
+                """,
+                rows,
+                label="relation provenance",
+                batch_size=batch_size,
+            )
+            self._write_batches(
+                session,
+                """
+                UNWIND $rows AS row
+                MATCH (c:Chunk {id: row.id})
+                DETACH DELETE c
+                """,
+                rows,
+                label="stale chunks",
+                batch_size=batch_size,
+            )
+        return orphaned
 
     # ------------------------------
     # 2. Entity ingestion + ontology mapping
@@ -58,7 +264,7 @@ class Neo4jIngestor:
 
         Prefer using chunk_id (safer). The function keeps chunk_text fallback for
         backwards compatibility. Optionally map the entity to an ontology concept
-        and create a relation node connected to the entity.
+        and record the entity's relation label in its `relations` list.
         """
         with self.driver.session() as session:
             # Choose matching by id if provided, otherwise fall back to text
@@ -101,59 +307,273 @@ class Neo4jIngestor:
                     {"entity_id": entity_id, "concept_id": concept_id},
                 )
 
-            # Optional relation node attached to this entity
+            # Optional relation label, kept on the entity itself
             if relation:
                 self._run_with_retry(
                     session,
                     """
                     MATCH (e:Entity {id: $entity_id})
-                    MERGE (r:Relation {type: $relation})
-                    MERGE (e)-[:HAS_RELATION]->(r)
+                    WITH e, coalesce(e.relations, []) AS labels
+                    SET e.relations = CASE WHEN $relation IN labels THEN labels ELSE labels + $relation END
                     """,
                     {"entity_id": entity_id, "relation": relation},
                 )
 
+    @staticmethod
+    def _entity_id(entity):
+        return entity.get("concept_id") or entity.get("id") or entity["name"]
+
+    @staticmethod
+    def _rel_field(rel, attr):
+        # Relation pydantic models and plain dicts are both accepted
+        if isinstance(rel, dict):
+            return rel.get(attr)
+        return getattr(rel, attr, None)
+
+    @staticmethod
+    def normalize_relation_label(relation_type):
+        """Lower-cased label with punctuation collapsed, e.g. "Is-treated by" -> "is treated by"."""
+        return re.sub(r"[^0-9a-z]+", " ", (relation_type or "").lower()).strip()
+
+    @classmethod
+    def relation_schema(cls, relation_type):
+        """(relationship type, reversed) for an extracted relation label,
+        e.g. "is treated by" -> ("TREATS", True); unknown labels give
+        ("RELATED_TO", False)."""
+        label = cls.normalize_relation_label(relation_type)
+        match = _LABEL_TYPES.get(label)
+        while match is None and label.startswith(_AUXILIARIES):
+            label = label.split(" ", 1)[1]
+            match = _LABEL_TYPES.get(label)
+        return match or ("RELATED_TO", False)
+
+    @classmethod
+    def relationship_type(cls, relation_type):
+        """Relationship type stored for an extracted relation label."""
+        return cls.relation_schema(relation_type)[0]
+
+    def _relation_statements(self, rows):
+        """Group relation rows by relationship type: [(query, rows), ...].
+
+        Rows are rewritten onto the fixed vocabulary: reversed labels swap
+        e1_id / e2_id, and relation_type (stored as r.type) becomes the
+        type's own label, or the normalised free-text label for RELATED_TO.
+        """
+        by_type = {}
+        for row in rows:
+            rel_type, reverse = self.relation_schema(row["relation_type"])
+            if rel_type == "RELATED_TO":
+                label = self.normalize_relation_label(row["relation_type"]) or "related to"
+            else:
+                label = rel_type.lower().replace("_", " ")
+            row = dict(row, relation_type=label)
+            if reverse:
+                row["e1_id"], row["e2_id"] = row["e2_id"], row["e1_id"]
+            by_type.setdefault(rel_type, []).append(row)
+        return [
+            # RELATED_TO edges with different labels stay separate edges
+            (_RELATION_QUERY.format(rel_type=rel_type,
+                                    merge_key=" {type: row.relation_type}" if rel_type == "RELATED_TO" else ""),
+             rel_rows)
+            for rel_type, rel_rows in by_type.items()
+        ]
+
+    def write_chunk_extraction(self, chunk_id, entities, relations=()):
+        """Write everything extracted from one chunk in a single transaction.
+
+        entities: normalized entity dicts as returned by
+            OntologyMatcher.normalize_entities (optionally with an "id" key).
+        relations: Relation objects or dicts with entity1, entity2,
+            relation_type and confidence. Endpoint names are resolved against
+            the chunk's entities; relations naming anything else are skipped
+            and counted in relations_skipped.
+        """
+        entity_rows = {}
+        for ent in entities:
+            entity_id = self._entity_id(ent)
+            entity_rows[entity_id] = {
+                "id": entity_id,
+                "name": ent["name"],
+                "type": ent.get("type") or "Unknown",
+                "concept_id": ent.get("concept_id"),
+                "relation": ent.get("relation"),
+            }
+        rows = list(entity_rows.values())
+        mappings = [r for r in rows if r["concept_id"]]
+
+        name_to_id = {ent["name"]: self._entity_id(ent) for ent in entities}
+        relation_rows = []
+        skipped = 0
+        for rel in relations:
+            e1_id = name_to_id.get(self._rel_field(rel, "entity1"))
+            e2_id = name_to_id.get(self._rel_field(rel, "entity2"))
+            if not e1_id or not e2_id:
+                # an endpoint that is not one of the chunk's entities has no node to attach to
+                skipped += 1
+                continue
+            relation_rows.append({
+                "e1_id": e1_id,
+                "e2_id": e2_id,
+                "relation_type": self._rel_field(rel, "relation_type"),
+                "confidence": self._rel_field(rel, "confidence"),
+                "chunk_id": chunk_id,
+            })
+
+        if skipped:
+            self.relations_skipped += skipped
+            METRICS.inc("relations_skipped_total", skipped, reason="unknown_endpoint")
+
+        statements = []
+        if rows:
+            statements.append((
+                """
+                MATCH (c:Chunk {id: $chunk_id})
+                UNWIND $rows AS row
+                MERGE (e:Entity {id: row.id})
+                SET e.name = row.name,
+                    e.type = row.type,
+                    e.relations = CASE
+                        WHEN row.relation IS NULL OR row.relation IN coalesce(e.relations, []) THEN e.relations
+                        ELSE coalesce(e.relations, []) + row.relation END
+                MERGE (c)-[:CONTAINS]->(e)
+                """,
+                rows,
+            ))
+        if mappings:
+            statements.append((
+                """
+                UNWIND $rows AS row
+                MATCH (e:Entity {id: row.id})
+                MATCH (o:Concept {concept_id: row.concept_id})
+                MERGE (e)-[:MAPS_TO]->(o)
+                """,
+                mappings,
+            ))
+        statements.extend(self._relation_statements(relation_rows))
+        if not statements:
+            return
+
+        def _tx_work(tx):
+            for query, stmt_rows in statements:
+                tx.run(query, {"chunk_id": chunk_id, "rows": stmt_rows}).consume()
+
+        with self.driver.session() as session:
+            with METRICS.timer("neo4j_tx_seconds", write="chunk_extraction"):
+                session.execute_write(_tx_work)
+        METRICS.inc("neo4j_queries_total", len(statements))
+        METRICS.observe("neo4j_queries_per_chunk", len(statements), buckets=COUNT_BUCKETS)
+
+    def link_duplicate_chunks(self, duplicates, batch_size=None):
+        """Give near-duplicate chunks the entities of their representative.
+
+        duplicates: (chunk_id, representative_chunk_id) pairs. The duplicate
+        gets CONTAINS links to every entity its representative contains and
+        a duplicate_of property; relations keep the representative's id as
+        provenance. Run after the representatives' extractions are written.
+        """
+        rows = [{"id": chunk_id, "representative_id": rep_id} for chunk_id, rep_id in duplicates]
+        if not rows:
+            return 0
+        with self.driver.session() as session:
+            return self._write_batches(
+                session,
+                """
+                UNWIND $rows AS row
+                MATCH (d:Chunk {id: row.id}), (r:Chunk {id: row.representative_id})
+                SET d.duplicate_of = r.id
+                WITH d, r
+                MATCH (r)-[:CONTAINS]->(e:Entity)
+                MERGE (d)-[:CONTAINS]->(e)
+                """,
+                rows,
+                label="duplicate chunk links",
+                batch_size=batch_size,
+            )
+
     # ------------------------------
     # 3. Ontology ingestion
     # ------------------------------
-    def ingest_ontology(self, csv_path):
-        df = pd.read_csv(csv_path)
+    def ingest_ontology(self, csv_path, batch_size=5000):
+        """Bulk-load the ontology CSV in two passes.
+
+        Pass 1 upserts every Concept node, pass 2 creates PARENT_OF edges, so
+        a parent is never missed just because its row comes later in the file.
+        """
+        table = OntologyTable.load(csv_path)
+        concept_rows = []
+        edge_rows = []
+        for concept_id, term, parents in table.iter_concepts():
+            concept_rows.append({"concept_id": concept_id, "term": term})
+            # parents is "|"-separated for descriptors with several tree positions
+            for parent_id in (parents or "").split("|"):
+                if parent_id:
+                    edge_rows.append({"concept_id": concept_id, "parent_id": parent_id})
+        table.close()
+
         with self.driver.session() as session:
-            for _, row in df.iterrows():
-                self._run_with_retry(
-                    session,
-                    """
-                    MERGE (c:Concept {concept_id: $concept_id})
-                    SET c.term = $term
-                    WITH c
-                    CALL {
-                        WITH c
-                        MATCH (p:Concept {concept_id: $parent_id})
-                        MERGE (p)-[:PARENT_OF]->(c)
-                    }
-                    """,
-                    {
-                        "concept_id": row["concept_id"],
-                        "term": row["term"],
-                        "parent_id": row.get("parent_id"),
-                    },
-                )
+            self._write_batches(
+                session,
+                """
+                UNWIND $rows AS row
+                MERGE (c:Concept {concept_id: row.concept_id})
+                SET c.term = row.term
+                """,
+                concept_rows,
+                label="concepts",
+                batch_size=batch_size,
+                progress=True,
+            )
+            self._write_batches(
+                session,
+                """
+                UNWIND $rows AS row
+                MATCH (c:Concept {concept_id: row.concept_id})
+                MATCH (p:Concept {concept_id: row.parent_id})
+                MERGE (p)-[:PARENT_OF]->(c)
+                """,
+                edge_rows,
+                label="PARENT_OF edges",
+                batch_size=batch_size,
+                progress=True,
+            )
+
+    # ------------------------------
+    # 4. Entity-entity relations
+    # ------------------------------
+    def write_relations(self, relations, batch_size=None):
+        """Upsert typed relationships between existing entities in batches.
 
-    def insert_relation_between_entities(self, e1_id, e2_id, relation_type, confidence=None):
-        """Create a relation node and connect two existing entities by id."""
+        relations: dicts with e1_id, e2_id, relation_type and optionally
+            confidence and chunk_id (the chunk it was extracted from).
+        Each relation becomes a direct (a)-[:TYPE]->(b) edge carrying type,
+        confidence and chunk_ids, TYPE being one of RELATION_TYPES or
+        RELATED_TO; one UNWIND statement is sent per type.
+        """
+        rows = [
+            {
+                "e1_id": rel["e1_id"],
+                "e2_id": rel["e2_id"],
+                "relation_type": rel["relation_type"],
+                "confidence": rel.get("confidence"),
+                "chunk_id": rel.get("chunk_id"),
+            }
+            for rel in relations
+        ]
+        written = 0
         with self.driver.session() as session:
-            params = {"e1_id": e1_id, "e2_id": e2_id, "relation_type": relation_type}
-            if confidence is not None:
-                params["confidence"] = confidence
-
-            query = """
-            MATCH (a:Entity {id: $e1_id}), (b:Entity {id: $e2_id})
-            MERGE (r:Relation {type: $relation_type})
-            SET r.confidence = coalesce($confidence, r.confidence)
-            MERGE (a)-[:RELATES_TO]->(r)-[:RELATES_TO]->(b)
-            RETURN r
-            """
-            self._run_with_retry(session, query, params)
+            for query, rel_rows in self._relation_statements(rows):
+                written += self._write_batches(session, query, rel_rows, label="relations", batch_size=batch_size)
+        return written
+
+    def insert_relation_between_entities(self, e1_id, e2_id, relation_type, confidence=None, chunk_id=None):
+        """Connect two existing entities by id with a typed relationship."""
+        self.write_relations([{
+            "e1_id": e1_id,
+            "e2_id": e2_id,
+            "relation_type": relation_type,
+            "confidence": confidence,
+            "chunk_id": chunk_id,
+        }])
 
     def close(self):
         self.driver.close()
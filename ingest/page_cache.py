@@ -0,0 +1,34 @@
+# ingest/page_cache.py
+import json
+import os
+
+
+class PageTextCache:
+    """Extracted PDF page text stored on disk, one JSON file per source hash.
+
+    Re-chunking with a different Chunker configuration reads the cached
+    page text instead of parsing the PDF again.
+    """
+
+    def __init__(self, cache_dir="data/cache/pages"):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, source_hash):
+        return os.path.join(self.cache_dir, f"{source_hash}.json")
+
+    def get(self, source_hash):
+        """Return the list of page texts, or None if the file is not cached."""
+        try:
+            with open(self._path(source_hash), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, source_hash, pages):
+        # write then rename so concurrent readers never see a partial file
+        path = self._path(source_hash)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(pages, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
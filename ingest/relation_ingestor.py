@@ -1,17 +1,32 @@
-from neo4j import GraphDatabase
+# ingest/relation_ingestor.py
+from .neo4j_ingestor import Neo4jIngestor
+
 
 class RelationIngestor:
-    def __init__(self, uri, user, password):
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+    """Buffers relations and writes them through Neo4jIngestor.write_relations,
+    so they use the same typed-relationship model as the chunk pipeline."""
+
+    def __init__(self, uri, user, password, batch_size=500, ingestor=None):
+        self.ingestor = ingestor or Neo4jIngestor(uri, user, password, batch_size=batch_size)
+        self.batch_size = batch_size
+        self._pending = []
+
+    def add_relation(self, entity1_id, entity2_id, relation_type, confidence=None, chunk_id=None):
+        self._pending.append({
+            "e1_id": entity1_id,
+            "e2_id": entity2_id,
+            "relation_type": relation_type,
+            "confidence": confidence,
+            "chunk_id": chunk_id,
+        })
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self.ingestor.write_relations(self._pending)
+            self._pending = []
 
-    def add_relation(self, entity1_id, entity2_id, relation_type, confidence=None):
-        with self.driver.session() as session:
-            session.run(
-                """
-                MATCH (e1:Entity {id: $id1})
-                MATCH (e2:Entity {id: $id2})
-                MERGE (e1)-[r:REL {type: $rel_type}]->(e2)
-                SET r.confidence = $conf
-                """,
-                {"id1": entity1_id, "id2": entity2_id, "rel_type": relation_type, "conf": confidence}
-            )
+    def close(self):
+        self.flush()
+        self.ingestor.close()
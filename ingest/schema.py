@@ -0,0 +1,162 @@
+# ingest/schema.py
+import time
+
+from neo4j.exceptions import ClientError
+
+# Every MERGE / MATCH the ingestors run is keyed on one of these; without them
+# each lookup is a label scan and ingestion slows down quadratically as the
+# graph grows. Constraints are (name, label, property), indexes add the kind.
+CONSTRAINTS = [
+    ("chunk_id_unique", "Chunk", "id"),
+    ("entity_id_unique", "Entity", "id"),
+    ("concept_id_unique", "Concept", "concept_id"),
+]
+INDEXES = [
+    # insert_entity_and_relation can match a chunk by its text; a TEXT index
+    # has no problem with long values, unlike a RANGE index
+    ("chunk_text", "Chunk", "text", "TEXT"),
+    ("entity_name", "Entity", "name", "RANGE"),
+    # delete_chunks finds the near-duplicates of removed chunks
+    ("chunk_duplicate_of", "Chunk", "duplicate_of", "RANGE"),
+]
+VECTOR_INDEX = ("chunk_embeddings", "Chunk", "embedding")
+
+# Representative ingestion statements, EXPLAINed by check_plans()
+PLAN_CHECKS = {
+    "insert_chunks": ("UNWIND $rows AS row MERGE (c:Chunk {id: row.id}) SET c.text = row.text",
+                      {"rows": []}),
+    "chunk_by_text": ("MATCH (c:Chunk {text: $chunk_key}) RETURN c", {"chunk_key": ""}),
+    "write_entities": ("MATCH (c:Chunk {id: $chunk_id}) UNWIND $rows AS row "
+                       "MERGE (e:Entity {id: row.id}) MERGE (c)-[:CONTAINS]->(e)",
+                       {"chunk_id": "", "rows": []}),
+    "map_concepts": ("UNWIND $rows AS row MATCH (e:Entity {id: row.id}) "
+                     "MATCH (o:Concept {concept_id: row.concept_id}) MERGE (e)-[:MAPS_TO]->(o)",
+                     {"rows": []}),
+    "orphaned_duplicates": ("UNWIND $rows AS row MATCH (d:Chunk {duplicate_of: row.id}) RETURN d.id",
+                            {"rows": []}),
+    "parent_edges": ("UNWIND $rows AS row MATCH (c:Concept {concept_id: row.concept_id}) "
+                     "MATCH (p:Concept {concept_id: row.parent_id}) MERGE (p)-[:PARENT_OF]->(c)",
+                     {"rows": []}),
+}
+
+SCAN_OPERATORS = ("AllNodesScan", "NodeByLabelScan", "NodeIndexScan", "DirectedRelationshipTypeScan",
+                  "UndirectedRelationshipTypeScan")
+
+
+def _walk(plan):
+    yield plan
+    for child in plan.get("children", []):
+        yield from _walk(child)
+
+
+class SchemaManager:
+    """Creates and checks the constraints and indexes the ingestion relies on.
+
+    Everything is created with IF NOT EXISTS, so ensure() is safe on every
+    run. verify() looks schema up by label and property rather than by name,
+    so equivalent indexes created under another name count as present.
+    """
+
+    def __init__(self, driver, database=None):
+        self.driver = driver
+        self.database = database
+
+    def _session(self):
+        return self.driver.session(database=self.database) if self.database else self.driver.session()
+
+    def _create(self, session, name, cypher):
+        try:
+            session.run(cypher).consume()
+        except ClientError as e:
+            # e.g. duplicate ids already in the graph block a uniqueness constraint
+            print(f"[WARN] Could not create {name}: {e.message}")
+
+    def ensure(self, embedding_dim=None):
+        """Create the constraints and lookup indexes, and the chunk vector
+        index when the embedding dimension is known."""
+        with self._session() as session:
+            for name, label, prop in CONSTRAINTS:
+                self._create(session, name,
+                             f"CREATE CONSTRAINT {name} IF NOT EXISTS FOR (n:{label}) REQUIRE n.{prop} IS UNIQUE")
+            for name, label, prop, kind in INDEXES:
+                self._create(session, name, f"CREATE {kind} INDEX {name} IF NOT EXISTS FOR (n:{label}) ON (n.{prop})")
+        if embedding_dim:
+            self.ensure_vector_index(embedding_dim)
+
+    def ensure_vector_index(self, dim, similarity="cosine"):
+        name, label, prop = VECTOR_INDEX
+        with self._session() as session:
+            self._create(session, name, f"""
+                CREATE VECTOR INDEX {name} IF NOT EXISTS FOR (n:{label}) ON (n.{prop})
+                OPTIONS {{indexConfig: {{`vector.dimensions`: {int(dim)}, `vector.similarity_function`: '{similarity}'}}}}
+            """)
+
+    def _indexes(self, session):
+        return [
+            record.data()
+            for record in session.run(
+                "SHOW INDEXES YIELD name, type, entityType, labelsOrTypes, properties, state, "
+                "populationPercent, owningConstraint"
+            )
+        ]
+
+    def verify(self, include_vector=True):
+        """{name: state} for every required schema entry; state is the
+        backing index's state (ONLINE, POPULATING, FAILED) or "MISSING"."""
+        with self._session() as session:
+            indexes = self._indexes(session)
+
+        def _state(label, prop, kind=None, unique=False):
+            for idx in indexes:
+                if idx["entityType"] != "NODE" or idx["labelsOrTypes"] != [label] or idx["properties"] != [prop]:
+                    continue
+                if kind and idx["type"] != kind:
+                    continue
+                if unique and not idx["owningConstraint"]:
+                    continue
+                return idx["state"]
+            return "MISSING"
+
+        states = {name: _state(label, prop, "RANGE", unique=True) for name, label, prop in CONSTRAINTS}
+        states.update({name: _state(label, prop, kind) for name, label, prop, kind in INDEXES})
+        if include_vector:
+            name, label, prop = VECTOR_INDEX
+            states[name] = _state(label, prop, "VECTOR")
+        return states
+
+    def wait_online(self, timeout=300, poll=1.0, include_vector=True):
+        """Poll until nothing is POPULATING (or timeout); returns verify()."""
+        deadline = time.monotonic() + timeout
+        while True:
+            states = self.verify(include_vector)
+            if "POPULATING" not in states.values() or time.monotonic() >= deadline:
+                return states
+            time.sleep(poll)
+
+    def check_plans(self, queries=None):
+        """EXPLAIN each query and return [(name, operator), ...] for every
+        scan in its plan, printing a warning for each."""
+        scans = []
+        with self._session() as session:
+            for name, (query, params) in (queries or PLAN_CHECKS).items():
+                plan = session.run("EXPLAIN " + query, params).consume().plan or {}
+                for op in _walk(plan):
+                    operator = op.get("operatorType", "").split("@")[0]
+                    if operator in SCAN_OPERATORS:
+                        scans.append((name, operator))
+                        print(f"[WARN] Query plan for {name} uses {operator}: {op.get('args', {}).get('Details', '')}")
+        return scans
+
+    def bootstrap(self, embedding_dim=None, timeout=300, check_plans=True):
+        """ensure() + wait_online() + optional check_plans(); reports
+        anything missing or not ONLINE and returns the states."""
+        self.ensure(embedding_dim)
+        states = self.wait_online(timeout, include_vector=bool(embedding_dim))
+        for name, state in states.items():
+            if state != "ONLINE":
+                print(f"[WARN] Schema entry {name} is {state}")
+        online = sum(1 for s in states.values() if s == "ONLINE")
+        print(f"[INFO] Schema: {online}/{len(states)} constraints and indexes ONLINE")
+        if check_plans:
+            self.check_plans()
+        return states
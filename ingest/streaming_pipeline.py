@@ -0,0 +1,215 @@
+# ingest/streaming_pipeline.py
+import queue
+import threading
+
+from extract.parallel_extractor import ParallelExtractor
+from .chunk_loader import iter_parsed_pdfs, split_pages
+from .text_splitter import Chunker
+
+_DONE = object()
+
+
+class StreamingPipeline:
+    """Staged ingestion connected by bounded queues.
+
+        load PDF -> split -> write Chunk nodes -> extract -> write entities
+
+    Each stage runs in its own thread and blocks when the next queue is
+    full, so at most a few files' worth of chunks are held in memory and the
+    first chunks reach Neo4j while later PDFs are still being parsed.
+
+    extract_fn(chunk) -> (entities, relations) and
+    normalize_fn(entities) -> normalized entity dicts are the same callables
+    main.py uses in the batch loop.
+    """
+
+    def __init__(self, neo4j_ingestor, extract_fn, normalize_fn, manifest=None, chunker=None,
+                 queue_size=4, chunk_batch_size=100, max_in_flight=1, max_chunks=0,
+                 parse_workers=0, page_cache=None, near_dup_detector=None):
+        self.neo4j_ingestor = neo4j_ingestor
+        self.extract_fn = extract_fn
+        self.normalize_fn = normalize_fn
+        self.manifest = manifest
+        self.chunker = chunker or Chunker()
+        self.queue_size = queue_size
+        self.chunk_batch_size = chunk_batch_size
+        self.max_in_flight = max_in_flight
+        self.max_chunks = max_chunks
+        self.parse_workers = parse_workers
+        self.page_cache = page_cache
+        # NearDuplicateDetector: duplicates skip extraction and are linked to
+        # their representative's entities once it is written
+        self.near_dup_detector = near_dup_detector
+        self.duplicates_linked = 0
+        self._dup_lock = threading.Lock()
+        self._seeded = set()
+        self.extractor = None
+        self._stop = threading.Event()
+        self._errors = []
+
+    # ------------------------------
+    # queue helpers
+    # ------------------------------
+    def _put(self, q, item):
+        # Give up once the pipeline is stopping so upstream threads never hang
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _drain(self, q):
+        while not self._stop.is_set():
+            try:
+                item = q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                return
+            yield item
+
+    def _stage(self, name, fn, *args):
+        def _target():
+            try:
+                fn(*args)
+            except Exception as e:  # re-raised from run(); stopping unblocks all stages
+                self._errors.append((name, e))
+                self._stop.set()
+            finally:
+                self._put(args[-1], _DONE)
+
+        thread = threading.Thread(target=_target, name=f"pipeline-{name}", daemon=True)
+        thread.start()
+        return thread
+
+    # ------------------------------
+    # stages
+    # ------------------------------
+    def _load(self, pdf_folder, skip_hashes, out_q):
+        parsed = iter_parsed_pdfs(pdf_folder, skip_hashes, self.parse_workers, self.page_cache)
+        for item in parsed:
+            if not self._put(out_q, item):
+                parsed.close()
+                return
+
+    def _split(self, in_q, out_q):
+        for filename, source_hash, docs in self._drain(in_q):
+            file_chunks = list(split_pages(self.chunker, filename, source_hash, docs))
+            if not self._put(out_q, file_chunks):
+                return
+
+    def _write_chunks(self, in_q, out_q):
+        for file_chunks in self._drain(in_q):
+            pending_extraction = file_chunks
+            if self.manifest is not None:
+                self.manifest.register(file_chunks)
+                self._purge_stale()
+                new_chunks = self.manifest.pending(file_chunks, "loaded")
+                pending_extraction = self.manifest.pending(file_chunks, "written")
+                if self.near_dup_detector is not None and len(pending_extraction) < len(file_chunks):
+                    pending_ids = {c.chunk_id for c in pending_extraction}
+                    self._seed_duplicates([c for c in file_chunks if c.chunk_id not in pending_ids])
+            else:
+                new_chunks = file_chunks
+
+            for i in range(0, len(new_chunks), self.chunk_batch_size):
+                batch = new_chunks[i:i + self.chunk_batch_size]
+                self.neo4j_ingestor.insert_chunks(batch)
+                if self.manifest is not None:
+                    self.manifest.mark(batch, "loaded")
+
+            for chunk in pending_extraction:
+                if not self._put(out_q, chunk):
+                    return
+
+    def _purge_stale(self):
+        """Delete queued stale chunks (changed files, or left by a failed run)."""
+        orphaned = self.manifest.purge_stale(self.neo4j_ingestor.delete_chunks)
+        if orphaned:
+            # files already streamed (or skipped as complete) are not
+            # revisited; their orphans are redone next run
+            self.manifest.reset(orphaned)
+            print(f"[INFO] {len(orphaned)} unlinked near-duplicate chunks will be re-extracted next run")
+
+    def _seed_duplicates(self, chunks):
+        """Register chunks written by earlier runs with the detector, as the
+        batch path does, so new chunks repeating them are linked to them."""
+        with self._dup_lock:
+            for chunk in chunks:
+                chunk_id = chunk.chunk_id
+                if self.near_dup_detector.add(chunk_id, chunk.page_content) is None:
+                    self._seeded.add(chunk_id)
+
+    def _link_duplicates(self, duplicates, written):
+        linked = [(chunk, rep_id) for chunk, rep_id in duplicates if rep_id in written]
+        self.neo4j_ingestor.link_duplicate_chunks([(chunk.chunk_id, rep_id) for chunk, rep_id in linked])
+        if self.manifest is not None:
+            self.manifest.mark([chunk for chunk, _ in linked], "extracted")
+            self.manifest.mark([chunk for chunk, _ in linked], "written")
+        self.duplicates_linked += len(linked)
+
+    # ------------------------------
+    # entry point
+    # ------------------------------
+    def run(self, pdf_folder, skip_hashes=None):
+        """Run all stages to completion. Returns the number of chunks extracted."""
+        self._stop.clear()
+        self._errors = []
+        self._seeded = set()
+        if self.manifest is not None:
+            # deletes a failed run left queued, even when no file is re-read
+            self._purge_stale()
+        pages_q = queue.Queue(maxsize=self.queue_size)
+        files_q = queue.Queue(maxsize=self.queue_size)
+        extract_q = queue.Queue(maxsize=self.queue_size * max(1, self.max_in_flight))
+
+        threads = [
+            self._stage("load", self._load, pdf_folder, skip_hashes, pages_q),
+            self._stage("split", self._split, pages_q, files_q),
+            self._stage("write-chunks", self._write_chunks, files_q, extract_q),
+        ]
+
+        duplicates = []
+
+        def _limited():
+            n = 0
+            for chunk in self._drain(extract_q):
+                # checked first so a chunk that is never extracted is never
+                # registered as a representative
+                if self.max_chunks and n >= self.max_chunks:
+                    return
+                if self.near_dup_detector is not None:
+                    with self._dup_lock:
+                        rep_id = self.near_dup_detector.add(chunk.chunk_id, chunk.page_content)
+                    if rep_id is not None:
+                        duplicates.append((chunk, rep_id))
+                        continue
+                n += 1
+                yield chunk
+
+        self.extractor = ParallelExtractor(self.extract_fn, max_in_flight=self.max_in_flight)
+        extracted = 0
+        written = set()
+        try:
+            for chunk, (entities, relations) in self.extractor.run(_limited()):
+                normalized = self.normalize_fn(entities)
+                if self.manifest is not None:
+                    self.manifest.mark([chunk], "extracted")
+                self.neo4j_ingestor.write_chunk_extraction(chunk.chunk_id, normalized, relations)
+                if self.manifest is not None:
+                    self.manifest.mark([chunk], "written")
+                written.add(chunk.chunk_id)
+                extracted += 1
+            self._link_duplicates(duplicates, written | self._seeded)
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join(timeout=5)
+
+        if self._errors:
+            name, error = self._errors[0]
+            raise RuntimeError(f"Pipeline stage '{name}' failed: {error}") from error
+        self.extractor.report()
+        return extracted
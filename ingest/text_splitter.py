@@ -1,71 +1,189 @@
 """ingest/text_splitter.py
 
-Provides a small Chunker wrapper around a LangChain text splitter.
-This module intentionally keeps a minimal API: Chunker(chunk_size, chunk_overlap)
-with a .chunk(docs) method that returns a list of objects with `page_content` and `metadata`.
+Chunker(chunk_size, chunk_overlap) splits page texts into Chunk records.
+
+The splitting follows LangChain's RecursiveCharacterTextSplitter (separators
+"\\n\\n", "\\n", " ", ""; separators kept at the start of the following
+piece; whitespace stripped), so chunk boundaries match what earlier runs
+produced, but it works on character offsets into the page text: no
+intermediate strings are built and every chunk knows exactly where it came
+from. Sizes are measured in characters by default or in approximate LLM
+tokens with unit="tokens" (or any length_function).
 """
 from __future__ import annotations
 
-from typing import List, Iterable
+import re
+from collections import deque
+from typing import Callable, Iterable, Iterator, List, Optional
+
+DEFAULT_SEPARATORS = ("\n\n", "\n", " ", "")
+
+# Roughly one token per short word or punctuation mark; long words are
+# counted in 6-character pieces, as subword tokenizers split them.
+_TOKEN_RE = re.compile(r"\w{1,6}|[^\w\s]")
+
+
+def approx_token_count(text: str) -> int:
+    """Cheap, tokenizer-free estimate of the number of LLM tokens in text."""
+    return len(_TOKEN_RE.findall(text))
+
+
+class Chunk:
+    """One chunk of a source text.
+
+    start / end are character offsets into the page text. source, file_hash
+    and chunk_id are filled in by chunk_loader.split_pages; read them directly.
+    `metadata` only builds the dict view LangChain-style callers expect, a
+    fresh dict on every access.
+    """
+
+    __slots__ = ("page_content", "start", "end", "page", "source_index", "part_index",
+                 "source", "file_hash", "chunk_id", "doc_metadata")
+
+    def __init__(self, page_content, start, end, page=0, source_index=0, part_index=0, doc_metadata=None):
+        self.page_content = page_content
+        self.start = start
+        self.end = end
+        self.page = page
+        self.source_index = source_index
+        self.part_index = part_index
+        # the page's own metadata, shared by all of its chunks (not copied)
+        self.doc_metadata = doc_metadata
+        self.source = None
+        self.file_hash = None
+        self.chunk_id = None
 
-try:
-    from langchain.text_splitter import RecursiveCharacterTextSplitter
-    _HAS_LANGCHAIN_SPLITTER = True
-except Exception:
-    RecursiveCharacterTextSplitter = None  # type: ignore
-    _HAS_LANGCHAIN_SPLITTER = False
+    @property
+    def metadata(self):
+        md = {}
+        if self.source is not None:
+            md["source"] = self.source
+        if self.chunk_id is not None:
+            md["chunk_id"] = self.chunk_id
+        if self.file_hash is not None:
+            md["file_hash"] = self.file_hash
+        if self.doc_metadata:
+            md.update(self.doc_metadata)
+        md["source_index"] = self.source_index
+        md["part_index"] = self.part_index
+        md["start_index"] = self.start
+        md["end_index"] = self.end
+        return md
+
+    def __repr__(self):
+        return f"Chunk(page={self.page}, start={self.start}, end={self.end}, chunk_id={self.chunk_id!r})"
 
 
 class Chunker:
-    def __init__(self, chunk_size: int = 800, chunk_overlap: int = 100):
+    def __init__(self, chunk_size: int = 800, chunk_overlap: int = 100, unit: str = "chars",
+                 length_function: Optional[Callable[[str], int]] = None, separators=DEFAULT_SEPARATORS):
+        """unit: "chars" or "tokens" (approx_token_count); length_function
+        overrides both, e.g. a real tokenizer's `lambda s: len(tok.encode(s))`."""
+        if chunk_overlap >= chunk_size:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})")
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        if _HAS_LANGCHAIN_SPLITTER:
-            self.splitter = RecursiveCharacterTextSplitter(
-                chunk_size=chunk_size, chunk_overlap=chunk_overlap
-            )
-
-    def _simple_split(self, text: str) -> List[str]:
-        # naive sentence/character-based splitter to use when LangChain is not installed
-        if not text:
-            return [""]
-        parts = []
-        start = 0
-        while start < len(text):
-            end = start + self.chunk_size
-            parts.append(text[start:end])
-            start = end - self.chunk_overlap if end < len(text) else end
-        return parts
-
-    def chunk(self, docs: Iterable) -> List:
-        """Split Document-like objects or strings into chunk objects with
-        `page_content` and `metadata` attributes.
-        """
-        texts = []
-        metadatas = []
-        for d in docs:
-            if hasattr(d, "page_content"):
-                texts.append(d.page_content)
-                metadatas.append(getattr(d, "metadata", {}) or {})
-            else:
-                texts.append(str(d))
-                metadatas.append({})
+        self.separators = list(separators)
+        if length_function is None and unit == "tokens":
+            length_function = approx_token_count
+        elif length_function is None and unit != "chars":
+            raise ValueError(f"unknown unit {unit!r}; expected 'chars' or 'tokens'")
+        self.length_function = length_function
+
+    @classmethod
+    def for_context(cls, context_tokens: int, reserved_tokens: int, chunk_overlap: int = 64, **kwargs):
+        """Token-sized chunker filling what is left of the model's context
+        window after `reserved_tokens` (prompt template + expected answer)."""
+        return cls(context_tokens - reserved_tokens, chunk_overlap, unit="tokens", **kwargs)
+
+    def _length(self, text, start, end):
+        if self.length_function is None:
+            return end - start
+        return self.length_function(text[start:end])
 
-        split_docs = []
-        for i, t in enumerate(texts):
-            if _HAS_LANGCHAIN_SPLITTER:
-                parts = self.splitter.split_text(t)
+    def _merge(self, spans):
+        """Greedily merge contiguous (start, end, length) pieces into chunk
+        spans, carrying up to chunk_overlap of each chunk into the next."""
+        merged = []
+        current = deque()
+        total = 0
+        for start, end, n in spans:
+            if total + n > self.chunk_size and current:
+                merged.append((current[0][0], current[-1][1]))
+                while total > self.chunk_overlap or (total + n > self.chunk_size and total > 0):
+                    total -= current.popleft()[2]
+            current.append((start, end, n))
+            total += n
+        if current:
+            merged.append((current[0][0], current[-1][1]))
+        return merged
+
+    def _spans(self, text, start, end, separators):
+        """Chunk spans of text[start:end], splitting on the first separator
+        present and recursing into pieces that are still too long."""
+        separator, rest = separators[-1], []
+        for i, sep in enumerate(separators):
+            if sep == "":
+                separator = sep
+                break
+            if text.find(sep, start, end) >= 0:
+                separator, rest = sep, separators[i + 1:]
+                break
+
+        if separator:
+            # each piece starts with the separator that preceded it
+            cuts = [start]
+            pos = text.find(separator, start, end)
+            while pos >= 0:
+                cuts.append(pos)
+                pos = text.find(separator, pos + len(separator), end)
+            cuts.append(end)
+            pieces = [(a, b) for a, b in zip(cuts, cuts[1:]) if b > a]
+        else:
+            pieces = [(i, i + 1) for i in range(start, end)]
+
+        spans = []
+        good = []
+        for a, b in pieces:
+            n = self._length(text, a, b)
+            if n < self.chunk_size:
+                good.append((a, b, n))
+                continue
+            if good:
+                spans.extend(self._merge(good))
+                good = []
+            if rest:
+                spans.extend(self._spans(text, a, b, rest))
             else:
-                parts = self._simple_split(t)
+                spans.append((a, b))
+        if good:
+            spans.extend(self._merge(good))
+        return spans
 
-            for j, p in enumerate(parts):
-                class _Chunk:
-                    def __init__(self, page_content, metadata):
-                        self.page_content = page_content
-                        self.metadata = metadata
+    def split_spans(self, text: str) -> Iterator[tuple]:
+        """(start, end) offsets of each chunk of text, whitespace-trimmed."""
+        for start, end in self._spans(text, 0, len(text), self.separators):
+            while start < end and text[start].isspace():
+                start += 1
+            while end > start and text[end - 1].isspace():
+                end -= 1
+            if end > start:
+                yield start, end
 
-                md = dict(metadatas[i]) if metadatas else {}
-                md.update({"source_index": i, "part_index": j})
-                split_docs.append(_Chunk(p, md))
+    def iter_chunks(self, docs: Iterable) -> Iterator[Chunk]:
+        """Lazily split Document-like objects (page_content / metadata) or
+        strings into Chunk records, one page at a time."""
+        for i, d in enumerate(docs):
+            if hasattr(d, "page_content"):
+                text = d.page_content or ""
+                doc_md = getattr(d, "metadata", None) or None
+            else:
+                text = str(d)
+                doc_md = None
+            page = doc_md.get("page", i) if doc_md else i
+            for j, (start, end) in enumerate(self.split_spans(text)):
+                yield Chunk(text[start:end], start, end, page, i, j, doc_md)
 
-        return split_docs
+    def chunk(self, docs: Iterable) -> List[Chunk]:
+        """List form of iter_chunks."""
+        return list(self.iter_chunks(docs))
@@ -1,134 +1,310 @@
 import os
-from dotenv import load_dotenv
+from config import NEO4J_URI, NEO4J_USER, NEO4J_PASS, OLLAMA_MODEL, ONTOLOGY_CSV, get_embedding_model
 from ingest.chunk_loader import load_chunks
+from ingest.page_cache import PageTextCache
+from ingest.text_splitter import Chunker
 from extract.entity_extractor import EntityExtractor
 from extract.ontology_matcher import OntologyMatcher
 from extract.relation_extractor import RelationExtractor
+from extract.parallel_extractor import ParallelExtractor
+from extract.combined_extractor import CombinedExtractor
+from extract.extraction_cache import ExtractionCache
+from extract.near_duplicates import NearDuplicateDetector
+from extract.dictionary_tagger import DictionaryTagger
 from ingest.neo4j_ingestor import Neo4jIngestor
+from ingest.manifest import IngestManifest
+from ingest.streaming_pipeline import StreamingPipeline
+from metrics import COUNT_BUCKETS, METRICS
 
-load_dotenv()
-
-NEO4J_URI = os.getenv("NEO4J_URI")
-NEO4J_USER = os.getenv("NEO4J_USER")
-NEO4J_PASS = os.getenv("NEO4J_PASS")
-
-entity_extractor = EntityExtractor(model_name="mistral")
-ontology_matcher = OntologyMatcher(r"C:\KG+RAG\data\ontology\mesh_terms.csv")
-relation_extractor = RelationExtractor(model_name="mistral")
-neo4j_ingestor = Neo4jIngestor(NEO4J_URI, NEO4J_USER, NEO4J_PASS)
-
-# Auto-detect where PDFs live. Common places: input/, data/pdfs/, data/
-possible_paths = ["input/", os.path.join("data", "pdfs"), "data/"]
-pdf_path = None
-for p in possible_paths:
-    if os.path.isdir(p):
-        # quick check for any PDF files inside
-        files = [f for f in os.listdir(p) if f.lower().endswith(".pdf")]
-        if files:
-            pdf_path = p
-            break
-
-if pdf_path is None:
-    # fallback to data/ (may be empty)
-    pdf_path = "data/"
-
-print(f"[INFO] Using pdf path: {pdf_path}")
-chunks = load_chunks(pdf_path)
-print(f"[INFO] Loaded {len(chunks)} chunks from {pdf_path}")
-
-print("[INFO] Ingesting ontology concepts into Neo4j...")
-neo4j_ingestor.ingest_ontology(r"C:\KG+RAG\data\ontology\mesh_terms.csv")
-
-print("[INFO] Ingesting chunks...")
-neo4j_ingestor.insert_chunks(chunks)
-
-# If TEST_NO_LLM is set, skip LLM extraction and relations to quickly validate chunk
-# ingestion and Neo4j connectivity in environments without LLM access.
-if os.getenv("TEST_NO_LLM", "0") == "1":
-    print("[INFO] TEST_NO_LLM=1 set — skipping LLM extraction and relation linking.")
-    neo4j_ingestor.close()
-    print("[INFO] Exiting early after chunk ingestion (TEST_NO_LLM).")
-    raise SystemExit(0)
-
-# Quick test mode: mock extractor to verify entity+relation ingestion without calling an LLM.
-if os.getenv("TEST_MOCK_EXTRACTOR", "0") == "1":
-    max_chunks = int(os.getenv("MAX_CHUNKS", "5"))
-    print(f"[INFO] TEST_MOCK_EXTRACTOR=1 set — creating mock entities/relations for up to {max_chunks} chunks")
-    for idx, chunk in enumerate(chunks):
-        if max_chunks and idx >= max_chunks:
-            break
-        chunk_id = None
-        try:
-            chunk_id = chunk.metadata.get("chunk_id")
-        except Exception:
-            pass
-
-        # create two mock entities per chunk and a relation between them
-        e1_id = f"mock_{idx}_a"
-        e2_id = f"mock_{idx}_b"
-        neo4j_ingestor.insert_entity_and_relation(
-            chunk_id=chunk_id,
-            chunk_text=chunk.page_content,
-            entity_name=f"MockEntity_{idx}_A",
-            entity_id=e1_id,
-            entity_type="Mock",
+CHUNK_BATCH_SIZE = int(os.getenv("CHUNK_BATCH_SIZE", "500"))
+
+
+def export_metrics():
+    """METRICS=1: print a summary and write METRICS_PATH (.prom = Prometheus text, else JSON lines)."""
+    if not METRICS.enabled:
+        return
+    METRICS.report()
+    path = os.getenv("METRICS_PATH", "data/cache/metrics.jsonl")
+    if path.endswith(".prom"):
+        METRICS.write_prometheus(path)
+    else:
+        METRICS.write_jsonl(path)
+    print(f"[INFO] Metrics written to {path}")
+
+
+def main():
+    # Everything runs inside main() so worker processes (PDF_PARSE_WORKERS)
+    # can import this module without re-running the pipeline.
+
+    # EXTRACTION_CACHE=0 disables the on-disk cache of parsed LLM results
+    extraction_cache = None
+    if os.getenv("EXTRACTION_CACHE", "1") == "1":
+        extraction_cache = ExtractionCache(os.getenv("EXTRACTION_CACHE_PATH", "data/cache/extractions.sqlite"))
+
+    entity_extractor = EntityExtractor(model_name=OLLAMA_MODEL, cache=extraction_cache)
+    # FUZZY_MATCHING=1 links names without an exact ontology hit via the trigram index
+    ontology_matcher = OntologyMatcher(ONTOLOGY_CSV,
+                                       fuzzy=os.getenv("FUZZY_MATCHING", "0") == "1")
+    relation_extractor = RelationExtractor(model_name=OLLAMA_MODEL, cache=extraction_cache)
+    # COMBINED_EXTRACTION=1: one LLM call per chunk returns entities and relations
+    combined_extractor = CombinedExtractor(model_name=OLLAMA_MODEL, cache=extraction_cache) if os.getenv("COMBINED_EXTRACTION", "0") == "1" else None
+    neo4j_ingestor = Neo4jIngestor(NEO4J_URI, NEO4J_USER, NEO4J_PASS, batch_size=CHUNK_BATCH_SIZE)
+    llm_calls_per_chunk = 1 if combined_extractor is not None else 2
+    near_dup_threshold = float(os.getenv("NEAR_DUP_THRESHOLD", "0"))
+    near_dup_detector = NearDuplicateDetector(near_dup_threshold) if near_dup_threshold > 0 else None
+
+    # DICTIONARY_TAGGER=only tags chunks with ontology terms (no LLM, no
+    # relations); =prepass skips the LLM for chunks that mention no term
+    tagger_mode = os.getenv("DICTIONARY_TAGGER", "off")
+    if tagger_mode not in ("off", "prepass", "only"):
+        raise ValueError(f"DICTIONARY_TAGGER must be off, prepass or only, got {tagger_mode!r}")
+    dictionary_tagger = DictionaryTagger(ONTOLOGY_CSV) if tagger_mode != "off" else None
+
+    def extract_chunk(chunk):
+        if tagger_mode == "only":
+            return dictionary_tagger.extract(chunk.page_content), []
+        if tagger_mode == "prepass" and not dictionary_tagger.has_mentions(chunk.page_content):
+            METRICS.inc("llm_calls_saved_total", llm_calls_per_chunk, reason="no_mentions")
+            return [], []
+        if combined_extractor is not None:
+            result = combined_extractor.extract(chunk.page_content)
+            return result.entities, result.relations
+        # Both LLM calls for a chunk run on the same worker thread
+        extracted = entity_extractor.extract(chunk.page_content)
+        relations = relation_extractor.extract(chunk.page_content)
+        return extracted, relations
+
+    def report_skipped_relations():
+        if neo4j_ingestor.relations_skipped:
+            print(f"[WARN] Skipped {neo4j_ingestor.relations_skipped} relations whose endpoints "
+                  f"are not entities of their chunk")
+
+    def report_tagger():
+        if dictionary_tagger is None:
+            return
+        if tagger_mode == "prepass":
+            skipped = dictionary_tagger.chunks_without_mentions
+            print(f"[INFO] Dictionary pre-pass: {skipped} of {dictionary_tagger.chunks} chunks without "
+                  f"ontology mentions, {skipped * llm_calls_per_chunk} LLM calls saved")
+        else:
+            print(f"[INFO] Dictionary tagger: {dictionary_tagger.chunks} chunks tagged")
+
+    # Auto-detect where PDFs live. Common places: input/, data/pdfs/, data/
+    possible_paths = ["input/", os.path.join("data", "pdfs"), "data/"]
+    pdf_path = None
+    for p in possible_paths:
+        if os.path.isdir(p):
+            # quick check for any PDF files inside
+            files = [f for f in os.listdir(p) if f.lower().endswith(".pdf")]
+            if files:
+                pdf_path = p
+                break
+
+    if pdf_path is None:
+        # fallback to data/ (may be empty)
+        pdf_path = "data/"
+
+    # The manifest records processed files/chunks so re-runs only handle new or
+    # changed PDFs and resume where a previous run stopped.
+    manifest = IngestManifest(os.getenv("INGEST_MANIFEST_PATH", "data/cache/manifest.sqlite"))
+
+    # PDF_PARSE_WORKERS>1 parses PDFs (and page ranges of large PDFs) in a
+    # process pool; extracted page text is cached on disk by file hash.
+    parse_workers = int(os.getenv("PDF_PARSE_WORKERS", "0"))
+    page_cache = PageTextCache(os.getenv("PAGE_CACHE_DIR", "data/cache/pages"))
+
+    # CHUNK_TOKENS>0 sizes chunks in (approximate) LLM tokens instead of the
+    # default 800 characters, so every chunk fits the extraction prompt budget
+    chunk_tokens = int(os.getenv("CHUNK_TOKENS", "0"))
+    chunker = Chunker(chunk_tokens, int(os.getenv("CHUNK_OVERLAP_TOKENS", "32")), unit="tokens") if chunk_tokens else Chunker()
+
+    print(f"[INFO] Using pdf path: {pdf_path}")
+
+    # SCHEMA_BOOTSTRAP=0 skips creating / checking constraints and indexes
+    # (the chunk vector index is created once the embedding dimension is known)
+    if os.getenv("SCHEMA_BOOTSTRAP", "1") == "1":
+        neo4j_ingestor.ensure_schema()
+
+    # STREAMING=1: run load -> split -> write chunks -> extract -> write entities as
+    # concurrent stages over bounded queues instead of materialising every chunk.
+    if os.getenv("STREAMING", "0") == "1":
+        print("[INFO] Ingesting ontology concepts into Neo4j...")
+        neo4j_ingestor.ingest_ontology(ONTOLOGY_CSV)
+        print("[INFO] Streaming chunks through the pipeline...")
+        pipeline = StreamingPipeline(
+            neo4j_ingestor,
+            extract_chunk,
+            ontology_matcher.normalize_entities,
+            manifest=manifest,
+            max_in_flight=int(os.getenv("EXTRACT_IN_FLIGHT", "1")),
+            max_chunks=int(os.getenv("MAX_CHUNKS", "0")),
+            parse_workers=parse_workers,
+            page_cache=page_cache,
+            chunker=chunker,
+            near_dup_detector=near_dup_detector,
         )
-        neo4j_ingestor.insert_entity_and_relation(
-            chunk_id=chunk_id,
-            chunk_text=chunk.page_content,
-            entity_name=f"MockEntity_{idx}_B",
-            entity_id=e2_id,
-            entity_type="Mock",
+        pipeline.run(pdf_path, skip_hashes=manifest.completed_file_hashes())
+        if near_dup_detector is not None:
+            near_dup_detector.report(llm_calls_per_chunk, pipeline.duplicates_linked)
+        report_tagger()
+        report_skipped_relations()
+        manifest.close()
+        neo4j_ingestor.close()
+        export_metrics()
+        print("[INFO] Knowledge Graph creation completed successfully.")
+        return
+
+    chunks = load_chunks(pdf_path, skip_hashes=manifest.completed_file_hashes(),
+                         workers=parse_workers, page_cache=page_cache, chunker=chunker)
+    print(f"[INFO] Loaded {len(chunks)} chunks from new or unfinished files in {pdf_path}")
+    # stale ids stay queued in the manifest until the delete succeeds, so a
+    # run that fails here retries them next time
+    stale_chunk_ids = manifest.register(chunks)
+    if stale_chunk_ids:
+        print(f"[INFO] Removing {len(stale_chunk_ids)} chunks of changed files...")
+        orphaned = manifest.purge_stale(neo4j_ingestor.delete_chunks)
+        if orphaned:
+            # near-duplicates of removed chunks lost their entities; their
+            # (unchanged) files are reloaded so they are extracted or re-linked
+            manifest.reset(orphaned)
+            chunks = load_chunks(pdf_path, skip_hashes=manifest.completed_file_hashes(),
+                                 workers=parse_workers, page_cache=page_cache, chunker=chunker)
+
+    print("[INFO] Ingesting ontology concepts into Neo4j...")
+    neo4j_ingestor.ingest_ontology(ONTOLOGY_CSV)
+
+    print("[INFO] Ingesting chunks...")
+    new_chunks = manifest.pending(chunks, "loaded")
+    neo4j_ingestor.insert_chunks(new_chunks)
+    manifest.mark(new_chunks, "loaded")
+
+    # EMBED_CHUNKS=1: encode chunks locally and store vectors on the Chunk nodes
+    if os.getenv("EMBED_CHUNKS", "0") == "1":
+        from ingest.embedding_ingestor import EmbeddingIngestor
+
+        base_model = get_embedding_model()
+        embedding_model = base_model
+        # EMBEDDING_CACHE=0 disables the on-disk cache of computed vectors
+        if os.getenv("EMBEDDING_CACHE", "1") == "1":
+            from ingest.embedding_cache import CachedEmbeddings
+
+            # EMBEDDING_CACHE_MAX_ENTRIES bounds the cached vectors per model
+            # (least recently used dropped first); 0 keeps every vector
+            max_entries = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+            embedding_model = CachedEmbeddings(
+                base_model, cache_dir=os.getenv("EMBEDDING_CACHE_DIR", "data/cache/embeddings"),
+                max_entries=max_entries or None,
+            )
+
+        print("[INFO] Embedding chunks...")
+        embedding_ingestor = EmbeddingIngestor(
+            embedding_model, NEO4J_URI, NEO4J_USER, NEO4J_PASS,
+            batch_size=int(os.getenv("EMBED_BATCH_SIZE", "256")),
+            index_dir=os.getenv("LOCAL_INDEX_DIR") or None,
         )
+        to_embed = manifest.pending(chunks, "embedded")
+        embedding_ingestor.add_chunks(to_embed)
+        manifest.mark(to_embed, "embedded")
+        chunk_index = embedding_ingestor.local_index("chunk")
+        if chunk_index is not None:
+            # pick up vectors embedded by earlier runs and drop deleted chunks
+            chunk_index.sync_with_neo4j(embedding_ingestor.ingestor.driver, label="Chunk")
+        embedding_ingestor.close()
+        if embedding_model is not base_model:
+            cache_stats = embedding_model.stats()
+            print(f"[INFO] Embedding cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                  f"({cache_stats['hit_rate']:.0%} hit rate)")
+            embedding_model.close()
 
-        neo4j_ingestor.insert_relation_between_entities(e1_id, e2_id, "mock_relation", confidence=0.95)
+    # If TEST_NO_LLM is set, skip LLM extraction and relations to quickly validate chunk
+    # ingestion and Neo4j connectivity in environments without LLM access.
+    if os.getenv("TEST_NO_LLM", "0") == "1":
+        print("[INFO] TEST_NO_LLM=1 set — skipping LLM extraction and relation linking.")
+        neo4j_ingestor.close()
+        print("[INFO] Exiting early after chunk ingestion (TEST_NO_LLM).")
+        return
 
-    neo4j_ingestor.close()
-    print("[INFO] Mock ingestion finished — closed connection.")
-    raise SystemExit(0)
-
-print("[INFO] Extracting and linking entities...")
-max_chunks = int(os.getenv("MAX_CHUNKS", "0"))
-for i, chunk in enumerate(chunks):
-    if max_chunks and i >= max_chunks:
-        break
-    extracted_entities = entity_extractor.extract(chunk.page_content)
-    normalized_entities = ontology_matcher.normalize_entities(extracted_entities)
-
-    # DEBUG: show first few extracted/normalized entities for this chunk
-    print("--- Chunk preview ---")
-    print("Raw extracted (first 5):", extracted_entities[:5] if hasattr(extracted_entities, '__iter__') else extracted_entities)
-    print("Normalized (first 5):", normalized_entities[:5])
-
-    for ent in normalized_entities:
-        # prefer using chunk_id (more reliable) when available
-        chunk_id = None
-        try:
-            chunk_id = chunk.metadata.get("chunk_id")
-        except Exception:
-            pass
-
-        neo4j_ingestor.insert_entity_and_relation(
-            chunk_id=chunk_id,
-            chunk_text=chunk.page_content,
-            entity_name=ent["name"],
-            entity_id=(ent.get("concept_id") or ent.get("id") or ent["name"]),
-            entity_type=ent.get("type", "Unknown"),
-            relation=ent.get("relation")
+    # Quick test mode: mock extractor to verify entity+relation ingestion without calling an LLM.
+    if os.getenv("TEST_MOCK_EXTRACTOR", "0") == "1":
+        max_chunks = int(os.getenv("MAX_CHUNKS", "5"))
+        print(f"[INFO] TEST_MOCK_EXTRACTOR=1 set — creating mock entities/relations for up to {max_chunks} chunks")
+        for idx, chunk in enumerate(chunks):
+            if max_chunks and idx >= max_chunks:
+                break
+            chunk_id = None
+            try:
+                chunk_id = chunk.chunk_id
+            except Exception:
+                pass
+
+            # create two mock entities per chunk and a relation between them
+            mock_entities = [
+                {"name": f"MockEntity_{idx}_A", "id": f"mock_{idx}_a", "type": "Mock"},
+                {"name": f"MockEntity_{idx}_B", "id": f"mock_{idx}_b", "type": "Mock"},
+            ]
+            mock_relations = [{
+                "entity1": f"MockEntity_{idx}_A",
+                "entity2": f"MockEntity_{idx}_B",
+                "relation_type": "mock_relation",
+                "confidence": 0.95,
+            }]
+            neo4j_ingestor.write_chunk_extraction(chunk_id, mock_entities, mock_relations)
+
+        neo4j_ingestor.close()
+        print("[INFO] Mock ingestion finished — closed connection.")
+        return
+
+    print("[INFO] Extracting and linking entities...")
+    max_chunks = int(os.getenv("MAX_CHUNKS", "0"))
+    extract_in_flight = int(os.getenv("EXTRACT_IN_FLIGHT", "1"))
+    pending = manifest.pending(chunks, "written")
+    # NEAR_DUP_THRESHOLD (e.g. 0.9) skips extraction for chunks whose word
+    # shingles are at least that similar to an earlier chunk's; they are
+    # linked to that chunk's entities instead
+    duplicate_of = {}
+    if near_dup_detector is not None:
+        duplicate_of = near_dup_detector.assign((c.chunk_id, c.page_content) for c in chunks)
+    to_extract = [c for c in pending if c.chunk_id not in duplicate_of]
+    if max_chunks:
+        to_extract = to_extract[:max_chunks]
+    print(f"[INFO] {len(to_extract)} chunks pending extraction")
+
+    parallel_extractor = ParallelExtractor(extract_chunk, max_in_flight=extract_in_flight)
+    for chunk, (extracted_entities, relations) in parallel_extractor.run(to_extract):
+        normalized_entities = ontology_matcher.normalize_entities(extracted_entities)
+        METRICS.observe("entities_per_chunk", len(normalized_entities), buckets=COUNT_BUCKETS)
+        METRICS.observe("relations_per_chunk", len(relations), buckets=COUNT_BUCKETS)
+
+        # One transaction per chunk: entities, concept mappings and relations
+        chunk_id = chunk.chunk_id
+        manifest.mark([chunk], "extracted")
+        neo4j_ingestor.write_chunk_extraction(chunk_id, normalized_entities, relations)
+        manifest.mark([chunk], "written")
+
+    if near_dup_detector is not None:
+        # link duplicates whose representative's extraction is in the graph
+        not_written = {c.chunk_id for c in manifest.pending(chunks, "written")}
+        duplicates = [c for c in pending
+                      if c.chunk_id in duplicate_of and duplicate_of[c.chunk_id] not in not_written]
+        neo4j_ingestor.link_duplicate_chunks(
+            [(c.chunk_id, duplicate_of[c.chunk_id]) for c in duplicates]
         )
+        manifest.mark(duplicates, "extracted")
+        manifest.mark(duplicates, "written")
+        near_dup_detector.report(llm_calls_per_chunk, len(duplicates))
+
+    parallel_extractor.report()
+    report_tagger()
+    if extraction_cache is not None:
+        cache_stats = extraction_cache.stats()
+        print(f"[INFO] Extraction cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+              f"({cache_stats['hit_rate']:.0%} hit rate)")
+    report_skipped_relations()
+    manifest.close()
+    neo4j_ingestor.close()
+    export_metrics()
+    print("[INFO] Knowledge Graph creation completed successfully.")
+
 
-    # After entities are created for this chunk, extract relations and link them
-    relations = relation_extractor.extract(chunk.page_content)
-    print("Extracted relations:", relations)
-
-    # Build a lookup from entity name to id for resolution
-    name_to_id = {e["name"]: (e.get("concept_id") or e.get("id") or e["name"]) for e in normalized_entities}
-    for rel in relations:
-        e1_name = rel.entity1
-        e2_name = rel.entity2
-        e1_id = name_to_id.get(e1_name) or e1_name.lower().replace(" ", "_")
-        e2_id = name_to_id.get(e2_name) or e2_name.lower().replace(" ", "_")
-        neo4j_ingestor.insert_relation_between_entities(e1_id, e2_id, rel.relation_type, rel.confidence)
-
-neo4j_ingestor.close()
-print("[INFO] Knowledge Graph creation completed successfully.")
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,44 @@
 # main_relation_pipeline.py
+from config import ONTOLOGY_CSV
 from extract.relation_extractor import RelationExtractor
+from extract.combined_extractor import CombinedExtractor
+from extract.ontology_matcher import OntologyMatcher
 from ingest.relation_ingestor import RelationIngestor
 
-def process_relations(chunks, entity_id_map):
+def process_relations(chunks, entity_id_map, combined=False, ontology_csv=ONTOLOGY_CSV):
     """
     chunks: list of chunk objects
     entity_id_map: dict mapping entity names → normalized ontology IDs
+    combined: use CombinedExtractor, whose relation endpoints always name
+        an extracted entity; those entities are linked and written with the
+        relations, so entity_id_map is not needed
     """
-    extractor = RelationExtractor(model_name="mistral")
+    extractor = CombinedExtractor(model_name="mistral") if combined else RelationExtractor(model_name="mistral")
     relation_ingestor = RelationIngestor("neo4j+s://<uri>", "neo4j", "<password>")
+    ontology_matcher = OntologyMatcher(ontology_csv) if combined else None
 
+    skipped = 0
     for chunk in chunks:
+        chunk_id = chunk.metadata.get("chunk_id")
+        if combined:
+            result = extractor.extract(chunk.page_content)
+            # endpoints are resolved against the chunk's own entities
+            entities = ontology_matcher.normalize_entities(result.entities)
+            relation_ingestor.ingestor.write_chunk_extraction(chunk_id, entities, result.relations)
+            continue
+
         relations = extractor.extract(chunk.page_content)  # list of Relation objects
         for rel in relations:
-            e1_id = entity_id_map.get(rel.entity1) or rel.entity1.lower().replace(" ", "_")
-            e2_id = entity_id_map.get(rel.entity2) or rel.entity2.lower().replace(" ", "_")
-            relation_ingestor.add_relation(e1_id, e2_id, rel.relation_type, rel.confidence)
+            e1_id = entity_id_map.get(rel.entity1)
+            e2_id = entity_id_map.get(rel.entity2)
+            if not e1_id or not e2_id:
+                # an unknown endpoint has no Entity node to attach to
+                skipped += 1
+                continue
+            relation_ingestor.add_relation(e1_id, e2_id, rel.relation_type, rel.confidence, chunk_id)
+
+    # combined extractions are resolved (and skipped) by write_chunk_extraction
+    skipped += relation_ingestor.ingestor.relations_skipped
+    if skipped:
+        print(f"[WARN] Skipped {skipped} relations with an unresolved endpoint")
+    relation_ingestor.close()
@@ -0,0 +1,240 @@
+# metrics.py
+"""In-process pipeline metrics: counters and latency histograms.
+
+Disabled unless METRICS=1. When disabled every call returns immediately
+(timer() hands back one shared no-op context manager), so instrumented code
+pays an attribute lookup and a branch per call. Export with
+write_jsonl() / to_prometheus() / write_prometheus().
+
+    from metrics import METRICS
+
+    with METRICS.timer("pdf_parse_seconds", mode="serial"):
+        ...
+    METRICS.inc("neo4j_retries_total")
+"""
+import bisect
+import json
+import os
+import threading
+import time
+
+# seconds; wide enough for a sub-millisecond lookup and a minute-long LLM call
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# for small per-item counts (queries per chunk, entities per chunk)
+COUNT_BUCKETS = (1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 30, 50, 100)
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "labels", "start")
+
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum", "max")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Upper bucket bound containing the q-quantile (Prometheus-style estimate)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return self.max
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _label_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v)}"' for k, v in pairs) + "}"
+
+
+def percentile(sorted_values, pct):
+    """Linearly interpolated pct-th percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class Metrics:
+    def __init__(self, enabled=False, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    # ------------------------------
+    # recording
+    # ------------------------------
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=None, **labels):
+        """Add value to histogram `name`; `buckets` applies when the series is created."""
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = _Histogram(tuple(buckets or self.buckets))
+            hist.observe(value)
+
+    def timer(self, name, **labels):
+        """Context manager observing its wall time (seconds) into histogram `name`."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def record_llm_usage(self, message, **labels):
+        """Count prompt/completion tokens reported on a chat model response.
+
+        Reads LangChain's usage_metadata, falling back to Ollama's raw
+        prompt_eval_count / eval_count in response_metadata.
+        """
+        if not self.enabled:
+            return
+        usage = getattr(message, "usage_metadata", None) or {}
+        meta = getattr(message, "response_metadata", None) or {}
+        prompt_tokens = usage.get("input_tokens", meta.get("prompt_eval_count"))
+        completion_tokens = usage.get("output_tokens", meta.get("eval_count"))
+        if prompt_tokens is not None:
+            self.inc("llm_prompt_tokens_total", prompt_tokens, **labels)
+        if completion_tokens is not None:
+            self.inc("llm_completion_tokens_total", completion_tokens, **labels)
+        if meta.get("eval_duration") and completion_tokens:
+            # Ollama reports durations in nanoseconds
+            self.observe("llm_tokens_per_second", completion_tokens / (meta["eval_duration"] / 1e9), **labels)
+
+    # ------------------------------
+    # export
+    # ------------------------------
+    def snapshot(self):
+        """List of plain dicts, one per counter / histogram series."""
+        with self._lock:
+            counters = list(self._counters.items())
+            histograms = [(k, h.buckets, h.count, h.sum, h.max, list(h.counts), h.quantile(0.5), h.quantile(0.99))
+                          for k, h in self._histograms.items()]
+        out = []
+        for (name, labels), value in sorted(counters):
+            out.append({"name": name, "type": "counter", "labels": dict(labels), "value": value})
+        for (name, labels), buckets, count, total, peak, counts, p50, p99 in sorted(histograms, key=lambda h: h[0]):
+            out.append({
+                "name": name, "type": "histogram", "labels": dict(labels),
+                "count": count, "sum": total, "max": peak, "p50": p50, "p99": p99,
+                "buckets": dict(zip([str(b) for b in buckets] + ["+Inf"], counts)),
+            })
+        return out
+
+    def write_jsonl(self, path):
+        """Append the current snapshot to `path`, one JSON object per series."""
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        ts = time.time()
+        with open(path, "a", encoding="utf-8") as f:
+            for series in self.snapshot():
+                f.write(json.dumps(dict(series, ts=ts)) + "\n")
+
+    def to_prometheus(self):
+        lines = []
+        typed = set()
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda kv: kv[0])
+            for (name, labels), value in counters:
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{_label_text(labels)} {value}")
+            for (name, labels), hist in histograms:
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                cumulative = 0
+                for bound, n in zip(list(hist.buckets) + ["+Inf"], hist.counts):
+                    cumulative += n
+                    lines.append(f"{name}_bucket{_label_text(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_sum{_label_text(labels)} {hist.sum}")
+                lines.append(f"{name}_count{_label_text(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Write the Prometheus text exposition (e.g. for node_exporter's textfile collector)."""
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def report(self):
+        """Print one line per histogram: count, p50/p99 bucket bounds and sum."""
+        for series in self.snapshot():
+            if series["type"] != "histogram":
+                continue
+            labels = ",".join(f"{k}={v}" for k, v in series["labels"].items())
+            print(f"[INFO] {series['name']}{'{' + labels + '}' if labels else ''}: n={series['count']} "
+                  f"p50<={series['p50']} p99<={series['p99']} sum={series['sum']:.2f}")
+
+
+METRICS = Metrics(enabled=os.getenv("METRICS", "0") == "1")
@@ -0,0 +1,86 @@
+# ontology/fuzzy_index.py
+import re
+
+import numpy as np
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_term(term: str) -> str:
+    """Lowercase, turn punctuation into spaces and collapse whitespace."""
+    return _NON_ALNUM.sub(" ", term.lower()).strip()
+
+
+def trigrams(text: str):
+    """Set of character trigrams of a normalized term, padded at word edges."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class FuzzyTermIndex:
+    """Character-trigram inverted index for approximate ontology term matching.
+
+    Each query only touches the posting lists of its own trigrams; overlap
+    counts are accumulated with numpy and scored with the Dice coefficient
+    2*|q & t| / (|q| + |t|), so there is no linear scan over all terms.
+    """
+
+    def __init__(self, term_concepts):
+        """term_concepts: iterable of (term, concept_id) pairs; synonyms and
+        entry terms can simply be listed as extra pairs."""
+        self.terms = []
+        self.concept_ids = []
+        postings = {}
+        sizes = []
+        seen = set()
+        for term, concept_id in term_concepts:
+            norm = normalize_term(term or "")
+            if not norm or (norm, concept_id) in seen:
+                continue
+            seen.add((norm, concept_id))
+            idx = len(self.terms)
+            self.terms.append(term)
+            self.concept_ids.append(concept_id)
+            grams = trigrams(norm)
+            sizes.append(len(grams))
+            for g in grams:
+                postings.setdefault(g, []).append(idx)
+
+        self.sizes = np.asarray(sizes, dtype=np.float32)
+        self.postings = {g: np.asarray(ids, dtype=np.int32) for g, ids in postings.items()}
+
+    def __len__(self):
+        return len(self.terms)
+
+    def query(self, term: str, k: int = 5, min_score: float = 0.0):
+        """Top-k (concept_id, term, score) candidates, best first."""
+        norm = normalize_term(term or "")
+        if not norm or not self.terms:
+            return []
+        grams = trigrams(norm)
+        lists = [self.postings[g] for g in grams if g in self.postings]
+        if not lists:
+            return []
+
+        counts = np.bincount(np.concatenate(lists), minlength=len(self.terms))
+        candidates = np.flatnonzero(counts)
+        scores = 2.0 * counts[candidates] / (len(grams) + self.sizes[candidates])
+
+        if len(candidates) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        results = []
+        for i in top:
+            score = float(scores[i])
+            if score < min_score:
+                break
+            idx = int(candidates[i])
+            results.append((self.concept_ids[idx], self.terms[idx], score))
+        return results
+
+    def query_batch(self, terms, k: int = 5, min_score: float = 0.0):
+        """query() for every term of a chunk; one result list per term."""
+        return [self.query(t, k=k, min_score=min_score) for t in terms]
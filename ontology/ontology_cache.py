@@ -0,0 +1,241 @@
+# ontology/ontology_cache.py
+"""Compiled, memory-mapped ontology tables.
+
+The ontology CSV is compiled once into a flat binary file next to it
+(<csv>.bin): uint32 arrays plus a UTF-8 string table, with two open-addressing
+hash tables (lowercased term/synonym -> concept, concept_id -> concept).
+Loading is an mmap of that file (no pandas, no per-row Python objects), the
+OS shares the read-only pages between worker processes, and the file is
+rebuilt automatically whenever the CSV's size or mtime changes.
+"""
+import csv
+import mmap
+import os
+import re
+import struct
+import sys
+import zlib
+from array import array
+
+MAGIC = b"ONTOBIN2"
+# magic, byteorder, csv size, csv mtime_ns, n_concepts, n_keys, n_slots, n_cslots, n_strings
+_HEADER = struct.Struct("<8s8sQQIIIII")
+_NONE = 0xFFFFFFFF
+# MeSH tree number, e.g. C01.221.812; older CSVs put one in parent_id
+_TREE_NUMBER = re.compile(r"^[A-Z]\d{2}(\.\d{3})*$")
+
+
+def _hash(key: bytes) -> int:
+    return zlib.crc32(key)
+
+
+def _table_size(n):
+    size = 8
+    while size < 2 * n:
+        size *= 2
+    return size
+
+
+def _csv_signature(csv_path):
+    st = os.stat(csv_path)
+    return st.st_size, st.st_mtime_ns
+
+
+class OntologyTable:
+    """Read-only lookups over a compiled ontology file."""
+
+    def __init__(self, bin_path):
+        self.bin_path = bin_path
+        with open(bin_path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views = []
+        (magic, byteorder, self.csv_size, self.csv_mtime_ns, self.n_concepts, self.n_keys,
+         self.n_slots, self.n_cslots, n_strings) = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or byteorder.rstrip(b"\0").decode() != sys.byteorder:
+            self._mm.close()
+            raise ValueError(f"{bin_path} is not a compiled ontology for this platform")
+
+        view = memoryview(self._mm)
+        self._views.append(view)
+        offset = _HEADER.size
+
+        def _u32(count):
+            nonlocal offset
+            arr = view[offset:offset + 4 * count].cast("I")
+            self._views.append(arr)
+            offset += 4 * count
+            return arr
+
+        self._str_offsets = _u32(n_strings + 1)
+        self._concept_str = _u32(self.n_concepts)
+        self._term_str = _u32(self.n_concepts)
+        self._parent_str = _u32(self.n_concepts)
+        self._tree_str = _u32(self.n_concepts)
+        self._key_str = _u32(self.n_keys)
+        self._key_concept = _u32(self.n_keys)
+        self._slots = _u32(self.n_slots)
+        self._cslots = _u32(self.n_cslots)
+        self._strings_start = offset
+
+    # ------------------------------
+    # building
+    # ------------------------------
+    @classmethod
+    def load(cls, csv_path, bin_path=None):
+        """Open the compiled table for csv_path, (re)building it if missing or stale."""
+        bin_path = bin_path or f"{csv_path}.bin"
+        size, mtime_ns = _csv_signature(csv_path)
+        try:
+            table = cls(bin_path)
+            if table.csv_size == size and table.csv_mtime_ns == mtime_ns:
+                return table
+            table.close()
+        except (OSError, ValueError, struct.error):
+            pass
+        cls.build(csv_path, bin_path)
+        return cls(bin_path)
+
+    @staticmethod
+    def build(csv_path, bin_path):
+        size, mtime_ns = _csv_signature(csv_path)
+        strings = []
+        string_ids = {}
+
+        def _sid(value):
+            if value is None:
+                return _NONE
+            sid = string_ids.get(value)
+            if sid is None:
+                sid = string_ids[value] = len(strings)
+                strings.append(value)
+            return sid
+
+        concept_index = {}
+        concept_str, term_str, parent_str, tree_str = array("I"), array("I"), array("I"), array("I")
+        keys = {}
+        synonyms = []
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                concept_id = row.get("concept_id") or None
+                if concept_id is None:
+                    continue
+                term = row.get("term") or None
+                # parent_ids ("|"-separated) when present, else the single parent_id
+                parents = row.get("parent_ids") or row.get("parent_id") or None
+                trees = row.get("tree_numbers") or None
+                if trees is None and _TREE_NUMBER.match((row.get("parent_id") or "").strip()):
+                    trees = row["parent_id"].strip()
+                idx = concept_index.get(concept_id)
+                if idx is None:
+                    # first row wins for a concept's term and parents
+                    idx = concept_index[concept_id] = len(concept_str)
+                    concept_str.append(_sid(concept_id))
+                    term_str.append(_sid(term))
+                    parent_str.append(_sid(parents))
+                    tree_str.append(_sid(trees))
+                if term:
+                    keys[term.lower().strip()] = idx
+                for synonym in (row.get("entry_terms") or "").split("|"):
+                    if synonym.strip():
+                        synonyms.append((synonym.lower().strip(), idx))
+        # synonyms never override a preferred term of another concept
+        for key, idx in synonyms:
+            keys.setdefault(key, idx)
+
+        key_str, key_concept = array("I"), array("I")
+        for key, idx in keys.items():
+            key_str.append(_sid(key))
+            key_concept.append(idx)
+
+        encoded = [s.encode("utf-8") for s in strings]
+        str_offsets = array("I", [0])
+        for b in encoded:
+            str_offsets.append(str_offsets[-1] + len(b))
+
+        def _fill(n_entries, n_slots, key_bytes_of):
+            slots = array("I", [0]) * n_slots
+            mask = n_slots - 1
+            for i in range(n_entries):
+                pos = _hash(key_bytes_of(i)) & mask
+                while slots[pos]:
+                    pos = (pos + 1) & mask
+                slots[pos] = i + 1  # 0 marks an empty slot
+            return slots
+
+        n_slots = _table_size(len(key_str))
+        n_cslots = _table_size(len(concept_str))
+        slots = _fill(len(key_str), n_slots, lambda i: encoded[key_str[i]])
+        cslots = _fill(len(concept_str), n_cslots, lambda i: encoded[concept_str[i]])
+
+        tmp_path = f"{bin_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, sys.byteorder.encode(), size, mtime_ns, len(concept_str),
+                                 len(key_str), n_slots, n_cslots, len(strings)))
+            for arr in (str_offsets, concept_str, term_str, parent_str, tree_str, key_str, key_concept, slots, cslots):
+                arr.tofile(f)
+            for b in encoded:
+                f.write(b)
+        os.replace(tmp_path, bin_path)
+        print(f"[INFO] Compiled {len(concept_str)} concepts / {len(key_str)} terms into {bin_path}")
+
+    # ------------------------------
+    # lookups
+    # ------------------------------
+    def _bytes(self, sid):
+        start = self._strings_start + self._str_offsets[sid]
+        return self._mm[start:self._strings_start + self._str_offsets[sid + 1]]
+
+    def _str(self, sid):
+        return None if sid == _NONE else self._bytes(sid).decode("utf-8")
+
+    def _probe(self, slots, key_str, key: bytes):
+        mask = len(slots) - 1
+        pos = _hash(key) & mask
+        while True:
+            entry = slots[pos]
+            if not entry:
+                return None
+            if self._bytes(key_str[entry - 1]) == key:
+                return entry - 1
+            pos = (pos + 1) & mask
+
+    def concept_index(self, concept_id):
+        if not concept_id:
+            return None
+        return self._probe(self._cslots, self._concept_str, concept_id.encode("utf-8"))
+
+    def lookup_term(self, term):
+        """concept_id for a lowercased, stripped term or synonym, else None."""
+        k = self._probe(self._slots, self._key_str, term.encode("utf-8"))
+        return None if k is None else self._str(self._concept_str[self._key_concept[k]])
+
+    def parents(self, concept_id):
+        """Raw parent field ("|"-separated) of a concept, or None."""
+        idx = self.concept_index(concept_id)
+        return None if idx is None else self._str(self._parent_str[idx])
+
+    def tree_numbers(self, concept_id):
+        """Raw tree number field ("|"-separated) of a concept, or None."""
+        idx = self.concept_index(concept_id)
+        return None if idx is None else self._str(self._tree_str[idx])
+
+    def term(self, concept_id):
+        idx = self.concept_index(concept_id)
+        return None if idx is None else self._str(self._term_str[idx])
+
+    def iter_concepts(self):
+        """Yield (concept_id, term, parents) for every concept, in CSV order."""
+        for i in range(self.n_concepts):
+            yield self._str(self._concept_str[i]), self._str(self._term_str[i]), self._str(self._parent_str[i])
+
+    def iter_terms(self):
+        """Yield (lowercased term or synonym, concept_id) pairs."""
+        for k in range(self.n_keys):
+            yield self._str(self._key_str[k]), self._str(self._concept_str[self._key_concept[k]])
+
+    def close(self):
+        # views must be released before the mmap can be closed
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mm.close()
@@ -1,18 +1,54 @@
 # ontology/ontology_lookup.py
-import pandas as pd
+from ontology.ontology_cache import OntologyTable
+
 
 class OntologyLookup:
+    """Hash-indexed term/concept lookups over the ontology CSV.
+
+    Backed by the compiled, memory-mapped OntologyTable (<csv>.bin), which is
+    built on first use and rebuilt when the CSV changes; loading it does not
+    parse the CSV or import pandas.
+    """
+
     def __init__(self, csv_path: str = "C:/KG+RAG/data/ontology/mesh_terms.csv"):
         self.csv_path = csv_path
-        self.ontology_df = pd.read_csv(csv_path)
-        # lowercase terms for fast lookup
-        self.ontology_dict = dict(zip(self.ontology_df["term"].str.lower(), self.ontology_df["concept_id"]))
+        self._fuzzy_index = None
+        self.table = OntologyTable.load(csv_path)
+
+    def __len__(self):
+        return self.table.n_concepts
+
+    @property
+    def fuzzy_index(self):
+        """FuzzyTermIndex over every known term and synonym, built on first use."""
+        if self._fuzzy_index is None:
+            # imported here so exact lookups never pay for numpy
+            from ontology.fuzzy_index import FuzzyTermIndex
+
+            self._fuzzy_index = FuzzyTermIndex(self.table.iter_terms())
+        return self._fuzzy_index
 
     def get_concept_id(self, term: str):
-        return self.ontology_dict.get(term.lower().strip())
+        if not term:
+            return None
+        return self.table.lookup_term(term.lower().strip())
 
     def get_parent_id(self, concept_id: str):
-        row = self.ontology_df[self.ontology_df["concept_id"] == concept_id]
-        if not row.empty:
-            return row.iloc[0]["parent_id"]
-        return None
+        # first parent for descriptors that sit at several tree positions
+        parents = self.table.parents(concept_id)
+        return parents.split("|", 1)[0] if parents else None
+
+    def get_term(self, concept_id: str):
+        return self.table.term(concept_id)
+
+    def get_concept_ids(self, terms):
+        """Batch variant of get_concept_id; None for terms without a match."""
+        return [self.get_concept_id(t) for t in terms]
+
+    def get_parent_ids(self, concept_ids):
+        """Batch variant of get_parent_id; None for unknown or missing ids."""
+        return [self.get_parent_id(c) if c else None for c in concept_ids]
+
+    def get_fuzzy_candidates(self, terms, k: int = 5, min_score: float = 0.0):
+        """Top-k approximate matches per term as (concept_id, term, score)."""
+        return self.fuzzy_index.query_batch(terms, k=k, min_score=min_score)
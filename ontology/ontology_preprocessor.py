@@ -10,7 +10,9 @@ class OntologyPreprocessor:
 
     def preprocess(self):
         df = pd.read_csv(self.raw_path)
-        df = df[["concept_id", "term", "parent_id"]].drop_duplicates()
+        # keep the optional columns written by ontology_xml_csv.py
+        optional = [c for c in ("parent_ids", "tree_numbers", "entry_terms") if c in df.columns]
+        df = df[["concept_id", "term", "parent_id", *optional]].drop_duplicates()
         csv_path = self.output_dir / "mesh_terms.csv"
         df.to_csv(csv_path, index=False)
         print(f"[INFO] Ontology saved at {csv_path}")
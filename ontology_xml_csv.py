@@ -1,24 +1,146 @@
-# ontology_xml_to_csv_lxml.py
-from lxml import etree
-import pandas as pd
+# ontology_xml_csv.py
+"""Stream a MeSH descriptor XML release (e.g. desc2025.xml) into the ontology CSV.
+
+The XML is read with lxml iterparse and every DescriptorRecord is cleared
+after use, so memory stays flat regardless of the release size. Invalid
+UTF-8 bytes are dropped while reading, so no separate cleaning pass is
+needed.
+
+Output columns:
+    concept_id    DescriptorUI
+    term          preferred DescriptorName
+    parent_id     first parent DescriptorUI (empty for top-level descriptors)
+    parent_ids    every parent DescriptorUI, "|"-separated
+    tree_numbers  every TreeNumber, "|"-separated
+    entry_terms   every concept term / synonym except the preferred name, "|"-separated
+
+Parents are resolved at descriptor level: the parent of tree number
+C01.221.812 is the descriptor owning C01.221. That needs the full tree
+number -> descriptor map, so rows are written to a temporary file first
+and parents are filled in by a second streaming pass over that file.
+"""
+import argparse
+import csv
+import io
+import os
+import time
 from pathlib import Path
 
-xml_path = Path("C:/KG+RAG/desc2025_clean.xml")
-output_csv = Path("data/ontology/mesh_terms.csv")
-output_csv.parent.mkdir(parents=True, exist_ok=True)
-
-parser = etree.XMLParser(recover=True, encoding="utf-8")
-tree = etree.parse(str(xml_path), parser)
-root = tree.getroot()
-
-records = []
-for desc in root.findall("DescriptorRecord"):
-    concept_id = desc.findtext("DescriptorUI")
-    name = desc.findtext("DescriptorName/String")
-    tree_number = desc.findtext("TreeNumberList/TreeNumber")
-    parent_id = ".".join(tree_number.split(".")[:-1]) if tree_number and "." in tree_number else None
-    records.append((concept_id, name, parent_id))
-
-df = pd.DataFrame(records, columns=["concept_id", "term", "parent_id"])
-df.to_csv(output_csv, index=False)
-print(f"[INFO] Parsed and saved {len(df)} MeSH terms to {output_csv}")
+from lxml import etree
+
+SEP = "|"
+COLUMNS = ["concept_id", "term", "parent_id", "parent_ids", "tree_numbers", "entry_terms"]
+
+
+class _CleanReader(io.RawIOBase):
+    """Byte stream over a file that silently drops invalid UTF-8 sequences."""
+
+    def __init__(self, path, block_size=1 << 20):
+        self._text = open(path, "r", encoding="utf-8", errors="ignore")
+        self._block_size = block_size
+        self._pending = b""
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self._block_size
+        while len(self._pending) < size:
+            text = self._text.read(self._block_size)
+            if not text:
+                break
+            self._pending += text.encode("utf-8")
+        out, self._pending = self._pending[:size], self._pending[size:]
+        return out
+
+    def close(self):
+        self._text.close()
+        super().close()
+
+
+def iter_descriptors(xml_path):
+    """Yield (concept_id, term, tree_numbers, entry_terms) per DescriptorRecord."""
+    reader = _CleanReader(xml_path)
+    try:
+        for _, desc in etree.iterparse(reader, events=("end",), tag="DescriptorRecord", recover=True):
+            concept_id = desc.findtext("DescriptorUI")
+            name = desc.findtext("DescriptorName/String")
+            tree_numbers = [t.text for t in desc.iterfind("TreeNumberList/TreeNumber") if t.text]
+            entry_terms = []
+            for term in desc.iterfind("ConceptList/Concept/TermList/Term/String"):
+                if term.text and term.text != name and term.text not in entry_terms:
+                    entry_terms.append(term.text)
+            yield concept_id, name, tree_numbers, entry_terms
+
+            # free the record and any already-processed siblings
+            desc.clear()
+            while desc.getprevious() is not None:
+                del desc.getparent()[0]
+    finally:
+        reader.close()
+
+
+def convert(xml_path, output_csv, report_every=5000):
+    output_csv = Path(output_csv)
+    output_csv.parent.mkdir(parents=True, exist_ok=True)
+    tmp_csv = output_csv.with_suffix(output_csv.suffix + ".tmp")
+    xml_size = os.path.getsize(xml_path)
+
+    # Pass 1: stream the XML, write rows without parents, remember tree numbers
+    tree_to_id = {}
+    count = 0
+    start = time.perf_counter()
+    with open(tmp_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        for concept_id, name, tree_numbers, entry_terms in iter_descriptors(xml_path):
+            for tn in tree_numbers:
+                tree_to_id[tn] = concept_id
+            writer.writerow([concept_id, name, SEP.join(tree_numbers), SEP.join(entry_terms)])
+            count += 1
+            if report_every and count % report_every == 0:
+                elapsed = time.perf_counter() - start
+                print(f"[INFO] {count} descriptors ({count / elapsed:.0f}/s)")
+    parse_time = time.perf_counter() - start
+
+    # Pass 2: resolve descriptor-level parents from the tree number map
+    with open(tmp_csv, "r", newline="", encoding="utf-8") as src, \
+            open(output_csv, "w", newline="", encoding="utf-8") as dst:
+        writer = csv.writer(dst)
+        writer.writerow(COLUMNS)
+        for concept_id, name, tree_field, entry_field in csv.reader(src):
+            parents = []
+            for tn in tree_field.split(SEP) if tree_field else []:
+                if "." not in tn:
+                    continue
+                parent = tree_to_id.get(tn.rsplit(".", 1)[0])
+                if parent and parent != concept_id and parent not in parents:
+                    parents.append(parent)
+            writer.writerow([
+                concept_id,
+                name,
+                parents[0] if parents else "",
+                SEP.join(parents),
+                tree_field,
+                entry_field,
+            ])
+    os.remove(tmp_csv)
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"[INFO] Parsed and saved {count} MeSH descriptors to {output_csv} in {elapsed:.1f}s "
+        f"({count / parse_time:.0f} descriptors/s, {xml_size / parse_time / 1e6:.1f} MB/s XML)"
+    )
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a MeSH descriptor XML release to the ontology CSV")
+    parser.add_argument("xml_path", nargs="?", default="desc2025.xml")
+    parser.add_argument("output_csv", nargs="?", default="data/ontology/mesh_terms.csv")
+    args = parser.parse_args()
+    convert(args.xml_path, args.output_csv)
+
+
+if __name__ == "__main__":
+    main()
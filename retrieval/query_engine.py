@@ -0,0 +1,213 @@
+# retrieval/query_engine.py
+import time
+
+import numpy as np
+from neo4j import GraphDatabase, Query
+from neo4j.exceptions import Neo4jError
+
+from metrics import percentile
+
+STAGES = ("embed", "vector", "expand", "rank")
+
+# error codes of an expansion cut short by the transaction timeout; any other
+# failure (e.g. a malformed query) is a bug and is raised
+_TIMEOUT_CODES = ("Neo.ClientError.Transaction.TransactionTimedOut", "Neo.TransientError.Transaction.")
+
+# Per hit chunk: its entities, their concepts (with ancestors up to the hop
+# limit) and the typed relations extracted from that chunk (or from the chunk
+# it is a near-duplicate of). Every list is
+# cut at $fan_out inside the subquery, so a supernode never gets expanded in
+# full. {hits} is either the Neo4j vector search or an UNWIND of local hits.
+_EXPAND_QUERY = """
+{hits}
+WITH c, score
+RETURN c.id AS id, c.text AS text, score,
+       COLLECT {{
+           MATCH (c)-[:CONTAINS]->(e:Entity)
+           RETURN {{
+               id: e.id, name: e.name, type: e.type,
+               concepts: COLLECT {{
+                   MATCH (e)-[:MAPS_TO]->(k:Concept)
+                   RETURN {{
+                       concept_id: k.concept_id, term: k.term,
+                       ancestors: COLLECT {{
+                           MATCH (a:Concept)-[:PARENT_OF*1..{hops}]->(k)
+                           RETURN DISTINCT a.concept_id LIMIT $fan_out
+                       }}
+                   }} LIMIT $fan_out
+               }},
+               relations: COLLECT {{
+                   MATCH (e)-[r]->(o:Entity)
+                   WHERE coalesce(c.duplicate_of, c.id) IN r.chunk_ids
+                   RETURN DISTINCT {{type: r.type, target: o.name, confidence: r.confidence}} LIMIT $fan_out
+               }}
+           }} LIMIT $fan_out
+       }} AS entities
+"""
+
+_NEO4J_HITS = """
+CALL db.index.vector.queryNodes($index_name, $k, $embedding) YIELD node AS c, score
+"""
+
+_LOCAL_HITS = """
+UNWIND $hits AS hit
+MATCH (c:Chunk {id: hit.id})
+WITH c, hit.score AS score
+"""
+
+_CHUNKS_ONLY_QUERY = """
+{hits}
+RETURN c.id AS id, c.text AS text, score, [] AS entities
+"""
+
+
+class GraphRAGQueryEngine:
+    """Answer-context retrieval: vector search, then one graph expansion.
+
+    A question is embedded, the top-k chunks are found (in the local
+    LocalVectorIndex when given, otherwise the Neo4j `chunk_embeddings`
+    index), and their entities, concepts and relations are fetched in a
+    single parameterised Cypher call. Without a local index the vector search
+    and the expansion share that one round trip.
+
+    `max_hops` bounds the PARENT_OF ancestry walked per concept (0 disables
+    concept and relation expansion) and `fan_out` caps every list collected
+    per node. When the time left in `budget_ms` is less than the expansion
+    has recently taken, hop depth is reduced, down to returning chunks only.
+    Each query's stage timings are returned and kept for stats()/report().
+    """
+
+    def __init__(self, embedding_model, uri, user, password, local_index=None, index_name="chunk_embeddings",
+                 k=5, max_hops=2, fan_out=10, budget_ms=250, nprobe=None, graph_weight=0.1):
+        self.embedding_model = embedding_model
+        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+        self.local_index = local_index
+        self.index_name = index_name
+        self.k = k
+        self.max_hops = max_hops
+        self.fan_out = fan_out
+        self.budget_ms = budget_ms
+        self.nprobe = nprobe
+        self.graph_weight = graph_weight
+        self.timings = {stage: [] for stage in STAGES}
+        self.timings["total"] = []
+        self._expand_ms = {}  # hop depth -> moving average of expansion time
+
+    # ------------------------------
+    # stages
+    # ------------------------------
+    def embed(self, question):
+        vector = np.asarray(self.embedding_model.embed_query(question), dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def _choose_hops(self, remaining_ms):
+        """Deepest hop count whose recent expansion time fits the remaining budget."""
+        for hops in range(self.max_hops, 0, -1):
+            if self._expand_ms.get(hops, 0.0) <= remaining_ms:
+                return hops
+        return 0
+
+    def _expand(self, hits_clause, params, hops, remaining_ms):
+        if hops > 0:
+            text = _EXPAND_QUERY.format(hits=hits_clause, hops=int(hops))
+        else:
+            text = _CHUNKS_ONLY_QUERY.format(hits=hits_clause)
+        params = dict(params, fan_out=self.fan_out)
+        timeout = max(remaining_ms, 1.0) / 1000.0 if self.budget_ms else None
+        with self.driver.session() as session:
+            try:
+                return [r.data() for r in session.run(Query(text, timeout=timeout), params)]
+            except Neo4jError as e:
+                if hops == 0 or not (e.code or "").startswith(_TIMEOUT_CODES):
+                    raise
+                # out of budget: fall back to the plain hits
+                print(f"[WARN] Graph expansion failed ({e}); returning chunks only")
+                text = _CHUNKS_ONLY_QUERY.format(hits=hits_clause)
+                return [r.data() for r in session.run(text, params)]
+
+    def _rank(self, rows):
+        for row in rows:
+            linked = sum(1 for e in row["entities"] if e.get("concepts"))
+            row["graph_score"] = min(1.0, linked / self.fan_out) if self.fan_out else 0.0
+            row["rank_score"] = row["score"] + self.graph_weight * row["graph_score"]
+        rows.sort(key=lambda r: r["rank_score"], reverse=True)
+        return rows
+
+    # ------------------------------
+    # public API
+    # ------------------------------
+    def query(self, question, k=None):
+        """Return (ranked context rows, stage timings in ms) for a question."""
+        k = k or self.k
+        timings = {}
+        start = time.perf_counter()
+
+        t = time.perf_counter()
+        embedding = self.embed(question)
+        timings["embed"] = (time.perf_counter() - t) * 1000
+
+        t = time.perf_counter()
+        if self.local_index is not None:
+            hits = self.local_index.search(embedding, k=k, nprobe=self.nprobe)
+            hits_clause = _LOCAL_HITS
+            params = {"hits": [{"id": i, "score": s} for i, s in hits]}
+        else:
+            hits_clause = _NEO4J_HITS
+            params = {"index_name": self.index_name, "k": k, "embedding": embedding.tolist()}
+        timings["vector"] = (time.perf_counter() - t) * 1000
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        remaining_ms = self.budget_ms - elapsed_ms if self.budget_ms else float("inf")
+        hops = self._choose_hops(remaining_ms)
+        t = time.perf_counter()
+        rows = self._expand(hits_clause, params, hops, remaining_ms)
+        timings["expand"] = (time.perf_counter() - t) * 1000
+        if hops > 0:
+            prev = self._expand_ms.get(hops)
+            self._expand_ms[hops] = timings["expand"] if prev is None else 0.8 * prev + 0.2 * timings["expand"]
+
+        t = time.perf_counter()
+        rows = self._rank(rows)
+        timings["rank"] = (time.perf_counter() - t) * 1000
+        timings["total"] = (time.perf_counter() - start) * 1000
+        timings["hops"] = hops
+
+        for stage in self.timings:
+            self.timings[stage].append(timings[stage])
+        return rows, timings
+
+    @staticmethod
+    def format_context(rows):
+        """Plain-text context block for an LLM prompt."""
+        parts = []
+        for row in rows:
+            lines = [row["text"] or ""]
+            for e in row["entities"]:
+                concepts = ", ".join(f"{c['term']} ({c['concept_id']})" for c in e.get("concepts", []))
+                relations = "; ".join(f"{r['type']} {r['target']}" for r in e.get("relations", []))
+                line = f"- {e['name']} [{e.get('type')}]"
+                if concepts:
+                    line += f" -> {concepts}"
+                if relations:
+                    line += f" | {relations}"
+                lines.append(line)
+            parts.append("\n".join(lines))
+        return "\n\n".join(parts)
+
+    def stats(self):
+        out = {"queries": len(self.timings["total"])}
+        for stage, values in self.timings.items():
+            ordered = sorted(values)
+            out[f"{stage}_p50_ms"] = percentile(ordered, 50)
+            out[f"{stage}_p99_ms"] = percentile(ordered, 99)
+        return out
+
+    def report(self):
+        s = self.stats()
+        stages = " ".join(
+            f"{stage}={s[f'{stage}_p50_ms']:.1f}/{s[f'{stage}_p99_ms']:.1f}ms" for stage in (*STAGES, "total")
+        )
+        print(f"[INFO] {s['queries']} queries, p50/p99 per stage: {stages}")
+
+    def close(self):
+        self.driver.close()
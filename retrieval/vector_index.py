@@ -0,0 +1,264 @@
+# retrieval/vector_index.py
+import json
+import os
+import time
+
+import numpy as np
+
+
+class LocalVectorIndex:
+    """NumPy vector index memory-mapped from a directory on disk.
+
+    Layout of `index_dir`:
+        vectors.f32   row-major float32 matrix, appended in place
+        ids.jsonl     one [id, text_hash] line per row
+        assign.i32    IVF list of each row (only after build_ivf)
+        centroids.npy IVF centroids (only after build_ivf)
+        meta.json     dim and committed row count
+
+    Vectors are expected to be L2-normalised, so the dot product is the
+    cosine similarity. Search is exact (one matrix product over the mmap)
+    unless an IVF layout was built, in which case only the `nprobe` closest
+    lists are scored. Rows are committed by rewriting meta.json after the
+    data is flushed, so other processes sharing the mmap only ever see
+    complete rows; they pick up appends with refresh().
+    """
+
+    def __init__(self, index_dir, dim=None):
+        self.index_dir = index_dir
+        os.makedirs(index_dir, exist_ok=True)
+        self._vectors_path = os.path.join(index_dir, "vectors.f32")
+        self._ids_path = os.path.join(index_dir, "ids.jsonl")
+        self._assign_path = os.path.join(index_dir, "assign.i32")
+        self._centroids_path = os.path.join(index_dir, "centroids.npy")
+        self._meta_path = os.path.join(index_dir, "meta.json")
+
+        meta = self._read_meta()
+        if meta is None:
+            if dim is None:
+                raise ValueError(f"{index_dir} has no index yet; pass dim to create one")
+            meta = {"dim": dim, "count": 0}
+            for path in (self._vectors_path, self._ids_path):
+                open(path, "wb").close()
+            self._write_meta(meta)
+        elif dim is not None and dim != meta["dim"]:
+            raise ValueError(f"Index dim is {meta['dim']}, got {dim}")
+        self.dim = meta["dim"]
+        self.refresh()
+
+    # ------------------------------
+    # metadata / mapping
+    # ------------------------------
+    def _read_meta(self):
+        try:
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, meta):
+        tmp_path = f"{self._meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._meta_path)
+
+    def refresh(self):
+        """Re-map the files, picking up rows appended by other processes."""
+        self.count = self._read_meta()["count"]
+        self.vectors = (
+            np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(self.count, self.dim))
+            if self.count else np.zeros((0, self.dim), dtype=np.float32)
+        )
+        self.ids = []
+        self.hashes = []
+        with open(self._ids_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if len(self.ids) >= self.count:
+                    break
+                row_id, row_hash = json.loads(line)
+                self.ids.append(row_id)
+                self.hashes.append(row_hash)
+        self.row_of = {row_id: i for i, row_id in enumerate(self.ids)}
+
+        self.centroids = None
+        self.assign = None
+        self._list_rows = None
+        self._list_offsets = None
+        if os.path.exists(self._centroids_path):
+            self.centroids = np.load(self._centroids_path, mmap_mode="r")
+            n_assigned = os.path.getsize(self._assign_path) // 4
+            self.assign = np.memmap(self._assign_path, dtype=np.int32, mode="r", shape=(min(n_assigned, self.count),))
+            # rows grouped by list: list j is _list_rows[_list_offsets[j]:_list_offsets[j + 1]]
+            self._list_rows = np.argsort(self.assign, kind="stable")
+            counts = np.bincount(self.assign, minlength=len(self.centroids))
+            self._list_offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    def __len__(self):
+        return self.count
+
+    # ------------------------------
+    # writes
+    # ------------------------------
+    def add(self, ids, vectors, hashes=None):
+        """Append vectors for ids not already in the index. Returns rows added."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        hashes = hashes if hashes is not None else [None] * len(ids)
+        keep = [i for i, row_id in enumerate(ids) if row_id not in self.row_of]
+        # drop duplicates inside the batch as well
+        seen = set()
+        keep = [i for i in keep if not (ids[i] in seen or seen.add(ids[i]))]
+        if not keep:
+            return 0
+
+        new_vectors = np.ascontiguousarray(vectors[keep])
+        with open(self._vectors_path, "r+b") as f:
+            f.seek(self.count * self.dim * 4)
+            f.write(new_vectors.tobytes())
+            f.truncate()
+        with open(self._ids_path, "a", encoding="utf-8") as f:
+            for i in keep:
+                f.write(json.dumps([ids[i], hashes[i]]) + "\n")
+        if self.centroids is not None:
+            assign = self._nearest_centroids(new_vectors)
+            with open(self._assign_path, "r+b") as f:
+                f.seek(self.count * 4)
+                f.write(assign.astype(np.int32).tobytes())
+        self._write_meta({"dim": self.dim, "count": self.count + len(keep)})
+        self.refresh()
+        return len(keep)
+
+    def compact(self, keep_ids):
+        """Rewrite the index keeping only rows whose id is in keep_ids."""
+        rows = [i for i, row_id in enumerate(self.ids) if row_id in keep_ids]
+        vectors = np.array(self.vectors[rows]) if rows else np.zeros((0, self.dim), dtype=np.float32)
+        ids = [self.ids[i] for i in rows]
+        hashes = [self.hashes[i] for i in rows]
+        had_ivf = self.centroids is not None
+        centroids = np.array(self.centroids) if had_ivf else None
+
+        self.vectors = None  # release the mapping before truncating the file
+        for path in (self._vectors_path, self._ids_path):
+            open(path, "wb").close()
+        for path in (self._assign_path, self._centroids_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._write_meta({"dim": self.dim, "count": 0})
+        self.refresh()
+        self.add(ids, vectors, hashes)
+        if had_ivf and len(self):
+            self._save_ivf(centroids)
+
+    # ------------------------------
+    # IVF
+    # ------------------------------
+    def _nearest_centroids(self, vectors, nprobe=1):
+        scores = vectors @ np.asarray(self.centroids).T
+        if nprobe == 1:
+            return np.argmax(scores, axis=1)
+        return np.argpartition(-scores, nprobe - 1, axis=1)[:, :nprobe]
+
+    def _save_ivf(self, centroids):
+        np.save(self._centroids_path, centroids.astype(np.float32))
+        self.centroids = np.load(self._centroids_path, mmap_mode="r")
+        assign = np.empty(self.count, dtype=np.int32)
+        for start in range(0, self.count, 65536):
+            assign[start:start + 65536] = self._nearest_centroids(np.asarray(self.vectors[start:start + 65536]))
+        assign.tofile(self._assign_path)
+        self.refresh()
+
+    def build_ivf(self, n_lists=None, iterations=10, sample_size=50000, seed=0):
+        """Cluster the vectors (spherical k-means) for approximate search."""
+        if not self.count:
+            return
+        n_lists = n_lists or max(1, int(np.sqrt(self.count)))
+        rng = np.random.default_rng(seed)
+        sample_rows = rng.choice(self.count, size=min(sample_size, self.count), replace=False)
+        sample = np.asarray(self.vectors[np.sort(sample_rows)])
+        centroids = sample[rng.choice(len(sample), size=min(n_lists, len(sample)), replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for j in range(len(centroids)):
+                members = sample[labels == j]
+                if len(members):
+                    c = members.sum(axis=0)
+                    centroids[j] = c / max(np.linalg.norm(c), 1e-12)
+        self._save_ivf(centroids)
+        print(f"[INFO] Built IVF layout with {len(centroids)} lists over {self.count} vectors")
+
+    # ------------------------------
+    # search
+    # ------------------------------
+    def search(self, query, k=10, nprobe=None):
+        """Top-k (id, score) pairs for one query vector, best first.
+
+        nprobe: with an IVF layout, score only the nprobe closest lists
+        (None = exact search over every row).
+        """
+        return self.search_batch(np.asarray(query, dtype=np.float32).reshape(1, -1), k, nprobe)[0]
+
+    def search_batch(self, queries, k=10, nprobe=None):
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        if not self.count:
+            return [[] for _ in range(len(queries))]
+
+        if nprobe and self.centroids is not None and self.assign is not None and len(self.assign) == self.count:
+            results = []
+            probes = self._nearest_centroids(queries, min(nprobe, len(self.centroids)))
+            offsets = self._list_offsets
+            for q, lists in zip(queries, probes.reshape(len(queries), -1)):
+                # sorted so the probed rows are read from the mmap in file order
+                rows = np.sort(np.concatenate([self._list_rows[offsets[j]:offsets[j + 1]] for j in lists]))
+                scores = np.asarray(self.vectors[rows]) @ q
+                results.append(self._top_k(rows, scores, k))
+            return results
+
+        scores = queries @ np.asarray(self.vectors).T
+        rows = np.arange(self.count)
+        return [self._top_k(rows, s, k) for s in scores]
+
+    def _top_k(self, rows, scores, k):
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.ids[int(rows[i])], float(scores[i])) for i in top]
+
+    # ------------------------------
+    # Neo4j consistency
+    # ------------------------------
+    def sync_with_neo4j(self, driver, label="Chunk", fetch_batch=1000):
+        """Make the index mirror the embedded `label` nodes in Neo4j.
+
+        Nodes missing locally (or whose embedding_hash changed) are fetched
+        and appended; rows whose node is gone or changed are compacted away.
+        """
+        start = time.perf_counter()
+        with driver.session() as session:
+            remote = {
+                r["id"]: r["hash"]
+                for r in session.run(
+                    f"MATCH (n:{label}) WHERE n.embedding IS NOT NULL "
+                    "RETURN n.id AS id, n.embedding_hash AS hash"
+                )
+            }
+            keep = {row_id for row_id, h in zip(self.ids, self.hashes) if row_id in remote and remote[row_id] == h}
+            if len(keep) < self.count:
+                self.compact(keep)
+            missing = [row_id for row_id in remote if row_id not in self.row_of]
+            for i in range(0, len(missing), fetch_batch):
+                records = list(session.run(
+                    f"""
+                    UNWIND $ids AS id
+                    MATCH (n:{label} {{id: id}})
+                    RETURN n.id AS id, n.embedding AS embedding, n.embedding_hash AS hash
+                    """,
+                    {"ids": missing[i:i + fetch_batch]},
+                ))
+                self.add(
+                    [r["id"] for r in records],
+                    np.asarray([r["embedding"] for r in records], dtype=np.float32),
+                    [r["hash"] for r in records],
+                )
+        elapsed = time.perf_counter() - start
+        print(f"[INFO] Synced {label} index: {self.count} rows ({len(missing)} fetched) in {elapsed:.2f}s")
@@ -0,0 +1,56 @@
+# tests/test_manifest.py
+import pytest
+
+from ingest.manifest import IngestManifest
+from ingest.text_splitter import Chunk
+
+
+def _chunks(source, file_hash, n):
+    chunks = []
+    for i in range(n):
+        c = Chunk(f"text {i}", 0, 6, part_index=i)
+        c.source, c.file_hash, c.chunk_id = source, file_hash, f"{file_hash}-{i}"
+        chunks.append(c)
+    return chunks
+
+
+class FlakyIngestor:
+    """delete_chunks fails the first `failures` times, then records the ids."""
+
+    def __init__(self, failures=1):
+        self.failures = failures
+        self.deleted = []
+
+    def delete_chunks(self, chunk_ids):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("neo4j unavailable")
+        self.deleted.extend(chunk_ids)
+        return []
+
+
+def test_failed_delete_is_retried_next_run(tmp_path):
+    path = str(tmp_path / "manifest.sqlite")
+    old = _chunks("a.pdf", "h1", 3)
+    manifest = IngestManifest(path)
+    assert manifest.register(old) == []
+    manifest.mark(old, "written")
+    manifest.close()
+
+    # the file changed; removing its old chunks from the graph fails
+    ingestor = FlakyIngestor(failures=1)
+    manifest = IngestManifest(path)
+    stale = manifest.register(_chunks("a.pdf", "h2", 2))
+    assert sorted(stale) == ["h1-0", "h1-1", "h1-2"]
+    with pytest.raises(RuntimeError):
+        manifest.purge_stale(ingestor.delete_chunks)
+    manifest.close()
+
+    # the next run sees the file as registered but still owes the delete
+    manifest = IngestManifest(path)
+    assert sorted(manifest.register(_chunks("a.pdf", "h2", 2))) == ["h1-0", "h1-1", "h1-2"]
+    manifest.purge_stale(ingestor.delete_chunks)
+    assert sorted(ingestor.deleted) == ["h1-0", "h1-1", "h1-2"]
+    assert manifest.pending_deletes() == []
+    assert manifest.purge_stale(ingestor.delete_chunks) is None
+    manifest.close()
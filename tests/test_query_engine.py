@@ -0,0 +1,66 @@
+# tests/test_query_engine.py
+import pytest
+from neo4j.exceptions import Neo4jError
+
+from retrieval.query_engine import GraphRAGQueryEngine
+
+
+class _Record:
+    def __init__(self, row):
+        self.row = row
+
+    def data(self):
+        return dict(self.row)
+
+
+class FakeSession:
+    """Raises `error` for the first (expansion) query, then returns rows."""
+
+    def __init__(self, error):
+        self.error = error
+        self.queries = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, params=None):
+        self.queries.append(query)
+        if len(self.queries) == 1:
+            raise self.error
+        return [_Record({"id": "c1", "text": "t", "score": 0.9, "entities": [], "relations": []})]
+
+
+class FakeDriver:
+    def __init__(self, error):
+        self.session_obj = FakeSession(error)
+
+    def session(self, **kwargs):
+        return self.session_obj
+
+
+def _engine(error):
+    engine = GraphRAGQueryEngine(None, "bolt://localhost:7687", "neo4j", "password")
+    engine.driver.close()
+    engine.driver = FakeDriver(error)
+    return engine
+
+
+def _error(code):
+    return Neo4jError._hydrate_neo4j(code=code, message="test")
+
+
+def test_timed_out_expansion_falls_back_to_chunks():
+    engine = _engine(_error("Neo.ClientError.Transaction.TransactionTimedOutClientConfiguration"))
+    rows = engine._expand("MATCH (c:Chunk) WITH c, 1.0 AS score", {}, hops=2, remaining_ms=100)
+    assert [r["id"] for r in rows] == ["c1"]
+    assert len(engine.driver.session_obj.queries) == 2
+
+
+def test_malformed_expansion_query_raises():
+    engine = _engine(_error("Neo.ClientError.Statement.SyntaxError"))
+    with pytest.raises(Neo4jError):
+        engine._expand("MATCH (c:Chunk WITH c", {}, hops=2, remaining_ms=100)
+    assert len(engine.driver.session_obj.queries) == 1
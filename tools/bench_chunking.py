@@ -0,0 +1,127 @@
+"""Chunking benchmark: split time and per-chunk memory on the bundled PDF(s).
+
+Pages are parsed once; each variant then splits them --repeat times and
+the best time is reported, followed by one tracemalloc pass measuring the
+memory the resulting chunks keep alive and the peak while splitting.
+
+    chunker          Chunker.iter_chunks + split_pages (Chunk records)
+    chunker-tokens   the same, sized with unit="tokens" (--tokens/--token-overlap)
+    legacy           the previous path: LangChain split_text, str.find for
+                     offsets, a metadata dict copy per chunk and a
+                     SimpleNamespace wrapper (needs langchain installed)
+
+    python tools/bench_chunking.py [--chunk-size 800] [--tokens 200] [--out bench.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from metrics import percentile
+from ingest.chunk_loader import iter_parsed_pdfs, make_chunk_id, split_pages
+from ingest.text_splitter import Chunker, approx_token_count
+
+try:
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+except ImportError:
+    RecursiveCharacterTextSplitter = None
+
+
+def _legacy_split(splitter, filename, source_hash, docs):
+    """The pre-Chunk implementation, kept here only as a baseline."""
+    out = []
+    for i, d in enumerate(docs):
+        text, doc_md = d.page_content, d.metadata or {}
+        search_from = 0
+        for j, part in enumerate(splitter.split_text(text)):
+            start = text.find(part, search_from) if part else search_from
+            if start < 0:
+                start = search_from
+            search_from = start + 1
+            c_md = dict(doc_md)
+            c_md.update({"source_index": i, "part_index": j, "start_index": start})
+            page = c_md.get("page", i)
+            md = {"source": filename, "chunk_id": make_chunk_id(source_hash, page, start),
+                  "file_hash": source_hash, **c_md}
+            out.append(SimpleNamespace(page_content=part, metadata=md))
+    return out
+
+
+def _variants(args):
+    chunker = Chunker(args.chunk_size, args.chunk_overlap)
+    token_chunker = Chunker(args.tokens, args.token_overlap, unit="tokens")
+    variants = {
+        "chunker": lambda parsed: [c for f, h, docs in parsed for c in split_pages(chunker, f, h, docs)],
+        "chunker-tokens": lambda parsed: [c for f, h, docs in parsed for c in split_pages(token_chunker, f, h, docs)],
+    }
+    if RecursiveCharacterTextSplitter is not None:
+        splitter = RecursiveCharacterTextSplitter(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+        variants["legacy"] = lambda parsed: [c for f, h, docs in parsed for c in _legacy_split(splitter, f, h, docs)]
+    return variants
+
+
+def measure(name, split, parsed, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = split(parsed)
+        times.append(time.perf_counter() - start)
+    n = len(chunks)
+    del chunks
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    chunks = split(parsed)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    sizes = sorted(len(c.page_content) for c in chunks)
+    tokens = sorted(approx_token_count(c.page_content) for c in chunks)
+    best = min(times)
+    return {
+        "variant": name,
+        "chunks": n,
+        "best_seconds": round(best, 4),
+        "us_per_chunk": round(best / n * 1e6, 2) if n else None,
+        # bytes the chunk list keeps alive (text included) and the peak while splitting
+        "retained_bytes_per_chunk": round((retained - before) / n) if n else None,
+        "peak_bytes": peak - before,
+        "chars_p50_p95_max": [round(percentile(sizes, 50)), round(percentile(sizes, 95)), sizes[-1] if sizes else 0],
+        "tokens_p50_p95_max": [round(percentile(tokens, 50)), round(percentile(tokens, 95)), tokens[-1] if tokens else 0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chunk splitting time and memory")
+    parser.add_argument("--pdf-folder", default=os.path.join(ROOT, "input"))
+    parser.add_argument("--chunk-size", type=int, default=800)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    parser.add_argument("--tokens", type=int, default=200, help="chunk size for the chunker-tokens variant")
+    parser.add_argument("--token-overlap", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", help="write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    parsed = list(iter_parsed_pdfs(args.pdf_folder))
+    report = {
+        "pages": sum(len(docs) for _, _, docs in parsed),
+        "characters": sum(len(d.page_content) for _, _, docs in parsed for d in docs),
+        "settings": {k: v for k, v in vars(args).items() if k != "out"},
+        "variants": [measure(name, split, parsed, args.repeat) for name, split in _variants(args).items()],
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Micro-benchmark for OntologyLookup.
+
+Compares the indexed lookups against the old per-entity DataFrame mask scan
+that get_parent_id used to do.
+
+    python tools/bench_ontology_lookup.py [path/to/mesh_terms.csv] [n_queries]
+"""
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import pandas as pd
+
+from ontology.ontology_lookup import OntologyLookup
+
+
+def _per_call_us(fn, args):
+    start = time.perf_counter()
+    for a in args:
+        fn(a)
+    return (time.perf_counter() - start) / len(args) * 1e6
+
+
+def main():
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "data", "ontology", "mesh_terms.csv")
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    start = time.perf_counter()
+    lookup = OntologyLookup(csv_path)
+    print(f"Loaded {len(lookup)} concepts in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    rng = random.Random(0)
+    concept_ids = rng.choices([c for c, _, _ in lookup.table.iter_concepts()], k=n_queries)
+    terms = [lookup.get_term(c) for c in concept_ids]
+
+    df = pd.read_csv(csv_path)
+
+    def _old_parent(concept_id):
+        row = df[df["concept_id"] == concept_id]
+        return row.iloc[0]["parent_id"] if not row.empty else None
+
+    old_us = _per_call_us(_old_parent, concept_ids[: min(n_queries, 500)])
+    parent_us = _per_call_us(lookup.get_parent_id, concept_ids)
+    concept_us = _per_call_us(lookup.get_concept_id, terms)
+
+    start = time.perf_counter()
+    lookup.get_parent_ids(lookup.get_concept_ids(terms))
+    batch_us = (time.perf_counter() - start) / n_queries * 1e6
+
+    print(f"DataFrame parent scan : {old_us:10.2f} us/entity")
+    print(f"get_parent_id         : {parent_us:10.2f} us/entity")
+    print(f"get_concept_id        : {concept_us:10.2f} us/entity")
+    print(f"batch term->parent    : {batch_us:10.2f} us/entity")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,409 @@
+"""Offline end-to-end benchmark of the ingestion pipeline.
+
+Runs the real load_chunks path (PDF parsing + Chunker), the extractors,
+OntologyMatcher and Neo4jIngestor, with two stand-ins so nothing external
+is needed: FakeChatModel answers every extraction prompt deterministically
+from the chunk text, and RecordingDriver accepts every Cypher call in
+memory and counts transactions, statements and rows instead of sending
+them. Reports per-stage time, round trips and peak memory as JSON so runs
+can be compared between commits.
+
+    python tools/bench_pipeline.py                      # bundled PDF(s) in input/
+    python tools/bench_pipeline.py --synthetic 200 2000 # plus synthetic corpora (pages)
+    python tools/bench_pipeline.py --out bench.json --llm-latency-ms 50
+
+With METRICS=1 the pipeline's own metrics are included per corpus.
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from extract.near_duplicates import NearDuplicateDetector
+from extract.ontology_matcher import OntologyMatcher
+from ingest.chunk_loader import _SimpleDoc, iter_parsed_pdfs, split_pages
+from ingest.neo4j_ingestor import Neo4jIngestor
+from ingest.text_splitter import Chunker
+from metrics import METRICS
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_WORD = re.compile(r"[A-Za-z][A-Za-z0-9-]+")
+
+
+# ------------------------------
+# stand-ins
+# ------------------------------
+class FakeChatModel:
+    """Deterministic chat model for EntityExtractor / RelationExtractor / CombinedExtractor.
+
+    Entities are the ontology terms (1-3 word n-grams) found in the chunk
+    text, topped up with capitalised words; relations link consecutive
+    entities. The JSON answer carries both 'entities' and 'relations', so it
+    parses under every extractor's schema. Usable anywhere in a LangChain
+    chain (plain callables are wrapped as runnables).
+    """
+
+    def __init__(self, ontology_terms, max_entities=8, latency_ms=0.0):
+        self.terms = ontology_terms
+        self.max_entities = max_entities
+        self.latency_s = latency_ms / 1000.0
+        self.calls = 0
+        self.prompt_chars = 0
+
+    def answer(self, text):
+        words = _WORD.findall(text)
+        names = []
+        seen = set()
+        for i in range(len(words)):
+            for n in (3, 2, 1):
+                gram = " ".join(words[i:i + n])
+                key = gram.lower()
+                if key in self.terms and key not in seen:
+                    seen.add(key)
+                    names.append(gram)
+                    break
+            if len(names) >= self.max_entities:
+                break
+        for w in words:
+            if len(names) >= self.max_entities:
+                break
+            if w[0].isupper() and len(w) > 3 and w.lower() not in seen:
+                seen.add(w.lower())
+                names.append(w)
+        entities = [{"name": n, "type": "Concept" if n.lower() in self.terms else "Term", "relation": None}
+                    for n in names]
+        relations = [{"entity1": a, "entity2": b, "relation_type": "associated_with", "confidence": 0.5}
+                     for a, b in zip(names, names[1:])]
+        return json.dumps({"entities": entities, "relations": relations})
+
+    def __call__(self, prompt_value):
+        prompt = prompt_value.to_string() if hasattr(prompt_value, "to_string") else str(prompt_value)
+        self.calls += 1
+        self.prompt_chars += len(prompt)
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return self.answer(prompt.rsplit("Text:", 1)[-1])
+
+
+class _RecordingResult:
+    def __iter__(self):
+        return iter(())
+
+    def consume(self):
+        return None
+
+    def single(self):
+        return None
+
+    def data(self):
+        return []
+
+
+class _RecordingTx:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def run(self, query, parameters=None, **kwargs):
+        self.driver.counters["round_trips"] += 1
+        self.driver._record(query, parameters or kwargs)
+        return _RecordingResult()
+
+
+class _RecordingSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def run(self, query, parameters=None, **kwargs):
+        # auto-commit query: one round trip on its own
+        self.driver.counters["round_trips"] += 1
+        self.driver._record(query, parameters or kwargs)
+        return _RecordingResult()
+
+    def execute_write(self, work, *args, **kwargs):
+        # statements are one round trip each, plus the commit
+        self.driver.counters["transactions"] += 1
+        self.driver.counters["round_trips"] += 1
+        return work(_RecordingTx(self.driver), *args, **kwargs)
+
+    execute_read = execute_write
+
+    def close(self):
+        pass
+
+
+class RecordingDriver:
+    """In-memory stand-in for a neo4j Driver that only counts what it is sent."""
+
+    def __init__(self):
+        self.counters = {"round_trips": 0, "transactions": 0, "statements": 0, "rows": 0}
+        self.by_query = {}
+
+    def _record(self, query, parameters):
+        self.counters["statements"] += 1
+        rows = parameters.get("rows") if isinstance(parameters, dict) else None
+        self.counters["rows"] += len(rows) if isinstance(rows, list) else 1
+        fingerprint = " ".join(str(query).split())[:80]
+        self.by_query[fingerprint] = self.by_query.get(fingerprint, 0) + 1
+
+    def session(self, **kwargs):
+        return _RecordingSession(self)
+
+    def verify_connectivity(self):
+        pass
+
+    def close(self):
+        pass
+
+
+# ------------------------------
+# corpora
+# ------------------------------
+def synthetic_corpus(n_pages, ontology_terms, page_chars=2500, seed=0):
+    """Pages of generated clinical-style sentences mentioning ontology terms."""
+    rng = random.Random(seed + n_pages)
+    terms = sorted(ontology_terms)
+    filler = ("patients were treated with", "was associated with", "in cases of", "compared to",
+              "the incidence of", "after exposure to", "was reduced by", "in combination with")
+    docs = []
+    for page in range(n_pages):
+        parts = []
+        size = 0
+        while size < page_chars:
+            sentence = f"The {rng.choice(terms)} {rng.choice(filler)} {rng.choice(terms)} " \
+                       f"{rng.choice(filler)} {rng.choice(terms)}."
+            parts.append(sentence)
+            size += len(sentence) + 1
+        docs.append(_SimpleDoc(" ".join(parts), {"source": f"synthetic_{n_pages}.pdf", "page": page}))
+    source_hash = hashlib.sha256(f"synthetic-{n_pages}-{seed}".encode()).hexdigest()
+    return [(f"synthetic_{n_pages}.pdf", source_hash, docs)]
+
+
+# ------------------------------
+# measurement
+# ------------------------------
+class StageTimer:
+    def __init__(self, driver):
+        self.driver = driver
+        self.stages = {}
+
+    @contextlib.contextmanager
+    def stage(self, name, items=0):
+        before = dict(self.driver.counters)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            s = self.stages.setdefault(name, {"seconds": 0.0, "items": 0, "round_trips": 0, "rows": 0})
+            s["seconds"] += elapsed
+            s["items"] += items
+            s["round_trips"] += self.driver.counters["round_trips"] - before["round_trips"]
+            s["rows"] += self.driver.counters["rows"] - before["rows"]
+
+    def summary(self):
+        out = {}
+        for name, s in self.stages.items():
+            out[name] = dict(s, seconds=round(s["seconds"], 4),
+                             items_per_sec=round(s["items"] / s["seconds"], 1) if s["items"] and s["seconds"] > 0 else None)
+        return out
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _make_extract_fn(fake, combined):
+    try:
+        if combined:
+            from extract.combined_extractor import CombinedExtractor
+
+            extractor = CombinedExtractor(llm=fake)
+
+            def extract(chunk):
+                result = extractor.extract(chunk.page_content)
+                return result.entities, result.relations
+        else:
+            from extract.entity_extractor import EntityExtractor
+            from extract.relation_extractor import RelationExtractor
+
+            entity_extractor = EntityExtractor(llm=fake)
+            relation_extractor = RelationExtractor(llm=fake)
+
+            def extract(chunk):
+                return entity_extractor.extract(chunk.page_content), relation_extractor.extract(chunk.page_content)
+        return extract, "extractors"
+    except ImportError as e:
+        # without LangChain the prompt/parser chain cannot be built; time the
+        # fake model's answers on their own so the rest of the pipeline still runs
+        print(f"[WARN] Extractors unavailable ({e}); using the fake model's answers directly", file=sys.stderr)
+
+        def extract(chunk):
+            data = json.loads(fake.answer(chunk.page_content))
+            fake.calls += 1
+            return data["entities"], data["relations"]
+        return extract, "fake-direct"
+
+
+def run_corpus(name, parsed_or_loader, args, ontology_terms):
+    driver = RecordingDriver()
+    timer = StageTimer(driver)
+    fake = FakeChatModel(ontology_terms, latency_ms=args.llm_latency_ms)
+    extract_fn, extract_mode = _make_extract_fn(fake, args.combined)
+    matcher = OntologyMatcher(args.ontology, fuzzy=args.fuzzy)
+    METRICS.reset()
+    if args.tracemalloc:
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log if args.quiet else sys.stdout):
+        ingestor = Neo4jIngestor(None, None, None, batch_size=args.batch_size, driver=driver)
+        with timer.stage("ontology_ingest", items=len(matcher.lookup)):
+            ingestor.ingest_ontology(args.ontology)
+
+        with timer.stage("parse"):
+            parsed = parsed_or_loader()
+        chunker = Chunker(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+        with timer.stage("split"):
+            chunks = [c for filename, source_hash, docs in parsed for c in split_pages(chunker, filename, source_hash, docs)]
+        timer.stages["parse"]["items"] = sum(len(docs) for _, _, docs in parsed)
+        timer.stages["split"]["items"] = len(chunks)
+        if args.max_chunks:
+            chunks = chunks[:args.max_chunks]
+
+        with timer.stage("insert_chunks", items=len(chunks)):
+            ingestor.insert_chunks(chunks)
+
+        duplicate_of = {}
+        if args.near_dup:
+            with timer.stage("near_dup", items=len(chunks)):
+                duplicate_of = NearDuplicateDetector(args.near_dup).assign(
+                    (c.chunk_id, c.page_content) for c in chunks)
+
+        entity_count = 0
+        for chunk in chunks:
+            if chunk.chunk_id in duplicate_of:
+                continue
+            with timer.stage("extract", items=1):
+                entities, relations = extract_fn(chunk)
+            with timer.stage("match", items=len(entities)):
+                normalized = matcher.normalize_entities(entities)
+            with timer.stage("write_extraction", items=1):
+                ingestor.write_chunk_extraction(chunk.chunk_id, normalized, relations)
+            entity_count += len(normalized)
+        if duplicate_of:
+            with timer.stage("link_duplicates", items=len(duplicate_of)):
+                ingestor.link_duplicate_chunks(duplicate_of.items())
+
+    result = {
+        "corpus": name,
+        "pages": timer.stages["parse"]["items"],
+        "chunks": len(chunks),
+        "entities": entity_count,
+        "extract_mode": extract_mode,
+        "llm_calls": fake.calls,
+        "near_duplicates": len(duplicate_of),
+        "llm_prompt_chars": fake.prompt_chars,
+        "stages": timer.summary(),
+        "total_seconds": round(sum(s["seconds"] for s in timer.stages.values()), 4),
+        "neo4j": dict(driver.counters,
+                      round_trips_per_chunk=round(driver.counters["round_trips"] / len(chunks), 2) if chunks else None),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+    if args.tracemalloc:
+        result["peak_traced_mb"] = round(tracemalloc.get_traced_memory()[1] / 1e6, 1)
+        tracemalloc.stop()
+    if args.queries:
+        result["neo4j_by_query"] = driver.by_query
+    if METRICS.enabled:
+        result["metrics"] = METRICS.snapshot()
+    print(f"[INFO] {name}: {len(chunks)} chunks in {result['total_seconds']:.2f}s, "
+          f"{driver.counters['round_trips']} round trips", file=sys.stderr)
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark (fake LLM, recording Neo4j driver)")
+    parser.add_argument("--pdf-folder", default=os.path.join(ROOT, "input"))
+    parser.add_argument("--no-pdf", action="store_true", help="skip the bundled PDF corpus")
+    parser.add_argument("--synthetic", type=int, nargs="*", default=[], metavar="PAGES",
+                        help="also run synthetic corpora of these page counts")
+    parser.add_argument("--ontology", default=os.path.join(ROOT, "data", "ontology", "mesh_terms.csv"))
+    parser.add_argument("--max-chunks", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=800)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="simulated latency per LLM call")
+    parser.add_argument("--combined", action="store_true", help="one CombinedExtractor call per chunk")
+    parser.add_argument("--fuzzy", action="store_true", help="enable fuzzy ontology matching")
+    parser.add_argument("--near-dup", type=float, default=0.0, metavar="THRESHOLD",
+                        help="skip extraction for near-duplicate chunks at this similarity")
+    parser.add_argument("--tracemalloc", action="store_true", help="also report peak Python heap (slower)")
+    parser.add_argument("--queries", action="store_true", help="include per-query statement counts")
+    parser.add_argument("--verbose", dest="quiet", action="store_false", help="show pipeline logs")
+    parser.add_argument("--out", help="write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    from ontology.ontology_lookup import OntologyLookup
+
+    ontology_terms = {term for term, _ in OntologyLookup(args.ontology).table.iter_terms()}
+
+    runs = []
+    if not args.no_pdf:
+        runs.append(("pdf:" + os.path.basename(os.path.normpath(args.pdf_folder)),
+                     lambda: list(iter_parsed_pdfs(args.pdf_folder))))
+    for pages in args.synthetic:
+        runs.append((f"synthetic:{pages}", lambda pages=pages: synthetic_corpus(pages, ontology_terms)))
+
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "settings": {k: v for k, v in vars(args).items() if k not in ("out",)},
+        "corpora": [run_corpus(name, loader, args, ontology_terms) for name, loader in runs],
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Traversal benchmark: Relation supernodes vs typed relationships.
+
+Builds the same random relation set twice in a live Neo4j, under throwaway
+labels (BenchEntity / BenchRelation) so real data is untouched:
+
+    old: (a)-[:RELATES_TO]->(r:BenchRelation {type})-[:RELATES_TO]->(b)
+    new: (a)-[:TYPE {confidence, chunk_ids}]->(b)
+
+and times the write plus two traversals per model: typed neighbours of an
+entity and two-hop reachability. Each query is PROFILEd once to report db
+hits, and the result sizes show the false pairs the shared node introduces
+(in the old model every a that "treats" anything reaches every b that is
+"treated"). Everything is deleted afterwards unless --keep is given.
+
+    python tools/bench_relation_traversal.py [--entities 2000] [--relations 20000] [--types 8]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from neo4j import GraphDatabase
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from config import NEO4J_URI, NEO4J_USER, NEO4J_PASS
+from metrics import percentile
+from ingest.neo4j_ingestor import RELATION_TYPES, Neo4jIngestor
+
+_OLD_WRITE = """
+UNWIND $rows AS row
+MATCH (a:BenchEntity {id: row.e1_id}), (b:BenchEntity {id: row.e2_id})
+MERGE (r:BenchRelation {type: row.relation_type})
+SET r.confidence = row.confidence
+MERGE (a)-[:RELATES_TO]->(r)-[:RELATES_TO]->(b)
+"""
+
+_NEW_WRITE = """
+UNWIND $rows AS row
+MATCH (a:BenchEntity {{id: row.e1_id}}), (b:BenchEntity {{id: row.e2_id}})
+MERGE (a)-[r:`{rel_type}`]->(b)
+SET r.type = row.relation_type, r.confidence = row.confidence, r.chunk_ids = [row.chunk_id]
+"""
+
+# formatted with the sampled row's relationship type, hence the doubled braces
+QUERIES = {
+    "neighbours": {
+        "old": """
+            MATCH (a:BenchEntity {{id: $id}})-[:RELATES_TO]->(r:BenchRelation {{type: $type}})-[:RELATES_TO]->(b)
+            RETURN count(DISTINCT b) AS n
+        """,
+        "new": """
+            MATCH (a:BenchEntity {{id: $id}})-[:`{rel_type}`]->(b)
+            RETURN count(DISTINCT b) AS n
+        """,
+    },
+    "two_hop": {
+        "old": """
+            MATCH (a:BenchEntity {{id: $id}})-[:RELATES_TO]->(:BenchRelation)-[:RELATES_TO]->(b:BenchEntity)
+                  -[:RELATES_TO]->(:BenchRelation)-[:RELATES_TO]->(c:BenchEntity)
+            RETURN count(DISTINCT c) AS n
+        """,
+        "new": """
+            MATCH (a:BenchEntity {{id: $id}})-->(b:BenchEntity)-->(c:BenchEntity)
+            RETURN count(DISTINCT c) AS n
+        """,
+    },
+}
+
+
+def _db_hits(plan):
+    return plan.get("dbHits", 0) + sum(_db_hits(child) for child in plan.get("children", []))
+
+
+def _write(session, query, rows, batch_size):
+    start = time.perf_counter()
+    for i in range(0, len(rows), batch_size):
+        session.execute_write(lambda tx, batch: tx.run(query, {"rows": batch}).consume(), rows[i:i + batch_size])
+    return time.perf_counter() - start
+
+
+def build(driver, args):
+    rng = random.Random(args.seed)
+    # labels of distinct vocabulary types, as relation_schema maps them
+    types = [t.lower().replace("_", " ") for t in RELATION_TYPES][:args.types]
+    rows = [
+        {
+            "e1_id": f"bench_{rng.randrange(args.entities)}",
+            "e2_id": f"bench_{rng.randrange(args.entities)}",
+            "relation_type": rng.choice(types),
+            "confidence": round(rng.random(), 3),
+            "chunk_id": f"bench_chunk_{i // 5}",
+        }
+        for i in range(args.relations)
+    ]
+    by_type = {}
+    for row in rows:
+        by_type.setdefault(Neo4jIngestor.relationship_type(row["relation_type"]), []).append(row)
+
+    with driver.session() as session:
+        session.run("CREATE INDEX bench_entity_id IF NOT EXISTS FOR (e:BenchEntity) ON (e.id)").consume()
+        session.run("CREATE INDEX bench_relation_type IF NOT EXISTS FOR (r:BenchRelation) ON (r.type)").consume()
+        session.run("CALL db.awaitIndexes(300)").consume()
+        _write(session, "UNWIND $rows AS row MERGE (:BenchEntity {id: row.id})",
+               [{"id": f"bench_{i}"} for i in range(args.entities)], args.batch_size)
+        write_s = {
+            "old": _write(session, _OLD_WRITE, rows, args.batch_size),
+            "new": sum(_write(session, _NEW_WRITE.format(rel_type=t), r, args.batch_size) for t, r in by_type.items()),
+        }
+    return rows, write_s
+
+
+def _render(template, sample):
+    """Query text and parameters for one sampled relation row."""
+    query = template.format(rel_type=Neo4jIngestor.relationship_type(sample["relation_type"]))
+    return query, {"id": sample["e1_id"], "type": sample["relation_type"]}
+
+
+def time_queries(driver, rows, args):
+    rng = random.Random(args.seed + 1)
+    samples = rng.sample(rows, min(args.samples, len(rows)))
+    results = {}
+    with driver.session() as session:
+        for name, variants in QUERIES.items():
+            for model, template in variants.items():
+                latencies, sizes = [], []
+                for sample in samples:
+                    query, params = _render(template, sample)
+                    start = time.perf_counter()
+                    sizes.append(session.run(query, params).single()["n"])
+                    latencies.append((time.perf_counter() - start) * 1000)
+                query, params = _render(template, samples[0])
+                summary = session.run("PROFILE " + query, params).consume()
+                latencies.sort()
+                results[f"{name}/{model}"] = {
+                    "p50_ms": round(percentile(latencies, 50), 2),
+                    "p95_ms": round(percentile(latencies, 95), 2),
+                    "mean_results": round(sum(sizes) / len(sizes), 1),
+                    "db_hits": _db_hits(summary.profile or {}),
+                }
+    return results
+
+
+def cleanup(driver):
+    with driver.session() as session:
+        while True:
+            n = session.execute_write(lambda tx: tx.run(
+                "MATCH (n) WHERE n:BenchEntity OR n:BenchRelation "
+                "WITH n LIMIT 1000 DETACH DELETE n RETURN count(n) AS n"
+            ).single()["n"])
+            if not n:
+                break
+        session.run("DROP INDEX bench_entity_id IF EXISTS").consume()
+        session.run("DROP INDEX bench_relation_type IF EXISTS").consume()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare relation traversals: Relation supernodes vs typed edges")
+    parser.add_argument("--entities", type=int, default=2000)
+    parser.add_argument("--relations", type=int, default=20000)
+    parser.add_argument("--types", type=int, default=8)
+    parser.add_argument("--samples", type=int, default=50, help="start entities timed per query")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep", action="store_true", help="leave the bench graph in place")
+    args = parser.parse_args()
+
+    if not all([NEO4J_URI, NEO4J_USER, NEO4J_PASS]):
+        raise RuntimeError("NEO4J credentials not found in environment variables (.env)")
+    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASS))
+    driver.verify_connectivity()
+    try:
+        cleanup(driver)
+        rows, write_s = build(driver, args)
+        report = {
+            "entities": args.entities,
+            "relations": args.relations,
+            "types": args.types,
+            "write_seconds": {k: round(v, 2) for k, v in write_s.items()},
+            "queries": time_queries(driver, rows, args),
+        }
+        print(json.dumps(report, indent=2))
+    finally:
+        if not args.keep:
+            cleanup(driver)
+        driver.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Dictionary tagger benchmark on the bundled PDF(s).
+
+Builds DictionaryTagger over the ontology CSV (optionally padded with
+--synthetic random multi-word terms made of words from the corpus, to see how
+build and scan time scale with the dictionary), tags every chunk --repeat
+times and reports the best throughput, the mentions found and how many chunks
+mention no term at all (the LLM calls DICTIONARY_TAGGER=prepass would save).
+
+--verify checks the automaton against a brute-force scan of every word
+window, so the failure / output links are exercised on real text.
+
+    python tools/bench_tagger.py [--synthetic 100000] [--verify] [--out bench.json]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from extract.dictionary_tagger import DictionaryTagger
+from ingest.chunk_loader import iter_parsed_pdfs, split_pages
+from ingest.text_splitter import Chunker
+
+_WORDS = re.compile(r"[a-z0-9]+")
+
+
+def _synthetic_terms(texts, n, seed=1):
+    """n random 1-4 word terms drawn from the corpus vocabulary."""
+    vocab = sorted({w for t in texts for w in _WORDS.findall(t.lower()) if len(w) > 2})
+    rng = random.Random(seed)
+    return [(" ".join(rng.choice(vocab) for _ in range(rng.randint(1, 4))), f"SYN{i:07d}") for i in range(n)]
+
+
+def _term_keys(tagger):
+    """The dictionary as a set of word tuples, as the tagger compiles it."""
+    keys = set()
+    for term, _ in list(tagger.lookup.table.iter_terms()) + tagger.extra_terms:
+        key = tuple(_WORDS.findall((term or "").lower()))
+        if key and len(" ".join(key)) >= tagger.min_chars:
+            keys.add(key)
+    return keys
+
+
+def _brute_force_spans(keys, longest, words):
+    """Every (first, last) word window that spells a dictionary term."""
+    return {(i, j) for i in range(len(words)) for j in range(i, min(len(words), i + longest))
+            if tuple(words[i:j + 1]) in keys}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Aho-Corasick dictionary tagger")
+    parser.add_argument("--pdf-folder", default=os.path.join(ROOT, "input"))
+    parser.add_argument("--ontology", default=os.path.join(ROOT, "data", "ontology", "mesh_terms.csv"))
+    parser.add_argument("--chunk-size", type=int, default=800)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    parser.add_argument("--synthetic", type=int, default=0, help="extra random terms added to the dictionary")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--verify", action="store_true", help="compare matches with a brute-force scan")
+    parser.add_argument("--out", help="write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    chunker = Chunker(args.chunk_size, args.chunk_overlap)
+    texts = [c.page_content for f, h, docs in iter_parsed_pdfs(args.pdf_folder)
+             for c in split_pages(chunker, f, h, docs)]
+    extra = _synthetic_terms(texts, args.synthetic) if args.synthetic else ()
+    tagger = DictionaryTagger(args.ontology, extra_terms=extra)
+
+    times = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        tagged = [tagger.tag(t) for t in texts]
+        times.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    gated = sum(1 for t in texts if tagger.has_mentions(t))
+    gate_seconds = time.perf_counter() - start
+
+    best = min(times)
+    mentions = sum(len(m) for m in tagged)
+    report = {
+        "chunks": len(texts),
+        "characters": sum(len(t) for t in texts),
+        "dictionary_terms": sum(1 for _ in tagger.lookup.table.iter_terms()) + len(extra),
+        "automaton_states": tagger.n_states,
+        "build_seconds": round(tagger.build_seconds, 3),
+        "tag_best_seconds": round(best, 4),
+        "chunks_per_second": round(len(texts) / best) if best else None,
+        "mb_per_second": round(sum(len(t) for t in texts) / best / 1e6, 2) if best else None,
+        "has_mentions_chunks_per_second": round(len(texts) / gate_seconds) if gate_seconds else None,
+        "mentions": mentions,
+        "distinct_concepts": len({m["concept_id"] for ms in tagged for m in ms}),
+        "chunks_with_mentions": gated,
+        "chunks_without_mentions": len(texts) - gated,
+        "settings": {k: v for k, v in vars(args).items() if k != "out"},
+    }
+
+    if args.verify:
+        keys = _term_keys(tagger)
+        longest = max(map(len, keys), default=1)
+        mismatched = 0
+        for text in texts:
+            words = _WORDS.findall(text.lower())
+            found = {(first, last) for first, last, _ in tagger._scan(words)}
+            if found != _brute_force_spans(keys, longest, words):
+                mismatched += 1
+        report["verify_mismatched_chunks"] = mismatched
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Import-time budget check for the lightweight entry points.
+
+Imports each module in a fresh interpreter and fails when it takes longer
+than the budget or pulls in a heavy dependency (torch, sentence-transformers,
+langchain, pandas). The neo4j driver is imported before the timer starts:
+every entry point needs it, and it loads pandas/numpy itself when they are
+installed, so only the cost added by this project is measured. Run it after
+touching config.py or the tools:
+
+    python tools/check_import_time.py [budget_seconds]
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+MODULES = ["config", "test_connection", "tools.inspect_relations"]
+HEAVY = ["torch", "sentence_transformers", "langchain", "langchain_ollama", "langchain_community", "pandas"]
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+import neo4j
+driver_s = time.perf_counter() - start
+preloaded = set(sys.modules)
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules and m not in preloaded]
+print(elapsed, driver_s, ",".join(heavy))
+"""
+
+
+def check(module, budget):
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout.split()
+    elapsed, driver_s = float(out[0]), float(out[1])
+    heavy = out[2].split(",") if len(out) > 2 else []
+    ok = elapsed <= budget and not heavy
+    status = "OK" if ok else "FAIL"
+    extra = f" (imports {', '.join(heavy)})" if heavy else ""
+    print(f"[{status}] import {module}: {elapsed * 1000:.0f}ms (+{driver_s * 1000:.0f}ms neo4j driver){extra}")
+    return ok
+
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+    results = [check(module, budget) for module in MODULES]
+    if not all(results):
+        print(f"[ERROR] Import budget of {budget:.2f}s exceeded")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Report the state of the constraints and indexes ingestion relies on.
+
+Lists every required schema entry with its state (ONLINE / POPULATING /
+FAILED / MISSING) and EXPLAINs the main ingestion statements, warning about
+any label or full index scan in their plans. Exits with status 1 when an
+entry is not ONLINE or a plan scans. --create runs the same bootstrap as
+main.py first.
+
+    python tools/check_schema.py [--create] [--embedding-dim 384]
+"""
+import argparse
+import os
+import sys
+
+from neo4j import GraphDatabase
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from config import NEO4J_URI, NEO4J_USER, NEO4J_PASS
+from ingest.schema import SchemaManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check Neo4j constraints, indexes and ingestion query plans")
+    parser.add_argument("--create", action="store_true", help="create missing constraints and indexes first")
+    parser.add_argument("--embedding-dim", type=int, help="also create the chunk vector index with this dimension")
+    parser.add_argument("--no-vector", action="store_true", help="do not require the chunk vector index")
+    args = parser.parse_args()
+
+    if not all([NEO4J_URI, NEO4J_USER, NEO4J_PASS]):
+        raise RuntimeError("NEO4J credentials not found in environment variables (.env)")
+    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASS))
+    driver.verify_connectivity()
+    schema = SchemaManager(driver)
+    try:
+        if args.create:
+            schema.ensure(args.embedding_dim)
+            states = schema.wait_online(include_vector=not args.no_vector)
+        else:
+            states = schema.verify(include_vector=not args.no_vector)
+        for name, state in states.items():
+            print(f"[{'OK' if state == 'ONLINE' else 'FAIL'}] {name}: {state}")
+        scans = schema.check_plans()
+    finally:
+        driver.close()
+
+    if scans or any(state != "ONLINE" for state in states.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,30 +7,17 @@ ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
-try:
-    from config import NEO4J_URI, NEO4J_USER, NEO4J_PASS
-except Exception as e:
-    print("Failed to import config.py from project root:", e)
-    print("Falling back to environment variables NEO4J_URI / NEO4J_USER / NEO4J_PASS")
-    # Load .env if present
-    try:
-        from dotenv import load_dotenv
-
-        load_dotenv()
-    except Exception:
-        pass
-
-    NEO4J_URI = os.environ.get("NEO4J_URI")
-    NEO4J_USER = os.environ.get("NEO4J_USER")
-    NEO4J_PASS = os.environ.get("NEO4J_PASS")
-    if not all([NEO4J_URI, NEO4J_USER, NEO4J_PASS]):
-        raise RuntimeError("NEO4J credentials not found in config.py or environment variables (.env)")
+# config reads NEO4J_URI / NEO4J_USER / NEO4J_PASS from the environment or .env
+# and does not load any model, so this import stays fast.
+from config import NEO4J_URI, NEO4J_USER, NEO4J_PASS
 
 def run_query(driver, cypher):
     with driver.session() as session:
         return [record for record in session.run(cypher)]
 
 def main():
+    if not all([NEO4J_URI, NEO4J_USER, NEO4J_PASS]):
+        raise RuntimeError("NEO4J credentials not found in environment variables (.env)")
     print(f"Connecting to {NEO4J_URI} as {NEO4J_USER}")
     driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASS))
 
@@ -56,10 +43,10 @@ def main():
         # fallback: sample labels via scanning small set
         print("Could not run CALL db.labels(); proceeding without label summary")
 
-    # Count relation nodes
+    # Relation nodes are left over from the old model; tools/migrate_relations.py removes them
     q_relation_nodes = "MATCH (r:Relation) RETURN count(r) AS relation_nodes"
     relation_nodes = run_query(driver, q_relation_nodes)[0]["relation_nodes"]
-    print(f"Relation nodes (label Relation): {relation_nodes}")
+    print(f"Relation nodes (label Relation, pre-migration): {relation_nodes}")
 
     # Top relationship types by count
     q_types = "MATCH ()-[r]->() RETURN type(r) AS rel_type, count(*) AS cnt ORDER BY cnt DESC LIMIT 50"
@@ -68,14 +55,14 @@ def main():
     for rec in types:
         print(f"  {rec['rel_type']}: {rec['cnt']}")
 
-    # Sample relation node connections (both HAS_RELATION and RELATES_TO patterns)
+    # Relation labels recorded on entities
     q_sample1 = (
-        "MATCH (e:Entity)-[hr:HAS_RELATION]->(r:Relation) RETURN e.name AS entity, r.type AS rel_type LIMIT 20"
+        "MATCH (e:Entity) WHERE e.relations IS NOT NULL RETURN e.name AS entity, e.relations AS relations LIMIT 20"
     )
     s1 = run_query(driver, q_sample1)
-    print("Sample HAS_RELATION edges (entity -> relation.type):")
+    print("Sample entity relation labels (entity -> relations):")
     for rec in s1:
-        print(f"  {rec['entity']} -> {rec['rel_type']}")
+        print(f"  {rec['entity']} -> {rec['relations']}")
 
     # Sample some nodes by label
     print("\nSample nodes by label:")
@@ -104,12 +91,13 @@ def main():
         print("No Concept nodes or query failed")
 
     q_sample2 = (
-        "MATCH (a:Entity)-[:RELATES_TO]->(r:Relation)-[:RELATES_TO]->(b:Entity) RETURN a.name AS a, r.type AS rel_type, b.name AS b LIMIT 20"
+        "MATCH (a:Entity)-[r]->(b:Entity) WHERE r.chunk_ids IS NOT NULL "
+        "RETURN a.name AS a, r.type AS rel_type, r.confidence AS confidence, size(r.chunk_ids) AS chunks, b.name AS b LIMIT 20"
     )
     s2 = run_query(driver, q_sample2)
-    print("Sample RELATES_TO chain edges (entity -rel-> relation -rel-> entity):")
+    print("Sample entity relations (entity -type-> entity, confidence, supporting chunks):")
     for rec in s2:
-        print(f"  {rec['a']} -[{rec['rel_type']}]- {rec['b']}")
+        print(f"  {rec['a']} -[{rec['rel_type']}]-> {rec['b']} ({rec['confidence']}, {rec['chunks']} chunks)")
 
     driver.close()
 
@@ -0,0 +1,199 @@
+"""Migrate an existing graph from Relation nodes to typed relationships.
+
+Older runs stored every relation as
+
+    (a:Entity)-[:RELATES_TO]->(r:Relation {type})-[:RELATES_TO]->(b:Entity)
+
+with one shared Relation node per type, plus (e)-[:HAS_RELATION]->(r) for the
+entity-level relation label and, from RelationIngestor, (a)-[:REL {type}]->(b).
+This rewrites them into the current model (see Neo4jIngestor.write_relations):
+
+- Supernode relations become (a)-[:TYPE]->(b). The shared node no longer
+  says which a belongs with which b, so a pair is only recreated when some
+  chunk CONTAINS both entities; those chunks become the edge's chunk_ids.
+- HAS_RELATION edges become entries in e.relations.
+- REL {type} edges become typed edges without provenance.
+- Typed edges written when every free-text label got its own relationship
+  type are rewritten onto the fixed vocabulary (RELATION_TYPES, else
+  RELATED_TO with the label in r.type), keeping their chunk_ids.
+- Afterwards the old edges and Relation nodes are deleted, in batches.
+
+    python tools/migrate_relations.py [--dry-run] [--batch-size 500]
+"""
+import argparse
+import os
+import sys
+
+from neo4j import GraphDatabase
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from config import NEO4J_URI, NEO4J_USER, NEO4J_PASS
+from ingest.neo4j_ingestor import RELATION_TYPES, Neo4jIngestor
+
+_COUNTS = {
+    "Relation nodes": "MATCH (r:Relation) RETURN count(r) AS n",
+    "RELATES_TO edges": "MATCH (:Entity)-[x:RELATES_TO]->(:Relation) RETURN count(x) AS n",
+    "HAS_RELATION edges": "MATCH (:Entity)-[x:HAS_RELATION]->(:Relation) RETURN count(x) AS n",
+    "REL edges": "MATCH (:Entity)-[x:REL]->(:Entity) RETURN count(x) AS n",
+    "free-text typed edges": "MATCH (:Entity)-[x]->(:Entity) WHERE NOT type(x) IN $keep RETURN count(x) AS n",
+}
+# relationship types left alone by the free-text rewrite
+_KEEP_TYPES = sorted(RELATION_TYPES) + ["RELATED_TO", "REL", "RELATES_TO", "HAS_RELATION"]
+
+# Chunk ids are paged by id so each call only walks a batch of chunks;
+# starting from the chunk keeps the supernode from being expanded in full.
+_CHUNK_PAGE = """
+MATCH (c:Chunk)
+WHERE c.id > $after
+RETURN c.id AS id
+ORDER BY id
+LIMIT $limit
+"""
+
+_CHUNK_RELATIONS = """
+UNWIND $chunk_ids AS chunk_id
+MATCH (c:Chunk {id: chunk_id})-[:CONTAINS]->(a:Entity)-[:RELATES_TO]->(r:Relation)
+MATCH (r)-[:RELATES_TO]->(b:Entity)<-[:CONTAINS]-(c)
+WHERE a <> b
+RETURN a.id AS e1_id, b.id AS e2_id, r.type AS relation_type, r.confidence AS confidence, chunk_id
+"""
+
+_HAS_RELATION = """
+MATCH (e:Entity)-[x:HAS_RELATION]->(r:Relation)
+WITH e, x, r LIMIT $limit
+WITH e, x, r, coalesce(e.relations, []) AS labels
+SET e.relations = CASE WHEN r.type IN labels THEN labels ELSE labels + r.type END
+DELETE x
+RETURN count(x) AS n
+"""
+
+_REL_EDGES = """
+MATCH (a:Entity)-[x:REL]->(b:Entity)
+RETURN elementId(x) AS xid, a.id AS e1_id, b.id AS e2_id, x.type AS relation_type, x.confidence AS confidence
+LIMIT $limit
+"""
+
+# Entity-entity edges outside the current vocabulary (REL is migrated above)
+_FREE_TEXT_EDGES = """
+MATCH (a:Entity)-[x]->(b:Entity)
+WHERE NOT type(x) IN $keep
+RETURN elementId(x) AS xid, a.id AS e1_id, b.id AS e2_id, coalesce(x.type, type(x)) AS relation_type,
+       x.confidence AS confidence, coalesce(x.chunk_ids, []) AS chunk_ids
+LIMIT $limit
+"""
+
+_DELETE_BY_ID = """
+UNWIND $ids AS xid
+MATCH ()-[x]->()
+WHERE elementId(x) = xid
+DELETE x
+"""
+
+_DELETE_OLD_EDGES = """
+MATCH (:Relation)-[x]-()
+WITH x LIMIT $limit
+DELETE x
+RETURN count(x) AS n
+"""
+
+_DELETE_RELATION_NODES = """
+MATCH (r:Relation)
+WITH r LIMIT $limit
+DETACH DELETE r
+RETURN count(r) AS n
+"""
+
+
+def count_old_model(driver):
+    with driver.session() as session:
+        return {name: session.run(q, {"keep": _KEEP_TYPES}).single()["n"] for name, q in _COUNTS.items()}
+
+
+def _repeat(driver, query, limit):
+    """Run a LIMITed write query until it reports 0 rows touched."""
+    total = 0
+    with driver.session() as session:
+        while True:
+            n = session.execute_write(lambda tx: tx.run(query, {"limit": limit}).single()["n"])
+            if not n:
+                return total
+            total += n
+
+
+def migrate_supernode_relations(driver, ingestor, batch_size):
+    written = 0
+    after = ""
+    with driver.session() as session:
+        while True:
+            chunk_ids = [r["id"] for r in session.run(_CHUNK_PAGE, {"after": after, "limit": batch_size})]
+            if not chunk_ids:
+                return written
+            rows = [r.data() for r in session.run(_CHUNK_RELATIONS, {"chunk_ids": chunk_ids})]
+            if rows:
+                written += ingestor.write_relations(rows, batch_size=batch_size)
+            after = chunk_ids[-1]
+
+
+def migrate_rel_edges(driver, ingestor, batch_size):
+    migrated = 0
+    with driver.session() as session:
+        while True:
+            rows = [r.data() for r in session.run(_REL_EDGES, {"limit": batch_size})]
+            if not rows:
+                return migrated
+            ingestor.write_relations(rows, batch_size=batch_size)
+            session.execute_write(lambda tx: tx.run(_DELETE_BY_ID, {"ids": [r["xid"] for r in rows]}).consume())
+            migrated += len(rows)
+
+
+def migrate_free_text_types(driver, ingestor, batch_size):
+    """Rewrite edges typed by their raw label onto the fixed vocabulary."""
+    migrated = 0
+    with driver.session() as session:
+        while True:
+            edges = [r.data() for r in session.run(_FREE_TEXT_EDGES, {"keep": _KEEP_TYPES, "limit": batch_size})]
+            if not edges:
+                return migrated
+            # one row per supporting chunk, so chunk_ids carry over
+            rows = [
+                {**{k: e[k] for k in ("e1_id", "e2_id", "relation_type", "confidence")}, "chunk_id": chunk_id}
+                for e in edges for chunk_id in (e["chunk_ids"] or [None])
+            ]
+            ingestor.write_relations(rows, batch_size=batch_size)
+            session.execute_write(lambda tx: tx.run(_DELETE_BY_ID, {"ids": [e["xid"] for e in edges]}).consume())
+            migrated += len(edges)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replace Relation nodes with typed relationships")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be migrated")
+    args = parser.parse_args()
+
+    if not all([NEO4J_URI, NEO4J_USER, NEO4J_PASS]):
+        raise RuntimeError("NEO4J credentials not found in environment variables (.env)")
+    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASS))
+    driver.verify_connectivity()
+
+    counts = count_old_model(driver)
+    for name, n in counts.items():
+        print(f"[INFO] {name}: {n}")
+    if args.dry_run or not any(counts.values()):
+        driver.close()
+        return
+
+    ingestor = Neo4jIngestor(NEO4J_URI, NEO4J_USER, NEO4J_PASS, batch_size=args.batch_size, driver=driver)
+    print(f"[INFO] Typed relations from Relation nodes: {migrate_supernode_relations(driver, ingestor, args.batch_size)}")
+    print(f"[INFO] Typed relations from REL edges: {migrate_rel_edges(driver, ingestor, args.batch_size)}")
+    print(f"[INFO] Free-text typed edges rewritten: {migrate_free_text_types(driver, ingestor, args.batch_size)}")
+    print(f"[INFO] HAS_RELATION edges folded into Entity.relations: {_repeat(driver, _HAS_RELATION, args.batch_size)}")
+    print(f"[INFO] Old RELATES_TO edges deleted: {_repeat(driver, _DELETE_OLD_EDGES, args.batch_size * 10)}")
+    print(f"[INFO] Relation nodes deleted: {_repeat(driver, _DELETE_RELATION_NODES, args.batch_size)}")
+    ingestor.close()
+
+
+if __name__ == "__main__":
+    main()